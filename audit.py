@@ -0,0 +1,111 @@
+import os
+import time
+
+from channel_io import write_channels
+from snapshots import diff_channels
+
+
+DEFAULT_AUDIT_DIR = os.path.expanduser("~/.youtubetransfer/audits")
+# Page archive account of harvests without a profile, kept apart from the
+# source account so its pages are never offered as the list to transfer
+AUDIT_ACCOUNT = "audit"
+
+
+class SubscriptionAudit:
+    """Check a target account against the channels it should follow.
+
+    The account's subscriptions are harvested once, the same way phase 1
+    reads the old account. The result is set-diffed against the intended
+    selection: intended channels the account lacks are missing, and
+    channels it follows without being intended are unexpected. A single
+    harvest is much cheaper than opening every channel page again.
+
+    Channels are compared by the ID or @handle in their URL. With
+    ``resolve``, handles are looked up so they also match IDs; without
+    it, a channel listed by handle on one side and by ID on the other is
+    reported as both missing and unexpected.
+    """
+
+    def __init__(self, intended, extractor_factory=None, resolve=None):
+        self.intended = intended
+        self.extractor_factory = extractor_factory or _default_extractor
+        # Maps a channel URL to its UC... ID, or None; see match_by_id
+        self.resolve = resolve
+
+    def harvest(self):
+        print("\nReading the subscriptions of the NEW account...")
+        return self.extractor_factory().get_channel_list()
+
+    def run(self, harvested=None):
+        """Return the audit report, or None if the account couldn't be read."""
+        if harvested is None:
+            harvested = self.harvest()
+            if harvested is None:
+                return None
+        missing, unexpected = diff_channels(harvested, self.intended)
+        if self.resolve:
+            missing, unexpected = match_by_id(missing, unexpected, self.resolve)
+        return {
+            "intended": sum(1 for _, _, active in self.intended if active),
+            "harvested": sum(1 for _, _, active in harvested if active),
+            "missing": [{"name": n, "url": u} for n, u in missing],
+            "unexpected": [{"name": n, "url": u} for n, u in unexpected],
+            "audited": round(time.time(), 3),
+        }
+
+
+def match_by_id(missing, unexpected, resolve):
+    """Drop pairs that are one channel under two URL forms.
+
+    A channel can be listed by @handle on one side and by channel ID on
+    the other (the Data API only knows IDs). ``resolve`` looks up the ID
+    behind each URL; a missing and an unexpected entry with the same ID
+    are the same channel. URLs that can't be resolved stay unpaired.
+    """
+    ids = {}
+    for name, url in unexpected:
+        channel_id = resolve(url)
+        if channel_id:
+            ids.setdefault(channel_id, []).append((name, url))
+    paired = set()
+    still_missing = []
+    for name, url in missing:
+        candidates = ids.get(resolve(url))
+        if candidates:
+            paired.add(candidates.pop())
+        else:
+            still_missing.append((name, url))
+    return still_missing, [entry for entry in unexpected if entry not in paired]
+
+
+def print_audit(report, limit=20):
+    print("\n" + "=" * 58)
+    print("Audit of the NEW account")
+    print("=" * 58)
+    print(f"Channels selected: {report['intended']}")
+    print(f"Channels found on the account: {report['harvested']}")
+    for field, title in (("missing", "Missing"), ("unexpected", "Not in the selection")):
+        channels = report[field]
+        print(f"{title}: {len(channels)}")
+        for channel in channels[:limit]:
+            print(f"  {channel['name']}  {channel['url']}")
+        if len(channels) > limit:
+            print(f"  ... and {len(channels) - limit} more")
+
+
+def missing_channels(report):
+    return [(c["name"], c["url"], True) for c in report["missing"]]
+
+
+def write_missing(report, directory=DEFAULT_AUDIT_DIR):
+    """Save the missing channels as a channel list and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("missing-%Y%m%d-%H%M%S.jsonl"))
+    write_channels(missing_channels(report), path, "jsonl")
+    return path
+
+
+def _default_extractor():
+    from channel_extractor import ChannelExtractor
+
+    return ChannelExtractor(interactive=False, account=AUDIT_ACCOUNT)
@@ -0,0 +1,62 @@
+"""Benchmark the Data API backend against the local mock API.
+
+Subscribes a fresh account to every mock channel for each concurrency
+level, once with pooled keep-alive connections and once opening a new
+connection per call, and prints wall time, inserts per second and how
+many TCP connections the server saw. Needs no browser.
+
+    python benchmarks/bench_api.py --channels 300 --latency 0.05 --concurrency 1 4 16
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock_youtube_api  # noqa: E402
+from youtube_api import ApiChannelSubscriber, Credentials, QuotaLedger, YouTubeApi  # noqa: E402
+
+
+def run_once(args, concurrency, pool_size, ledger_dir):
+    state = mock_youtube_api.MockApiState(
+        args.channels, latency=args.latency, daily_quota=10**9
+    )
+    server = mock_youtube_api.start_server(state)
+    ledger = QuotaLedger(os.path.join(ledger_dir, f"quota-{concurrency}-{pool_size}.json"), daily_limit=10**9)
+    api = YouTubeApi(Credentials(state.token), server.base_url, ledger, pool_size=pool_size, max_rate=0)
+    subscriber = ApiChannelSubscriber(api, interactive=False, concurrency=concurrency)
+    start = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, _, new = subscriber.subscribe_to_channels(mock_youtube_api.channel_records(state))
+    elapsed = time.monotonic() - start
+    api.close()
+    server.shutdown()
+    return elapsed, new, state.connections, ledger.used()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every API call")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{args.channels} channels, {args.latency}s per call")
+    print(f"{'calls':>6}{'pooled':>8}{'wall s':>9}{'ins/s':>8}{'conns':>7}{'units':>8}{'ok':>6}")
+    with tempfile.TemporaryDirectory() as ledger_dir:
+        for concurrency in args.concurrency:
+            for pooled, pool_size in (("yes", concurrency), ("no", 0)):
+                elapsed, new, connections, units = run_once(args, concurrency, pool_size, ledger_dir)
+                print(
+                    f"{concurrency:>6}{pooled:>8}{elapsed:>9.2f}{new / elapsed:>8.1f}"
+                    f"{connections:>7}{units:>8}{new:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
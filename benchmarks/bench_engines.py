@@ -0,0 +1,129 @@
+"""Benchmark the Selenium engine against the direct CDP engine.
+
+Measures the round trip of a trivial script (Selenium execute_script via
+chromedriver vs. one Runtime.evaluate over the DevTools websocket), then
+subscribes to every channel of the local stand-in site with each engine
+and reports channels per second. Needs Chrome.
+
+    python benchmarks/bench_engines.py --channels 60 --latency 0.5 --concurrency 1 4 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cdp_engine import CDPBrowser, CDPChannelSubscriber  # noqa: E402
+from channel_subscriber import ChannelSubscriber  # noqa: E402
+import standin_site  # noqa: E402
+from timeouts import TimeoutCalibration  # noqa: E402
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return (
+        statistics.mean(samples) * 1000,
+        samples[len(samples) // 2] * 1000,
+        samples[int(len(samples) * 0.95)] * 1000,
+    )
+
+
+def selenium_latency(base_url, commands):
+    subscriber = ChannelSubscriber(interactive=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        driver = subscriber.get_secure_driver()
+    try:
+        driver.get(base_url)
+        samples = []
+        for _ in range(commands):
+            start = time.perf_counter()
+            driver.execute_script("return 1;")
+            samples.append(time.perf_counter() - start)
+        return samples
+    finally:
+        driver.quit()
+
+
+async def cdp_latency(base_url, commands):
+    browser = CDPBrowser()
+    await browser.start()
+    try:
+        page = await browser.new_page()
+        await page.navigate(base_url)
+        samples = []
+        for _ in range(commands):
+            start = time.perf_counter()
+            await page.evaluate("1")
+            samples.append(time.perf_counter() - start)
+        return samples
+    finally:
+        await browser.close()
+
+
+def throughput(state, subscriber):
+    state.subscriptions.clear()
+    records = standin_site.channel_records(state, subscriber.base_url)
+    start = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        total, _, new = subscriber.subscribe_to_channels(records)
+    return time.monotonic() - start, new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds of injected page latency")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--delay", type=float, default=0.5, help="DELAY_BETWEEN_CHANNELS")
+    parser.add_argument("--commands", type=int, default=500, help="Round trips for the latency test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    state = standin_site.StandInState(args.channels, latency=args.latency, jitter=args.jitter)
+    server = standin_site.start_server(state)
+
+    print(f"Command round trip ({args.commands} trivial scripts)")
+    print(f"{'engine':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for engine, samples in (
+        ("selenium", selenium_latency(server.base_url, args.commands)),
+        ("cdp", asyncio.run(cdp_latency(server.base_url, args.commands))),
+    ):
+        print(f"{engine:<12}" + "".join(f"{v:>10.2f}" for v in summarize(samples)))
+
+    print()
+    print(f"Throughput: {args.channels} channels, {args.latency}s latency, {args.delay}s delay")
+    print(f"{'engine':<12}{'tabs':>6}{'wall s':>10}{'ch/s':>8}{'ok':>6}")
+    # Fixed timeouts: the stand-in's latencies say nothing about YouTube's
+    runs = [(
+        "selenium",
+        1,
+        ChannelSubscriber(
+            interactive=False, base_url=server.base_url, delay=args.delay, timeouts=TimeoutCalibration(None)
+        ),
+    )]
+    for concurrency in args.concurrency:
+        runs.append((
+            "cdp",
+            concurrency,
+            CDPChannelSubscriber(
+                interactive=False,
+                base_url=server.base_url,
+                delay=args.delay,
+                concurrency=concurrency,
+                timeouts=TimeoutCalibration(None),
+            ),
+        ))
+    for engine, tabs, subscriber in runs:
+        elapsed, new = throughput(state, subscriber)
+        print(f"{engine:<12}{tabs:>6}{elapsed:>10.1f}{args.channels / elapsed:>8.2f}{new:>6}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark sequential vs. pipelined channel navigation.
+
+Runs ChannelSubscriber against the local stand-in site with injected
+page latency, once with the plain loop and once with the two-tab
+pipeline, and prints wall time and seconds per channel. Needs Chrome.
+
+    python benchmarks/bench_pipeline.py --channels 40 --latency 0.8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from channel_subscriber import ChannelSubscriber  # noqa: E402
+import standin_site  # noqa: E402
+from timeouts import TimeoutCalibration  # noqa: E402
+
+
+def run_once(state, server, records, pipeline, delay):
+    state.subscriptions.clear()
+    subscriber = ChannelSubscriber(
+        interactive=False,
+        base_url=server.base_url,
+        delay=delay,
+        pipeline=pipeline,
+        # Fixed timeouts: the stand-in's latencies say nothing about YouTube's
+        timeouts=TimeoutCalibration(None),
+    )
+    start = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        total, _, new = subscriber.subscribe_to_channels(records)
+    elapsed = time.monotonic() - start
+    return elapsed, total, new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.8, help="Seconds of injected page latency")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.5, help="DELAY_BETWEEN_CHANNELS")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    state = standin_site.StandInState(args.channels, latency=args.latency, jitter=args.jitter)
+    server = standin_site.start_server(state)
+    records = standin_site.channel_records(state, server.base_url)
+
+    print(f"{args.channels} channels, {args.latency}s latency (+{args.jitter}s jitter), {args.delay}s delay")
+    print(f"{'mode':<12}{'round':>6}{'wall s':>10}{'s/channel':>12}{'ok':>6}")
+    for round_number in range(1, args.rounds + 1):
+        for mode, pipeline in (("sequential", False), ("pipelined", True)):
+            elapsed, total, new = run_once(state, server, records, pipeline, args.delay)
+            print(f"{mode:<12}{round_number:>6}{elapsed:>10.1f}{elapsed / args.channels:>12.2f}{new:>6}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
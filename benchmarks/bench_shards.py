@@ -0,0 +1,109 @@
+"""Run one transfer as K shard processes and merge their results.
+
+Starts the stand-in site (or, with ``--engine api``, the mock Data API),
+writes a manifest of every channel, launches ``main.py subscribe --shard
+I/K`` once per shard as a separate process with its own Chrome profile,
+then merges the result files with ``main.py shard merge`` and checks that
+the account ends up subscribed to the whole manifest. Prints wall time
+for each shard count. The selenium and cdp engines need Chrome.
+
+    python benchmarks/bench_shards.py --channels 60 --shards 1 2 4
+    python benchmarks/bench_shards.py --engine api --channels 300 --latency 0.05 --shards 1 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from channel_io import write_channels  # noqa: E402
+import mock_youtube_api  # noqa: E402
+import standin_site  # noqa: E402
+
+
+def start_site(args):
+    """Return ``(state, server, records, env, subscribed)`` for the chosen engine."""
+    if args.engine == "api":
+        state = mock_youtube_api.MockApiState(args.channels, latency=args.latency, daily_quota=10**9)
+        server = mock_youtube_api.start_server(state)
+        records = mock_youtube_api.channel_records(state)
+        env = {"YTT_API_URL": server.base_url, "YTT_API_TOKEN": state.token}
+        return state, server, records, env, lambda: len(state.subscriptions)
+    state = standin_site.StandInState(args.channels, latency=args.latency)
+    server = standin_site.start_server(state)
+    records = standin_site.channel_records(state, server.base_url)
+    return state, server, records, {"YTT_BASE_URL": server.base_url}, lambda: len(state.subscriptions)
+
+
+def run_shards(args, count, workdir, manifest, env):
+    processes = []
+    for index in range(1, count + 1):
+        command = [
+            sys.executable, os.path.join(ROOT, "main.py"), "subscribe",
+            "-i", manifest,
+            "--shard", f"{index}/{count}",
+            "--engine", args.engine,
+            "--profile", os.path.join(workdir, f"profile-{index}"),
+            "--headless",
+            "-r", os.path.join(workdir, f"result-{index}.json"),
+        ]
+        if args.engine == "api":
+            command += ["--daily-quota", str(10**9)]
+        log = open(os.path.join(workdir, f"shard-{index}.log"), "w")
+        processes.append((subprocess.Popen(command, env=env, stdout=log, stderr=log, cwd=workdir), log))
+    codes = []
+    for process, log in processes:
+        codes.append(process.wait())
+        log.close()
+    return codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds of injected latency")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--engine", choices=("selenium", "cdp", "api"), default="selenium")
+    args = parser.parse_args()
+
+    print(f"{args.channels} channels, {args.latency}s latency, {args.engine} engine")
+    print(f"{'shards':>7}{'wall s':>9}{'merged':>8}{'failed':>8}{'conflicts':>11}{'subscribed':>12}")
+    for count in args.shards:
+        state, server, records, site_env, subscribed = start_site(args)
+        with tempfile.TemporaryDirectory(prefix="ytt-shards-") as workdir:
+            # Each run gets its own state directory (latency history, quota ledger)
+            env = dict(os.environ, HOME=workdir, **site_env)
+            manifest = os.path.join(workdir, "manifest.jsonl")
+            write_channels(records, manifest, "jsonl")
+            start = time.monotonic()
+            run_shards(args, count, workdir, manifest, env)
+            elapsed = time.monotonic() - start
+            merged_path = os.path.join(workdir, "merged.json")
+            subprocess.run(
+                [sys.executable, os.path.join(ROOT, "main.py"), "shard", "merge", "-r", merged_path]
+                + [os.path.join(workdir, f"result-{i}.json") for i in range(1, count + 1)
+                   if os.path.exists(os.path.join(workdir, f"result-{i}.json"))],
+                env=env,
+                stderr=subprocess.DEVNULL,
+                cwd=workdir,
+            )
+            merged = {}
+            if os.path.exists(merged_path):
+                with open(merged_path, "r", encoding="utf-8") as f:
+                    merged = json.load(f)
+        server.shutdown()
+        print(
+            f"{count:>7}{elapsed:>9.1f}{merged.get('total_processed', 0):>8}"
+            f"{len(merged.get('failed', [])):>8}{len(merged.get('conflicts', [])):>11}"
+            f"{subscribed():>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measure how long the entry points take to import, against a budget.
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+several times and prints the median cumulative import time (interpreter
+startup itself excluded), the slowest modules it pulled in and whether
+any of the browser dependencies were loaded. Exits with status 1 when a
+module goes over its budget or imports Selenium, webdriver-manager or
+BeautifulSoup, so it can run as a check.
+
+    python benchmarks/bench_startup.py --runs 9
+    python benchmarks/bench_startup.py --budget main=5 --budget cli=40
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds; generous enough for slow disks, tight enough to catch a
+# heavy import creeping back in
+DEFAULT_BUDGETS = {"main": 20, "cli": 60}
+
+# Only the phases that open a browser may load these
+HEAVY_MODULES = ("selenium", "webdriver_manager", "bs4")
+
+
+def import_times(module):
+    """Import ``module`` in a new interpreter; return ``{name: (self_us, cumulative_us)}``.
+
+    Modules that ``site`` loads at interpreter startup are left out.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == "site":
+            # Everything reported so far was imported on site's behalf
+            times.clear()
+            continue
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def measure(module, runs):
+    samples = [import_times(module) for _ in range(runs)]
+    total_ms = statistics.median(s[module][1] for s in samples) / 1000
+    last = samples[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    heavy = sorted({n.split(".")[0] for n in last if n.split(".")[0] in HEAVY_MODULES})
+    return total_ms, slowest, heavy
+
+
+def parse_budget(text):
+    module, _, ms = text.partition("=")
+    return module, float(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        action="append",
+        type=parse_budget,
+        metavar="MODULE=MS",
+        help="Budget for a module (repeatable; default main=20 cli=60)",
+    )
+    args = parser.parse_args()
+    budgets = dict(args.budget) if args.budget else DEFAULT_BUDGETS
+
+    over = False
+    width = max(len(m) for m in budgets) + 2
+    print(f"{'module':<{width}}{'median ms':>11}{'budget':>9}  heavy imports")
+    for module, budget in budgets.items():
+        total_ms, slowest, heavy = measure(module, args.runs)
+        failed = total_ms > budget or heavy
+        over = over or failed
+        print(
+            f"{module:<{width}}{total_ms:>11.1f}{budget:>9.0f}  {', '.join(heavy) or '-'}"
+            f"{'  OVER BUDGET' if failed else ''}"
+        )
+        for name, (own, _) in slowest:
+            print(f"    {own / 1000:>7.1f} ms  {name}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
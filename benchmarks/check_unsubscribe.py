@@ -0,0 +1,54 @@
+"""Check that both browser engines get through the unsubscribe confirmation.
+
+Unsubscribes from every channel of the local stand-in site, once through
+the plain confirmation dialog and once through the newer notification
+menu, with the popups rendering late. Exits non-zero if any channel is
+still subscribed afterwards. Needs Chrome.
+
+    python benchmarks/check_unsubscribe.py --channels 5 --popup-delay 0.5
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cdp_engine import CDPChannelSubscriber  # noqa: E402
+from channel_subscriber import ChannelSubscriber  # noqa: E402
+import standin_site  # noqa: E402
+from timeouts import TimeoutCalibration  # noqa: E402
+
+
+def check(engine, state, base_url):
+    """Unsubscribe from every channel; returns the channels left subscribed."""
+    state.subscriptions = set(state.handles)
+    subscriber = engine(interactive=False, base_url=base_url, delay=0, timeouts=TimeoutCalibration(None))
+    with contextlib.redirect_stdout(io.StringIO()):
+        subscriber.unsubscribe_from_channels(standin_site.channel_records(state, base_url))
+    return sorted(state.subscriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--popup-delay", type=float, default=0.5, help="Seconds before menus and dialogs render")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'engine':<12}{'layout':<10}{'left':>6}")
+    for layout, menu in (("dialog", False), ("menu", True)):
+        state = standin_site.StandInState(args.channels, unsubscribe_menu=menu, popup_delay=args.popup_delay)
+        server = standin_site.start_server(state)
+        for name, engine in (("selenium", ChannelSubscriber), ("cdp", CDPChannelSubscriber)):
+            left = check(engine, state, server.base_url)
+            failed = failed or bool(left)
+            print(f"{name:<12}{layout:<10}{len(left):>6}")
+        server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+SUBSCRIBED = "subscribed"
+NOT_SUBSCRIBED = "not_subscribed"
+UNKNOWN = "unknown"
+
+# Collects every locale-independent signal about a subscribe button in a
+# single WebDriver round trip. arguments[0] is the button container.
+BUTTON_INFO_SCRIPT = """
+var container = arguments[0];
+var button = container.querySelector("button");
+var text = container.querySelector("div.yt-spec-button-shape-next__button-text-content");
+var renderer = container.closest("ytd-subscribe-button-renderer");
+return {
+    classes: button ? button.className : "",
+    text: text ? text.textContent : "",
+    label: button ? (button.getAttribute("aria-label") || "") : "",
+    subscribed: renderer ? renderer.hasAttribute("subscribed") : null
+};
+"""
+
+# (subscribe, subscribed) button texts in the most common interface languages
+BUTTON_TEXTS = {
+    "en": ("subscribe", "subscribed"),
+    "de": ("abonnieren", "abonniert"),
+    "fr": ("s'abonner", "abonné"),
+    "es": ("suscribirme", "suscrito"),
+    "pt": ("inscrever-se", "inscrito"),
+    "it": ("iscriviti", "iscritto"),
+    "nl": ("abonneren", "geabonneerd"),
+    "pl": ("subskrybuj", "subskrybujesz"),
+    "tr": ("abone ol", "abone olundu"),
+    "ru": ("подписаться", "вы подписаны"),
+    "uk": ("підписатися", "ви підписані"),
+    "ja": ("チャンネル登録", "登録済み"),
+    "ko": ("구독", "구독중"),
+    "zh-hans": ("订阅", "已订阅"),
+    "zh-hant": ("訂閱", "已訂閱"),
+    "vi": ("đăng ký", "đã đăng ký"),
+    "ar": ("اشتراك", "مشترك"),
+    "hi": ("सदस्यता लें", "सदस्यता ली गई"),
+}
+
+# "Unsubscribe" menu entry, matched case-sensitively as YouTube renders it
+UNSUBSCRIBE_TEXTS = (
+    "Unsubscribe",
+    "Abo beenden",
+    "Se désabonner",
+    "Anular suscripción",
+    "Cancelar inscrição",
+    "Annulla iscrizione",
+    "Abonnement opzeggen",
+    "Anuluj subskrypcję",
+    "Abonelikten çık",
+    "Отписаться",
+    "登録解除",
+    "구독 취소",
+    "取消订阅",
+    "取消訂閱",
+)
+
+CONFIRM_BUTTON_SELECTOR = "yt-confirm-dialog-renderer #confirm-button button"
+UNSUBSCRIBE_MENU_ITEM_XPATH = (
+    "//*[self::ytd-menu-service-item-renderer or self::yt-list-item-view-model]"
+    "[.//*[" + " or ".join(f'contains(text(), "{t}")' for t in UNSUBSCRIBE_TEXTS) + "]]"
+)
+
+TEXT_STATES = {}
+for _subscribe_text, _subscribed_text in BUTTON_TEXTS.values():
+    TEXT_STATES[_subscribe_text] = NOT_SUBSCRIBED
+    TEXT_STATES[_subscribed_text] = SUBSCRIBED
+
+
+def normalize_text(text):
+    return " ".join(text.replace("’", "'").split()).lower()
+
+
+def classify_button(info):
+    """Return the button state for the signals gathered by BUTTON_INFO_SCRIPT.
+
+    The ``subscribed`` attribute of the legacy renderer and the button
+    style (YouTube draws "Subscribe" filled and "Subscribed" tonal) do not
+    depend on the interface language; the localized text table is only
+    consulted when neither is present.
+    """
+    if info.get("subscribed") is not None:
+        return SUBSCRIBED if info["subscribed"] else NOT_SUBSCRIBED
+    classes = info.get("classes") or ""
+    if "yt-spec-button-shape-next--tonal" in classes:
+        return SUBSCRIBED
+    if "yt-spec-button-shape-next--filled" in classes:
+        return NOT_SUBSCRIBED
+    return TEXT_STATES.get(normalize_text(info.get("text") or ""), UNKNOWN)
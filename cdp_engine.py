@@ -0,0 +1,539 @@
+"""Drive Chrome through the DevTools protocol directly, without chromedriver.
+
+Selenium sends every command as an HTTP request to chromedriver, which
+forwards it to Chrome and blocks until the answer comes back. This engine
+launches Chrome with a remote debugging port and speaks CDP over a single
+websocket from an asyncio event loop, so many tabs can be driven at once
+and each command is one message instead of an HTTP round trip.
+
+CDPChannelExtractor and CDPChannelSubscriber are drop-in replacements for
+ChannelExtractor and ChannelSubscriber.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from button_state import (
+    BUTTON_INFO_SCRIPT,
+    CONFIRM_BUTTON_SELECTOR,
+    NOT_SUBSCRIBED,
+    SUBSCRIBED,
+    UNKNOWN,
+    UNSUBSCRIBE_MENU_ITEM_XPATH,
+    classify_button,
+)
+from channel_extractor import ChannelExtractor
+from channel_subscriber import ChannelSubscriber
+from devtools import CDPConnection, CDPError
+from profiling import PROFILER
+from session_state import LOGIN_STATE_SCRIPT, SessionExpired
+
+
+CHROME_LOCATIONS = [
+    "/opt/google/chrome/google-chrome",
+    "/usr/bin/google-chrome-stable",
+    "/usr/bin/google-chrome",
+    "/usr/bin/chromium-browser",
+    "/usr/bin/chromium",
+    "/snap/bin/chromium",
+    "/usr/local/bin/chrome",
+    "/opt/google/chrome/chrome",
+]
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+)
+
+BUTTON_SELECTOR = "yt-subscribe-button-view-model button"
+
+
+def js_string(value):
+    return json.dumps(value)
+
+
+class CDPPage:
+    """One browser tab, attached with a flattened session."""
+
+    def __init__(self, connection, target_id, session_id, metrics=None):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.metrics = metrics
+
+    @classmethod
+    async def open(cls, connection, metrics=None):
+        target = await connection.send("Target.createTarget", {"url": "about:blank"})
+        attached = await connection.send(
+            "Target.attachToTarget", {"targetId": target["targetId"], "flatten": True}
+        )
+        page = cls(connection, target["targetId"], attached["sessionId"], metrics)
+        await page.send("Page.enable")
+        await page.send("Network.setUserAgentOverride", {"userAgent": USER_AGENT})
+        return page
+
+    async def send(self, method, params=None, timeout=30):
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def navigate(self, url, timeout=30):
+        start = time.monotonic()
+        loaded = self.connection.wait_for_event("Page.loadEventFired", self.session_id)
+        try:
+            result = await self.send("Page.navigate", {"url": url}, timeout)
+            if result.get("errorText"):
+                raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+            await asyncio.wait_for(loaded, timeout)
+        finally:
+            if not loaded.done():
+                loaded.cancel()
+            if self.metrics:
+                self.metrics.page_load.observe(time.monotonic() - start)
+
+    async def evaluate(self, expression, timeout=30):
+        result = await self.send(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": True},
+            timeout,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            text = details.get("exception", {}).get("description") or details.get("text")
+            raise CDPError(f"Script failed: {text}")
+        return result.get("result", {}).get("value")
+
+    async def wait_for(self, expression, timeout, interval=0.1):
+        """Poll ``expression`` until it is truthy; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if await self.evaluate(expression):
+                    return True
+            except CDPError:
+                # The document may be mid-navigation
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+        except CDPError:
+            pass
+
+
+def find_chrome():
+    for location in CHROME_LOCATIONS:
+        if os.path.isfile(location) or os.path.islink(location):
+            return os.path.realpath(location)
+    for name in ("google-chrome", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class CDPBrowser:
+    """A Chrome process started with a remote debugging port."""
+
+    def __init__(self, profile_dir=None, headless=False, metrics=None, handlers=()):
+        self.profile_dir = profile_dir
+        self.headless = headless
+        self.metrics = metrics
+        self.handlers = list(handlers)
+        self.process = None
+        self.connection = None
+        self._temp_dir = None
+
+    async def start(self, timeout=30):
+        binary = find_chrome()
+        if not binary:
+            raise CDPError("Could not find a Chrome binary")
+        if self.profile_dir:
+            user_data_dir = os.path.abspath(self.profile_dir)
+        else:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="ytt-chrome-")
+            user_data_dir = self._temp_dir.name
+        port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        if os.path.exists(port_file):
+            os.remove(port_file)
+
+        args = [
+            binary,
+            f"--user-data-dir={user_data_dir}",
+            "--remote-debugging-port=0",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--disable-blink-features=AutomationControlled",
+            "--disable-gpu",
+            "--blink-settings=imagesEnabled=false",
+            "--autoplay-policy=document-user-activation-required",
+            "--mute-audio",
+            "--window-size=1920,1080",
+            f"--user-agent={USER_AGENT}",
+            "about:blank",
+        ]
+        if self.headless:
+            args.insert(1, "--headless=new")
+        self.process = subprocess.Popen(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        # Chrome writes the port it picked and the browser endpoint here
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with open(port_file, "r") as f:
+                    port, path = f.read().split()[:2]
+                break
+            except (OSError, ValueError):
+                if self.process.poll() is not None:
+                    raise CDPError(f"Chrome exited with status {self.process.returncode}")
+                if time.monotonic() > deadline:
+                    raise CDPError("Chrome did not open its debugging port")
+                await asyncio.sleep(0.1)
+
+        self.connection = await CDPConnection.connect(f"ws://127.0.0.1:{port}{path}")
+        if self.metrics:
+            self.metrics.drivers.inc()
+        return self
+
+    async def new_page(self):
+        page = await CDPPage.open(self.connection, self.metrics)
+        for handler in self.handlers:
+            await handler.enable(self.connection, page.session_id, page.target_id)
+        return page
+
+    async def close(self):
+        if self.connection:
+            try:
+                await self.connection.send("Browser.close", timeout=5)
+            except (CDPError, asyncio.TimeoutError):
+                pass
+            await self.connection.close()
+            self.connection = None
+            if self.metrics:
+                self.metrics.drivers.dec()
+        if self.process:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self._temp_dir:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+
+async def wait_for_login(page, base_url, interactive, timeout=30, unattended=False):
+    """Open the home page and wait for the account avatar.
+
+    ``unattended`` runs (headless or with an imported session) have nobody
+    to log in, so a signed-out page raises SessionExpired right away.
+    """
+    await page.navigate(base_url)
+    if unattended:
+        await page.wait_for(f"{LOGIN_STATE_SCRIPT} !== null", timeout)
+        if not await page.evaluate(LOGIN_STATE_SCRIPT):
+            raise SessionExpired("YouTube did not accept the session, log in again and re-export it")
+        print("Login detected via avatar. Proceeding...")
+        return True
+    print("Please log in to your YouTube account in the opened browser window.")
+    max_retries = 5
+    for attempt in range(1, max_retries + 1):
+        if await page.wait_for('!!document.querySelector("button#avatar-btn")', timeout):
+            print("Login detected via avatar. Proceeding...")
+            return True
+        if interactive:
+            choice = await asyncio.get_running_loop().run_in_executor(
+                None,
+                input,
+                f"\nLogin not detected (attempt {attempt}/{max_retries}). Enter 'r' to retry or 'q' to quit: ",
+            )
+            if choice.lower() == "q":
+                return False
+        else:
+            print(f"Login not detected (attempt {attempt}/{max_retries}).")
+        await page.send("Page.reload")
+        await asyncio.sleep(2)
+    print("Maximum retry attempts reached. Please try again later.")
+    return False
+
+
+class CDPChannelExtractor(ChannelExtractor):
+    """ChannelExtractor that reads the channels page over CDP."""
+
+    def get_channel_list(self):
+        with PROFILER.phase("extract"):
+            return asyncio.run(self._get_channel_list())
+
+    async def _get_channel_list(self):
+        browser = CDPBrowser(
+            self.profile_dir, self.headless, self.metrics, [self.tap] if self.tap else []
+        )
+        try:
+            await browser.start()
+            page = await browser.new_page()
+            if self.session:
+                await self.session.apply_to_page(page, self.base_url)
+            login_wait = self.timeouts.timeout("login")
+            unattended = bool(self.session or self.headless)
+            if not await wait_for_login(page, self.base_url, self.interactive, login_wait, unattended):
+                return None
+
+            print("\nNavigating to channels page...")
+            await page.navigate(self.base_url + "/feed/channels")
+            wait = self.timeouts.timeout("channels_page")
+            start = time.monotonic()
+            if not await page.wait_for('!!document.querySelector("ytd-channel-renderer")', wait):
+                print("Could not detect channel elements on the page.")
+                self.timeouts.record("channels_page", wait, timed_out=True)
+                return None
+            self.timeouts.record("channels_page", time.monotonic() - start)
+            # Wait a bit more for dynamic content
+            await asyncio.sleep(2)
+            html = await page.evaluate("document.documentElement.outerHTML")
+            channels = self.save_channels_page(html)
+            if channels is None:
+                return None
+            self.metrics.extracted.inc(len(channels))
+            return channels
+        finally:
+            await browser.close()
+            self.metrics.flush()
+            self.timeouts.save()
+
+
+class CDPChannelSubscriber(ChannelSubscriber):
+    """ChannelSubscriber that works through several tabs of one browser at once.
+
+    ``concurrency`` tabs share a queue of channels; each tab keeps the
+    usual delay between its own channels. With a ConcurrencyGovernor the
+    number of tabs follows the resources the machine has left; a tab
+    that is let go finishes its current channel, leaving the rest in the
+    queue for the others.
+    """
+
+    def __init__(self, *args, concurrency=4, governor=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.concurrency = max(1, concurrency)
+        self.governor = governor
+
+    def process_channels(self, channels, action="subscribe"):
+        with PROFILER.phase(action):
+            return asyncio.run(self._process_channels(channels, action))
+
+    def make_browser(self):
+        return CDPBrowser(self.profile_dir, self.headless, self.metrics, self.devtools_handlers())
+
+    async def login(self, page):
+        if self.session:
+            await self.session.apply_to_page(page, self.base_url)
+        login_wait = self.timeouts.timeout("login")
+        unattended = bool(self.session or self.headless)
+        return await wait_for_login(page, self.base_url, self.interactive, login_wait, unattended)
+
+    async def _read_state(self, page):
+        script = (
+            f"(function () {{{BUTTON_INFO_SCRIPT}}})"
+            '(document.querySelector("yt-subscribe-button-view-model"))'
+        )
+        info = await page.evaluate(script)
+        print(f"Found button text: '{(info.get('text') or '').strip()}'")
+        return classify_button(info)
+
+    async def _set_subscription(self, page, channel_name, subscribed):
+        target = SUBSCRIBED if subscribed else NOT_SUBSCRIBED
+        try:
+            state = await self._read_state(page)
+            if state == UNKNOWN:
+                print(f"Could not determine the button state for {channel_name}")
+                return -1
+            if state == target:
+                if subscribed:
+                    print(f"Already subscribed to {channel_name}")
+                else:
+                    print(f"Not subscribed to {channel_name}")
+                return 0
+
+            print(f"{'Subscribing to' if subscribed else 'Unsubscribing from'} {channel_name}")
+            expectation = self.watcher.expect(page.target_id) if self.watcher else None
+            await page.evaluate(f"document.querySelector({js_string(BUTTON_SELECTOR)}).click()")
+            if not subscribed:
+                menu_item = (
+                    f"document.evaluate({js_string(UNSUBSCRIBE_MENU_ITEM_XPATH)}, "
+                    "document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue"
+                )
+                confirm = f"document.querySelector({js_string(CONFIRM_BUTTON_SELECTOR)})"
+                # Newer layouts open a notification menu before the dialog
+                if not await page.wait_for(f"!!({confirm} || {menu_item})", self.BUTTON_WAIT_TIME):
+                    raise CDPError("neither the unsubscribe menu nor the confirmation dialog appeared")
+                await page.evaluate(
+                    f"(function () {{ var item = {menu_item}; if (item && !{confirm}) item.click(); }})()"
+                )
+                if not await page.wait_for(f"!!{confirm}", self.BUTTON_WAIT_TIME):
+                    raise CDPError("confirmation dialog did not appear")
+                await page.evaluate(f"{confirm}.click()")
+            if expectation:
+                ok, detail = await asyncio.get_running_loop().run_in_executor(
+                    None, expectation.wait, self.BUTTON_WAIT_TIME
+                )
+                if not ok:
+                    verb = "Subscribing to" if subscribed else "Unsubscribing from"
+                    print(f"{verb} {channel_name} was not confirmed: {detail}")
+                    return -1
+            if subscribed:
+                print(f"Subscribed successfully to {channel_name}")
+            else:
+                print(f"Unsubscribed successfully from {channel_name}")
+            return 1
+        except (CDPError, asyncio.TimeoutError) as e:
+            verb = "subscribe to" if subscribed else "unsubscribe from"
+            print(f"Failed to {verb} {channel_name}: {str(e)}")
+            return -1
+
+    async def _govern(self, browser, queue, workers, start_worker):
+        """Resize the pool of tab workers every governor interval until the queue is empty."""
+        loop = asyncio.get_running_loop()
+        pid = getattr(getattr(browser, "process", None), "pid", None)
+        while not queue.empty():
+            await asyncio.sleep(self.governor.interval)
+            live = [(task, retire) for task, retire in workers if not task.done() and not retire.is_set()]
+            # Reading /proc for every Chrome process is left off the event loop
+            target = await loop.run_in_executor(
+                None, self.governor.observe, len(live), queue.qsize(), pid, loop.time()
+            )
+            if target == len(live):
+                continue
+            decision = self.governor.decisions[-1]
+            print(f"\nGovernor: {decision['from']} -> {decision['to']} tabs ({decision['reason']})")
+            if self.journal:
+                self.journal.record("governor", **decision)
+            for _ in range(target - len(live)):
+                await start_worker()
+            # The newest tabs go first; the first one, which logged in, stays
+            for _, retire in live[target:]:
+                retire.set()
+
+    async def _process_channels(self, channels, action):
+        subscribed = action == "subscribe"
+        changed_counter = (
+            self.metrics.subscribed if subscribed else self.metrics.unsubscribed
+        )
+        unchanged_counter = (
+            self.metrics.already_subscribed if subscribed else self.metrics.not_subscribed
+        )
+        browser = self.make_browser()
+        try:
+            await browser.start()
+            first_page = await browser.new_page()
+            if not await self.login(first_page):
+                return 0, 0, 0
+
+            active_channels = self.pending_channels(channels)
+            total_active = len(active_channels)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.announce_start, action, total_active
+            )
+
+            self.results = []
+            counts = {"processed": 0, "unchanged": 0, "changed": 0}
+            page_load_wait = self.timeouts.timeout("page_load")
+            queue = asyncio.Queue()
+            for item in enumerate(active_channels, 1):
+                queue.put_nowait(item)
+
+            async def worker(page, retire):
+                while not queue.empty():
+                    if self.cancel_event.is_set():
+                        return
+                    if retire.is_set():
+                        # Let go by the governor: the remaining channels stay queued
+                        await page.close()
+                        return
+                    i, (name, url) = queue.get_nowait()
+                    print(f"\nChecking {name} ({i}/{total_active}, {i/total_active*100:.1f}% done)")
+                    self.metrics.in_flight.inc()
+                    try:
+                        try:
+                            await page.navigate(url, page_load_wait)
+                            start = time.monotonic()
+                            found = await page.wait_for(
+                                f"!!document.querySelector({js_string(BUTTON_SELECTOR)})",
+                                self.BUTTON_WAIT_TIME,
+                            )
+                            waited = time.monotonic() - start
+                            self.metrics.button_wait.observe(waited)
+                            self.timeouts.record(
+                                "button_wait",
+                                waited if found else self.BUTTON_WAIT_TIME,
+                                timed_out=not found,
+                            )
+                        except (CDPError, asyncio.TimeoutError) as e:
+                            print(f"Could not open {name}: {str(e)}")
+                            found = False
+                        if found:
+                            result = await self._set_subscription(page, name, subscribed)
+                            if result == 1:
+                                counts["changed"] += 1
+                                changed_counter.inc()
+                            elif result == 0:
+                                counts["unchanged"] += 1
+                                unchanged_counter.inc()
+                            else:
+                                self.metrics.failed.inc()
+                            counts["processed"] += 1
+                        else:
+                            print(f"Subscribe button not found for {name}")
+                            self.metrics.failed.inc()
+                            result = None
+                        self.record_result(name, url, result, action)
+                    finally:
+                        self.metrics.in_flight.dec()
+                        self.metrics.flush()
+                    await asyncio.sleep(self.DELAY_BETWEEN_CHANNELS)
+
+            workers = []
+
+            async def start_worker(page=None):
+                page = page or await browser.new_page()
+                retire = asyncio.Event()
+                workers.append((asyncio.ensure_future(worker(page, retire)), retire))
+
+            tabs = min(self.concurrency, max(total_active, 1))
+            if self.governor:
+                tabs = self.governor.initial(tabs)
+            await start_worker(first_page)
+            for _ in range(tabs - 1):
+                await start_worker()
+            governing = (
+                asyncio.ensure_future(self._govern(browser, queue, workers, start_worker))
+                if self.governor
+                else None
+            )
+            try:
+                while True:
+                    running = [task for task, _ in workers if not task.done()]
+                    if not running:
+                        break
+                    await asyncio.wait(running)
+            finally:
+                if governing:
+                    governing.cancel()
+            for task, _ in workers:
+                task.result()
+            if self.cancel_event.is_set():
+                print("Cancelled, stopping before the remaining channels")
+
+            return counts["processed"], counts["unchanged"], counts["changed"]
+        finally:
+            await browser.close()
+            self.metrics.flush()
+            self.timeouts.save()
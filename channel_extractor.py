@@ -5,15 +5,52 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import time
 import os
 from selenium.webdriver.chrome.options import Options
 
+from channel_io import read_channels_page
+from metrics import METRICS
+from profiling import PROFILER
+from timeouts import TimeoutCalibration
+from session_state import SessionExpired, wait_for_session
+from devtools import DriverSession
+from page_store import DEFAULT_ACCOUNT, PageStore
+
+
+# Overridable so runs can target the local stand-in site
+YOUTUBE_URL = os.environ.get("YTT_BASE_URL", "https://www.youtube.com")
+
 
 class ChannelExtractor:
-    def __init__(self):
+    def __init__(
+        self,
+        metrics=None,
+        interactive=True,
+        base_url=None,
+        profile_dir=None,
+        timeouts=None,
+        tap=None,
+        headless=False,
+        session=None,
+        pages=None,
+        account=None,
+    ):
         self.driver = None
+        self.pages = pages or PageStore()
+        # Pages are archived per account; a profile directory names one
+        if account is None:
+            account = os.path.basename(os.path.normpath(profile_dir)) if profile_dir else DEFAULT_ACCOUNT
+        self.account = account
+        self.headless = headless
+        self.session = session
+        self.tap = tap
+        self.devtools = None
+        self.profile_dir = profile_dir
+        self.base_url = base_url or YOUTUBE_URL
+        self.timeouts = timeouts or TimeoutCalibration(site=self.base_url)
+        self.interactive = interactive
+        self.metrics = metrics or METRICS
 
     def find_chrome_binary(self):
         """Find Chrome binary location on the system."""
@@ -56,6 +93,9 @@ class ChannelExtractor:
         
         # Basic options
         options.add_argument("--no-sandbox")
+        if self.profile_dir:
+            # A dedicated profile keeps each account's login separate
+            options.add_argument(f"--user-data-dir={os.path.abspath(self.profile_dir)}")
         options.add_argument("--disable-dev-shm-usage")
 
         # Security bypass options
@@ -82,7 +122,10 @@ class ChannelExtractor:
         options.add_experimental_option("prefs", prefs)
 
         # Window options
-        options.add_argument("--start-maximized")
+        if self.headless:
+            options.add_argument("--headless=new")
+        else:
+            options.add_argument("--start-maximized")
         options.add_argument("--window-size=1920,1080")
 
         # User agent and automation flags
@@ -102,6 +145,11 @@ class ChannelExtractor:
             print(f"Error with webdriver-manager: {e}")
             print("Falling back to system ChromeDriver...")
             self.driver = webdriver.Chrome(options=options)
+        self.metrics.drivers.inc()
+        PROFILER.instrument_driver(self.driver)
+        if self.tap:
+            self.devtools = DriverSession()
+            self.devtools.attach(self.driver, self.tap)
 
         # Additional stealth settings
         self.driver.execute_cdp_cmd(
@@ -116,38 +164,60 @@ class ChannelExtractor:
 
         return self.driver
 
+    def check_session(self):
+        """Confirm an unattended login right away instead of retrying."""
+        login_wait = self.timeouts.timeout("login")
+        start = time.monotonic()
+        if not wait_for_session(self.driver, login_wait):
+            raise SessionExpired("YouTube did not accept the session, log in again and re-export it")
+        self.timeouts.record("login", time.monotonic() - start)
+        print("Login detected via avatar. Proceeding...")
+        return True
+
     def wait_for_login(self):
         """Wait for the user to log in to YouTube."""
+        if self.session or self.headless:
+            return self.check_session()
         print("Please log in to your YouTube account in the opened browser window.")
         print("Note: You only need to log in for this session, not to Chrome itself.")
 
         max_retries = 5
         retries = 0
+        login_wait = self.timeouts.timeout("login")
+        start = time.monotonic()
 
         while retries < max_retries:
             try:
                 # Wait for page load with longer timeout
-                WebDriverWait(self.driver, 30).until(
+                WebDriverWait(self.driver, login_wait).until(
                     EC.presence_of_element_located((By.TAG_NAME, "ytd-masthead"))
                 )
 
                 # Check for avatar button
                 try:
-                    avatar = WebDriverWait(self.driver, 30).until(
+                    avatar = WebDriverWait(self.driver, login_wait).until(
                         EC.presence_of_element_located(
                             (By.CSS_SELECTOR, "button#avatar-btn")
                         )
                     )
                     if avatar.is_displayed():
                         print("Login detected via avatar. Proceeding...")
+                        if not self.interactive and retries == 0:
+                            # Interactive waits include the user typing their password
+                            self.timeouts.record("login", time.monotonic() - start)
                         return True
                 except TimeoutException:
+                    if not self.interactive:
+                        self.timeouts.record("login", login_wait, timed_out=True)
                     retries += 1
-                    choice = input(
-                        f"\nLogin not detected (attempt {retries}/{max_retries}). Enter 'r' to retry or 'q' to quit: "
-                    )
-                    if choice.lower() == "q":
-                        return False
+                    if self.interactive:
+                        choice = input(
+                            f"\nLogin not detected (attempt {retries}/{max_retries}). Enter 'r' to retry or 'q' to quit: "
+                        )
+                        if choice.lower() == "q":
+                            return False
+                    else:
+                        print(f"Login not detected (attempt {retries}/{max_retries}).")
                     self.driver.refresh()
                     time.sleep(2)
                     continue
@@ -162,79 +232,76 @@ class ChannelExtractor:
 
     def wait_for_channels_page(self):
         """Wait for the channels page to fully load."""
+        wait = self.timeouts.timeout("channels_page")
+        start = time.monotonic()
         try:
             # Wait for channel elements to be present
-            WebDriverWait(self.driver, 20).until(
+            WebDriverWait(self.driver, wait).until(
                 EC.presence_of_element_located((By.TAG_NAME, "ytd-channel-renderer"))
             )
+            self.timeouts.record("channels_page", time.monotonic() - start)
             # Wait a bit more for dynamic content
             time.sleep(2)
             return True
         except TimeoutException:
             print("Could not detect channel elements on the page.")
+            self.timeouts.record("channels_page", wait, timed_out=True)
             return False
 
-    def save_channels_page(self):
-        """Save the channels page HTML to a file."""
+    def save_channels_page(self, html_content=None):
+        """Archive the channels page HTML and return the channels read back from it."""
         try:
             # Get the page source after waiting for content
-            html_content = self.driver.page_source
-
-            # Save to Downloads folder
-            downloads_dir = os.path.expanduser("~/Downloads")
-            os.makedirs(downloads_dir, exist_ok=True)
-            file_path = os.path.join(downloads_dir, "YouTube.html")
-
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
+            if html_content is None:
+                html_content = self.driver.page_source
 
-            print(f"Successfully saved channels page to: {file_path}")
-            return file_path
+            entry, channels = self.pages.save(html_content, self.account, self.base_url)
+            print(
+                f"Saved channels page {entry['digest'][:12]} for {self.account} "
+                f"({entry['channels']} channels, {entry['stored'] // 1024} KiB compressed)"
+            )
+            return channels
         except Exception as e:
             print(f"Error saving channels page: {str(e)}")
             return None
 
     def extract_channels(self, file_path):
         """Extract channel information from a saved HTML file."""
-        with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()
-
-        soup = BeautifulSoup(content, "html.parser")
-        channel_renderers = soup.find_all("ytd-channel-renderer")
-
-        channels = []
-        for renderer in channel_renderers:
-            link = renderer.find("a", class_="channel-link")
-            if link:
-                channel_url = link["href"]
-                channel_name = channel_url.split("@")[-1]
-                if channel_url.startswith("/"):
-                    channel_url = "https://www.youtube.com" + channel_url
-                channels.append((channel_name, channel_url, True))
-
-        return channels
+        return read_channels_page(file_path, self.base_url)
 
     def get_channel_list(self):
         """Main method to get channel list"""
-        try:
-            self.driver = self.get_secure_driver()
+        with PROFILER.phase("extract"):
+            try:
+                self.driver = self.get_secure_driver()
 
-            # Login phase
-            self.driver.get("https://www.youtube.com")
-            if not self.wait_for_login():
-                return None
+                # Login phase
+                if self.session:
+                    self.session.apply_to_driver(self.driver, self.base_url)
+                self.driver.get(self.base_url)
+                if not self.wait_for_login():
+                    return None
 
-            # Get channels page
-            print("\nNavigating to channels page...")
-            self.driver.get("https://www.youtube.com/feed/channels")
+                # Get channels page
+                print("\nNavigating to channels page...")
+                start = time.monotonic()
+                self.driver.get(self.base_url + "/feed/channels")
+                self.metrics.page_load.observe(time.monotonic() - start)
 
-            if self.wait_for_channels_page():
-                file_path = self.save_channels_page()
-                if file_path and os.path.exists(file_path):
-                    channels = self.extract_channels(file_path)
-                    return channels
+                if self.wait_for_channels_page():
+                    channels = self.save_channels_page()
+                    if channels is not None:
+                        self.metrics.extracted.inc(len(channels))
+                        return channels
 
-            return None
-        finally:
-            if self.driver:
-                self.driver.quit()
+                return None
+            finally:
+                if self.devtools:
+                    self.devtools.close()
+                    self.devtools = None
+                if self.driver:
+                    self.driver.quit()
+                    self.driver = None
+                    self.metrics.drivers.dec()
+                    self.metrics.flush()
+                self.timeouts.save()
@@ -0,0 +1,182 @@
+import csv
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from channel_store import ChannelList, channel_key
+
+
+FORMATS = ("jsonl", "csv", "opml")
+CSV_FIELDS = ["name", "url", "id", "active"]
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id="
+
+
+def detect_format(path, fmt=None):
+    """Pick a format from an explicit name or the file extension."""
+    if fmt:
+        return fmt
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    if extension in ("json", "jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("csv", "opml"):
+        return extension
+    if extension in ("xml",):
+        return "opml"
+    return "jsonl"
+
+
+def channel_url(channel_id):
+    """Build a channel URL from a canonical key."""
+    if channel_id.startswith("@"):
+        return "https://www.youtube.com/" + channel_id
+    return "https://www.youtube.com/channel/" + channel_id
+
+
+def _parse_active(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ("0", "false", "no", "n", "")
+
+
+def _record(name, url, channel_id, active):
+    if not url and channel_id:
+        url = channel_url(channel_id)
+    if not name:
+        name = url.split("@")[-1]
+    return name, url, active
+
+
+def _open_text(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, encoding="utf-8", newline="" if path.endswith(".csv") else None)
+
+
+def iter_jsonl(f):
+    for line in f:
+        if line.strip():
+            record = json.loads(line)
+            yield _record(
+                record.get("name"),
+                record.get("url"),
+                record.get("id"),
+                _parse_active(record.get("active", True)),
+            )
+
+
+def iter_csv(f):
+    for row in csv.DictReader(f):
+        yield _record(
+            row.get("name"), row.get("url"), row.get("id"), _parse_active(row.get("active", "1"))
+        )
+
+
+def iter_opml(f):
+    # iterparse keeps memory flat: each outline is cleared once it is read
+    for _, element in ET.iterparse(f, events=("end",)):
+        if element.tag != "outline":
+            continue
+        url = element.get("htmlUrl")
+        channel_id = element.get("channelId")
+        feed = element.get("xmlUrl") or ""
+        if not channel_id and FEED_URL in feed:
+            channel_id = feed.split("channel_id=", 1)[1]
+        if url or channel_id:
+            yield _record(
+                element.get("title") or element.get("text"),
+                url,
+                channel_id,
+                _parse_active(element.get("active", "true")),
+            )
+        element.clear()
+
+
+def iter_channels(path, fmt=None):
+    """Stream ``(name, url, active)`` records from a channel list file."""
+    fmt = detect_format(path, fmt)
+    if fmt == "opml":
+        source = sys.stdin.buffer if path == "-" else open(path, "rb")
+        reader = iter_opml
+    else:
+        source = _open_text(path, "r")
+        reader = iter_csv if fmt == "csv" else iter_jsonl
+    try:
+        yield from reader(source)
+    finally:
+        if source not in (sys.stdin, sys.stdin.buffer):
+            source.close()
+
+
+def read_channels_page(path, base_url=None):
+    """Load the channels a saved /feed/channels page lists into a ChannelList.
+
+    ``path`` may also be an open text file, e.g. a page in the PageStore.
+    """
+    # BeautifulSoup is only needed for saved pages, so it isn't imported up front
+    from bs4 import BeautifulSoup
+
+    base_url = base_url or os.environ.get("YTT_BASE_URL", "https://www.youtube.com")
+    if hasattr(path, "read"):
+        soup = BeautifulSoup(path.read(), "html.parser")
+    else:
+        with open(path, "r", encoding="utf-8") as file:
+            soup = BeautifulSoup(file.read(), "html.parser")
+
+    channels = ChannelList()
+    for renderer in soup.find_all("ytd-channel-renderer"):
+        link = renderer.find("a", class_="channel-link")
+        if link:
+            channel_url = link["href"]
+            channel_name = channel_url.split("@")[-1]
+            if channel_url.startswith("/"):
+                channel_url = base_url + channel_url
+            channels.append(channel_name, channel_url, True)
+    return channels
+
+
+def read_channels(path, fmt=None):
+    """Load a channel list file into a ChannelList."""
+    return ChannelList.from_records(iter_channels(path, fmt))
+
+
+def write_channels(records, path, fmt=None):
+    """Stream ``(name, url, active)`` records to a file; '-' is stdout.
+
+    Returns the number of records written.
+    """
+    fmt = detect_format(path, fmt)
+    out = _open_text(path, "w")
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(CSV_FIELDS)
+        elif fmt == "opml":
+            # saxutils pulls in urllib.request; only OPML output needs it
+            from xml.sax.saxutils import quoteattr
+
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            out.write('<opml version="1.1">\n<head><title>YouTube subscriptions</title></head>\n')
+            out.write('<body>\n<outline text="YouTube subscriptions" title="YouTube subscriptions">\n')
+        for name, url, active in records:
+            channel_id = channel_key(url)
+            if fmt == "csv":
+                writer.writerow([name, url, channel_id, int(bool(active))])
+            elif fmt == "opml":
+                feed = FEED_URL + channel_id if channel_id.startswith("UC") else ""
+                out.write(
+                    f"<outline text={quoteattr(name)} title={quoteattr(name)} type=\"rss\""
+                    f" xmlUrl={quoteattr(feed)} htmlUrl={quoteattr(url)}"
+                    f" channelId={quoteattr(channel_id)} active=\"{str(bool(active)).lower()}\" />\n"
+                )
+            else:
+                record = {"name": name, "url": url, "id": channel_id, "active": bool(active)}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        if fmt == "opml":
+            out.write("</outline>\n</body>\n</opml>\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
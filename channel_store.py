@@ -0,0 +1,153 @@
+import re
+
+CHANNEL_ID_PATTERN = re.compile(r"/channel/(UC[\w-]{22})")
+
+# Lookup table that flips every bit of a byte, used to invert the bitset in C.
+_INVERT = bytes(255 - b for b in range(256))
+
+
+def channel_key(url):
+    """Return a canonical key for a channel URL: its UC... ID or @handle."""
+    match = CHANNEL_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    tail = url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+    if "@" in url and not tail.startswith("@"):
+        tail = "@" + url.split("@", 1)[-1].split("/", 1)[0]
+    return tail.lower() if tail.startswith("@") else tail
+
+
+class ChannelList:
+    """Column-oriented channel collection with a bitset of active flags.
+
+    Names and URLs are kept in two parallel lists and the active flags are
+    packed eight to a byte, so toggling never rebuilds records. Iterating
+    still yields ``(name, url, active)`` tuples for callers that expect the
+    old list-of-tuples shape.
+    """
+
+    __slots__ = ("_names", "_urls", "_bits", "_active_count", "_name_width")
+
+    def __init__(self):
+        self._names = []
+        self._urls = []
+        self._bits = bytearray()
+        self._active_count = 0
+        self._name_width = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a list from an iterable of ``(name, url, active)`` tuples."""
+        if isinstance(records, cls):
+            return records
+        channels = cls()
+        for name, url, active in records:
+            channels.append(name, url, active)
+        return channels
+
+    def append(self, name, url, active=True):
+        index = len(self._names)
+        self._names.append(name)
+        self._urls.append(url)
+        if index % 8 == 0:
+            self._bits.append(0)
+        if active:
+            self._bits[index >> 3] |= 1 << (index & 7)
+            self._active_count += 1
+        if len(name) > self._name_width:
+            self._name_width = len(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __bool__(self):
+        return bool(self._names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._names)
+        return self._names[index], self._urls[index], self.is_active(index)
+
+    def __iter__(self):
+        bits = self._bits
+        for index, (name, url) in enumerate(zip(self._names, self._urls)):
+            yield name, url, bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def name(self, index):
+        return self._names[index]
+
+    def url(self, index):
+        return self._urls[index]
+
+    def is_active(self, index):
+        if not 0 <= index < len(self._names):
+            raise IndexError("channel index out of range")
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def set_active(self, index, state):
+        if self.is_active(index) == bool(state):
+            return
+        self._bits[index >> 3] ^= 1 << (index & 7)
+        self._active_count += 1 if state else -1
+
+    @property
+    def active_count(self):
+        return self._active_count
+
+    @property
+    def name_width(self):
+        """Length of the longest channel name, maintained on append."""
+        return self._name_width
+
+    def active(self):
+        """Yield ``(name, url)`` for every active channel."""
+        bits = self._bits
+        for index, (name, url) in enumerate(zip(self._names, self._urls)):
+            if bits[index >> 3] & (1 << (index & 7)):
+                yield name, url
+
+    def set_all(self, state):
+        """Set every channel's active flag in place."""
+        fill = 0xFF if state else 0
+        self._bits[:] = bytes([fill]) * len(self._bits)
+        self._mask_tail()
+        self._active_count = len(self._names) if state else 0
+
+    def invert(self):
+        """Flip every channel's active flag in place."""
+        self._bits[:] = self._bits.translate(_INVERT)
+        self._mask_tail()
+        self._active_count = len(self._names) - self._active_count
+
+    def _mask_tail(self):
+        # Clear the unused high bits of the last byte so counts stay exact.
+        remainder = len(self._names) & 7
+        if remainder:
+            self._bits[-1] &= (1 << remainder) - 1
+
+    def display(self, start=0, stop=None):
+        """Display channels ``start`` to ``stop`` in a formatted manner."""
+        stop = len(self._names) if stop is None else min(stop, len(self._names))
+        max_index_length = len(str(len(self._names)))
+        for index in range(start, stop):
+            status = "Y" if self.is_active(index) else "N"
+            padded_index = str(index + 1).rjust(max_index_length)
+            padded_name = self._names[index].ljust(self._name_width)
+            print(f"{padded_index}. [{status}] {padded_name} {self._urls[index]}")
+
+    def toggle_channel(self, index):
+        """Toggle the active status of a channel by its 1-based index."""
+        if 1 <= index <= len(self._names):
+            self.set_active(index - 1, not self.is_active(index - 1))
+            print("-" * 58)
+            print(f"Toggled channel: {self._names[index - 1]}")
+            print("-" * 58)
+        else:
+            print("Invalid index")
+
+    def toggle_all(self, state):
+        """Toggle the active status of all channels."""
+        self.set_all(state)
+        print("-" * 58)
+        print(f"{'Activated' if state else 'Deactivated'} all channels")
+        print("-" * 58)
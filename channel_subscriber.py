@@ -2,20 +2,82 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 import logging
 import os
+import threading
+
+from button_state import (
+    BUTTON_INFO_SCRIPT,
+    CONFIRM_BUTTON_SELECTOR,
+    NOT_SUBSCRIBED,
+    SUBSCRIBED,
+    UNKNOWN,
+    UNSUBSCRIBE_MENU_ITEM_XPATH,
+    classify_button,
+)
+from channel_store import ChannelList, channel_key
+from metrics import METRICS
+from profiling import PROFILER
+from timeouts import TimeoutCalibration
+from session_state import SessionExpired, wait_for_session
+from page_pipeline import PagePipeline
+from devtools import DriverSession
+from subscription_watch import SubscriptionWatcher
+
+
+# Outcome names for the values returned by ChannelSubscriber.subscribe
+RESULT_STATUS = {1: "subscribed", 0: "already_subscribed", -1: "failed"}
+UNSUBSCRIBE_STATUS = {1: "unsubscribed", 0: "not_subscribed", -1: "failed"}
+
+DRIVER_START_LOCK = threading.Lock()
+
+# Overridable so runs can target the local stand-in site
+YOUTUBE_URL = os.environ.get("YTT_BASE_URL", "https://www.youtube.com")
 
 
 class ChannelSubscriber:
-    def __init__(self):
+    def __init__(
+        self,
+        metrics=None,
+        interactive=True,
+        profile_dir=None,
+        delay=None,
+        base_url=None,
+        journal=None,
+        pipeline=False,
+        watchdog=None,
+        timeouts=None,
+        tap=None,
+        confirm=True,
+        headless=False,
+        session=None,
+    ):
         self.driver = None
-        self.BUTTON_WAIT_TIME = 10
-        self.DELAY_BETWEEN_CHANNELS = 0.5
+        self.headless = headless
+        self.session = session
+        self.tap = tap
+        # Clicks only count once YouTube's subscription request succeeded
+        self.watcher = SubscriptionWatcher() if confirm else None
+        self.devtools = None
+        self.pipeline = pipeline
+        self.watchdog = watchdog
+        self.recycle_events = []
+        self.interactive = interactive
+        self.profile_dir = profile_dir
+        self.base_url = base_url or YOUTUBE_URL
+        self.journal = journal
+        self.cancel_event = threading.Event()
+        self.language_switched = False
+        self.timeouts = timeouts or TimeoutCalibration(site=self.base_url)
+        self.BUTTON_WAIT_TIME = self.timeouts.timeout("button_wait")
+        self.DELAY_BETWEEN_CHANNELS = 0.5 if delay is None else delay
+        self.metrics = metrics or METRICS
+        self.results = []
 
         # Configure logging
         logging.basicConfig(
@@ -65,6 +127,9 @@ class ChannelSubscriber:
         
         # Basic options
         options.add_argument("--no-sandbox")
+        if self.profile_dir:
+            # A dedicated profile keeps each account's login separate
+            options.add_argument(f"--user-data-dir={os.path.abspath(self.profile_dir)}")
         options.add_argument("--disable-dev-shm-usage")
 
         # Security bypass options
@@ -91,7 +156,10 @@ class ChannelSubscriber:
         options.add_experimental_option("prefs", prefs)
 
         # Window options
-        options.add_argument("--start-maximized")
+        if self.headless:
+            options.add_argument("--headless=new")
+        else:
+            options.add_argument("--start-maximized")
         options.add_argument("--window-size=1920,1080")
 
         # User agent and automation flags
@@ -104,13 +172,19 @@ class ChannelSubscriber:
         options.add_experimental_option("useAutomationExtension", False)
 
         # Use webdriver-manager to automatically download and manage the correct ChromeDriver
-        try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-        except Exception as e:
-            print(f"Error with webdriver-manager: {e}")
-            print("Falling back to system ChromeDriver...")
-            self.driver = webdriver.Chrome(options=options)
+        # Parallel sessions share the driver download, so start them one at a time
+        with DRIVER_START_LOCK:
+            try:
+                service = Service(ChromeDriverManager().install())
+                self.driver = webdriver.Chrome(service=service, options=options)
+            except Exception as e:
+                print(f"Error with webdriver-manager: {e}")
+                print("Falling back to system ChromeDriver...")
+                self.driver = webdriver.Chrome(options=options)
+        self.metrics.drivers.inc()
+        PROFILER.instrument_driver(self.driver)
+        self.driver.set_page_load_timeout(self.timeouts.timeout("page_load"))
+        self.attach_devtools()
 
         # Additional stealth settings
         self.driver.execute_cdp_cmd(
@@ -125,36 +199,82 @@ class ChannelSubscriber:
 
         return self.driver
 
+    def devtools_handlers(self):
+        return [handler for handler in (self.tap, self.watcher) if handler]
+
+    def attach_devtools(self):
+        """Connect the network tap and watcher to the new browser, if any."""
+        handlers = self.devtools_handlers()
+        if not handlers:
+            return
+        self.devtools = DriverSession()
+        try:
+            self.devtools.attach(self.driver, *handlers)
+        except Exception as e:
+            self.close_devtools()
+            if self.tap:
+                raise
+            logging.exception("Could not attach to the browser's DevTools endpoint")
+            print(f"Could not watch network traffic ({e}), clicks will not be confirmed")
+            self.watcher = None
+
+    def close_devtools(self):
+        if self.devtools:
+            self.devtools.close()
+            self.devtools = None
+
+    def check_session(self):
+        """Confirm an unattended login right away instead of retrying."""
+        login_wait = self.timeouts.timeout("login")
+        start = time.monotonic()
+        if not wait_for_session(self.driver, login_wait):
+            raise SessionExpired("YouTube did not accept the session, log in again and re-export it")
+        self.timeouts.record("login", time.monotonic() - start)
+        print("Login detected via avatar. Proceeding...")
+        return True
+
     def wait_for_login(self):
         """Wait for the user to log in to YouTube."""
+        if self.session or self.headless:
+            return self.check_session()
         print("Please log in to your YouTube account in the opened browser window.")
         print("Note: You only need to log in for this session, not to Chrome itself.")
 
         max_retries = 5
         retries = 0
+        login_wait = self.timeouts.timeout("login")
+        start = time.monotonic()
 
         while retries < max_retries:
             try:
-                WebDriverWait(self.driver, 30).until(
+                WebDriverWait(self.driver, login_wait).until(
                     EC.presence_of_element_located((By.TAG_NAME, "ytd-masthead"))
                 )
 
                 try:
-                    avatar = WebDriverWait(self.driver, 30).until(
+                    avatar = WebDriverWait(self.driver, login_wait).until(
                         EC.presence_of_element_located(
                             (By.CSS_SELECTOR, "button#avatar-btn")
                         )
                     )
                     if avatar.is_displayed():
                         print("Login detected via avatar. Proceeding...")
+                        if not self.interactive and retries == 0:
+                            # Interactive waits include the user typing their password
+                            self.timeouts.record("login", time.monotonic() - start)
                         return True
                 except TimeoutException:
+                    if not self.interactive:
+                        self.timeouts.record("login", login_wait, timed_out=True)
                     retries += 1
-                    choice = input(
-                        f"\nLogin not detected (attempt {retries}/{max_retries}). Enter 'r' to retry or 'q' to quit: "
-                    )
-                    if choice.lower() == "q":
-                        return False
+                    if self.interactive:
+                        choice = input(
+                            f"\nLogin not detected (attempt {retries}/{max_retries}). Enter 'r' to retry or 'q' to quit: "
+                        )
+                        if choice.lower() == "q":
+                            return False
+                    else:
+                        print(f"Login not detected (attempt {retries}/{max_retries}).")
                     self.driver.refresh()
                     time.sleep(2)
                     continue
@@ -169,6 +289,7 @@ class ChannelSubscriber:
 
     def wait_for_button(self):
         """Wait for the subscribe button to be present on the page."""
+        start = time.monotonic()
         try:
             # Wait for subscribe button to be clickable - YouTube updated selector
             WebDriverWait(self.driver, self.BUTTON_WAIT_TIME).until(
@@ -176,13 +297,131 @@ class ChannelSubscriber:
                     (By.CSS_SELECTOR, "yt-subscribe-button-view-model button")
                 )
             )
+            self.timeouts.record("button_wait", time.monotonic() - start)
             return True
         except TimeoutException:
             print("Button not found in time.")
+            self.timeouts.record("button_wait", self.BUTTON_WAIT_TIME, timed_out=True)
             return False
+        finally:
+            self.metrics.button_wait.observe(time.monotonic() - start)
 
-    def subscribe(self, channel_name):
-        """Attempt to subscribe to a YouTube channel."""
+    def load_page(self, url):
+        """Navigate to a URL, recording the page load latency."""
+        start = time.monotonic()
+        try:
+            self.driver.get(url)
+            self.timeouts.record("page_load", time.monotonic() - start)
+        except TimeoutException:
+            # Whatever has rendered so far may already hold the button
+            print("Page load timed out, continuing with the partial page")
+            self.timeouts.record("page_load", self.timeouts.timeout("page_load"), timed_out=True)
+            self.driver.execute_script("window.stop();")
+        finally:
+            self.metrics.page_load.observe(time.monotonic() - start)
+
+    def recycle_driver(self, reason):
+        """Replace the browser with a fresh one and carry the session over.
+
+        Cookies are copied from the old browser before it quits and set
+        again in the new one. Returns True if the new browser is logged in.
+        """
+        print(f"\nRecycling browser: {reason}")
+        start = time.monotonic()
+        sample = dict(self.watchdog.last_sample) if self.watchdog else {}
+        try:
+            cookies = self.driver.get_cookies()
+        except WebDriverException:
+            # The old browser may already be gone; a profile keeps the login
+            cookies = []
+        self.close_devtools()
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+        self.driver = None
+        self.metrics.drivers.dec()
+
+        self.get_secure_driver()
+        self.driver.get(self.base_url)
+        for cookie in cookies:
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException:
+                logging.debug(f"Could not restore cookie {cookie.get('name')}")
+        self.driver.refresh()
+        logged_in = self.wait_for_login()
+
+        seconds = time.monotonic() - start
+        if self.watchdog:
+            self.watchdog.reset()
+            self.watchdog.recycles += 1
+        self.metrics.recycles.inc()
+        self.metrics.recycle_time.observe(seconds)
+        event = {
+            "reason": reason,
+            "seconds": round(seconds, 2),
+            "rss_mb": sample.get("rss_mb"),
+            "heap_mb": sample.get("heap_mb"),
+            "logged_in": logged_in,
+        }
+        self.recycle_events.append(event)
+        if self.journal:
+            self.journal.record("recycle", **event)
+        print(f"Browser recycled in {seconds:.1f}s")
+        return logged_in
+
+    def navigate(self, navigator, url, next_url):
+        """Open a channel page and return the seconds it took."""
+        start = time.monotonic()
+        if navigator:
+            navigator.show(url, next_url)
+        else:
+            self.load_page(url)
+        return time.monotonic() - start
+
+    def read_button_state(self, button_container):
+        """Classify the subscribe button as SUBSCRIBED, NOT_SUBSCRIBED or UNKNOWN."""
+        info = self.driver.execute_script(BUTTON_INFO_SCRIPT, button_container)
+        button_text = (info.get("text") or "").strip()
+        print(f"Found button text: '{button_text}'")
+        state = classify_button(info)
+        if state == UNKNOWN and not self.language_switched:
+            # Last resort for layouts we can't read: switch to English once
+            print("Could not determine button state, switching YouTube to English")
+            self.language_switched = True
+            if self.ensure_english_language():
+                self.wait_for_button()
+                button_container = self.driver.find_element(
+                    By.CSS_SELECTOR, "yt-subscribe-button-view-model"
+                )
+                info = self.driver.execute_script(BUTTON_INFO_SCRIPT, button_container)
+                state = classify_button(info)
+        if state == UNKNOWN:
+            print(f"Unexpected button text: '{button_text}'")
+        return state
+
+    def confirm_unsubscribe(self):
+        """Click through the menu and confirmation dialog after an unsubscribe click."""
+        confirm_button = EC.element_to_be_clickable((By.CSS_SELECTOR, CONFIRM_BUTTON_SELECTOR))
+        menu_item = EC.element_to_be_clickable((By.XPATH, UNSUBSCRIBE_MENU_ITEM_XPATH))
+        wait = WebDriverWait(self.driver, self.BUTTON_WAIT_TIME)
+        # Newer layouts open a notification menu before the dialog; either
+        # takes a moment to render after the click
+        wait.until(EC.any_of(confirm_button, menu_item))
+        if not confirm_button(self.driver):
+            self.driver.execute_script("arguments[0].click();", wait.until(menu_item))
+
+        confirm = wait.until(confirm_button)
+        self.driver.execute_script("arguments[0].click();", confirm)
+
+    def set_subscription(self, channel_name, subscribed):
+        """Drive the subscribe button of the open channel to the wanted state.
+
+        Returns 1 if the state was changed, 0 if it already matched and -1
+        on failure.
+        """
+        target = SUBSCRIBED if subscribed else NOT_SUBSCRIBED
         try:
             # First find the button container - YouTube updated selector
             button_container = WebDriverWait(self.driver, self.BUTTON_WAIT_TIME).until(
@@ -191,37 +430,53 @@ class ChannelSubscriber:
                 )
             )
 
-            # Find the button text element - updated selector path
-            button_text = (
-                button_container.find_element(
-                    By.CSS_SELECTOR, "div.yt-spec-button-shape-next__button-text-content"
-                )
-                .text.strip()
-                .lower()
-            )
-
-            print(f"Found button text: '{button_text}'")
+            state = self.read_button_state(button_container)
+            if state == UNKNOWN:
+                return -1
+            if state == target:
+                if subscribed:
+                    print(f"Already subscribed to {channel_name}")
+                else:
+                    print(f"Not subscribed to {channel_name}")
+                return 0
 
-            if button_text == "subscribe":
-                print(f"Subscribing to {channel_name}")
-                subscribe_button = button_container.find_element(
-                    By.CSS_SELECTOR, "button.yt-spec-button-shape-next"
-                )
-                self.driver.execute_script("arguments[0].click();", subscribe_button)
+            print(f"{'Subscribing to' if subscribed else 'Unsubscribing from'} {channel_name}")
+            # Looked up again: a language fallback may have reloaded the page
+            button = self.driver.find_element(
+                By.CSS_SELECTOR, "yt-subscribe-button-view-model button.yt-spec-button-shape-next"
+            )
+            expectation = None
+            if self.watcher:
+                expectation = self.watcher.expect(self.driver.current_window_handle)
+            self.driver.execute_script("arguments[0].click();", button)
+            if not subscribed:
+                self.confirm_unsubscribe()
+            if expectation:
+                ok, detail = expectation.wait(self.BUTTON_WAIT_TIME)
+                if not ok:
+                    verb = "Subscribing to" if subscribed else "Unsubscribing from"
+                    print(f"{verb} {channel_name} was not confirmed: {detail}")
+                    return -1
+            if subscribed:
                 print(f"Subscribed successfully to {channel_name}")
-                return 1
-            elif button_text == "subscribed":
-                print(f"Already subscribed to {channel_name}")
-                return 0
             else:
-                print(f"Unexpected button text: '{button_text}'")
-                return -1
+                print(f"Unsubscribed successfully from {channel_name}")
+            return 1
 
         except Exception as e:
-            logging.exception(f"An error occurred while subscribing to {channel_name}")
-            print(f"Failed to subscribe to {channel_name}: {str(e)}")
+            verb = "subscribe to" if subscribed else "unsubscribe from"
+            logging.exception(f"An error occurred while trying to {verb} {channel_name}")
+            print(f"Failed to {verb} {channel_name}: {str(e)}")
             return -1
 
+    def subscribe(self, channel_name):
+        """Attempt to subscribe to a YouTube channel."""
+        return self.set_subscription(channel_name, True)
+
+    def unsubscribe(self, channel_name):
+        """Attempt to unsubscribe from a YouTube channel."""
+        return self.set_subscription(channel_name, False)
+
     def ensure_english_language(self):
         """Check and change YouTube language to English if needed."""
         try:
@@ -282,53 +537,152 @@ class ChannelSubscriber:
             logging.exception("Language change failed")
             return False
 
+    def record_result(self, name, url, result, action="subscribe"):
+        """Record the outcome of one channel for machine-readable reports."""
+        statuses = RESULT_STATUS if action == "subscribe" else UNSUBSCRIBE_STATUS
+        status = statuses.get(result, "button_not_found")
+        self.results.append({"name": name, "url": url, "status": status})
+        if self.journal:
+            self.journal.record("channel", name=name, url=url, status=status)
+
+    @staticmethod
+    def summary(action, total, unchanged, changed):
+        """Name the counts returned by process_channels for a report."""
+        if action == "subscribe":
+            return {
+                "total_processed": total,
+                "already_subscribed": unchanged,
+                "new_subscriptions": changed,
+            }
+        return {"total_processed": total, "not_subscribed": unchanged, "unsubscribed": changed}
+
     def subscribe_to_channels(self, channels):
         """Main method to perform subscriptions"""
-        try:
-            self.driver = self.get_secure_driver()
-            self.driver.get("https://www.youtube.com")
-
-            if not self.wait_for_login():
-                return 0, 0, 0
-
-            self.ensure_english_language()
-
-            active_channels = [channel for channel in channels if channel[2]]
-            total_active = len(active_channels)
-
-            print("\n" + "=" * 58)
-            print("Ready to start subscribing:")
-            print("[+] Logged in successfully")
-            print("[+] Language set to English")
-            print(f"[+] Found {total_active} channels to process")
-            print("=" * 58)
-
-            input("\nPress Enter to start subscribing to channels...")
-            print("\nStarting subscription process...")
-
-            total_processed = 0
-            already_subscribed = 0
-            new_subscriptions = 0
-
-            for i, (name, url, _) in enumerate(active_channels, 1):
-                print(
-                    f"\nChecking {name} ({i}/{total_active}, {i/total_active*100:.1f}% done)"
-                )
-                self.driver.get(url)
-
-                if self.wait_for_button():
-                    result = self.subscribe(name)
-                    if result == 1:
-                        new_subscriptions += 1
-                    elif result == 0:
-                        already_subscribed += 1
-                    total_processed += 1
-                else:
-                    print(f"Subscribe button not found for {name}")
-
-                time.sleep(self.DELAY_BETWEEN_CHANNELS)
-
-            return total_processed, already_subscribed, new_subscriptions
-        finally:
-            if self.driver:
-                self.driver.quit()
+        return self.process_channels(channels, "subscribe")
+
+    def unsubscribe_from_channels(self, channels):
+        """Unsubscribe from every active channel in the list."""
+        return self.process_channels(channels, "unsubscribe")
+
+    def pending_channels(self, channels):
+        """Return the active ``(name, url)`` pairs the journal doesn't record as done."""
+        active_channels = list(ChannelList.from_records(channels).active())
+        if self.journal:
+            # Resume: skip channels an earlier run already finished
+            done = self.journal.completed_keys()
+            remaining = [c for c in active_channels if channel_key(c[1]) not in done]
+            if len(remaining) < len(active_channels):
+                print(f"Skipping {len(active_channels) - len(remaining)} channels already done")
+            active_channels = remaining
+        return active_channels
+
+    def announce_start(self, action, total_active):
+        print("\n" + "=" * 58)
+        gerund = action[:-1] + "ing"
+        print(f"Ready to start {gerund}:")
+        print("[+] Logged in successfully")
+        print(f"[+] Found {total_active} channels to process")
+        print("=" * 58)
+
+        if self.interactive:
+            preposition = "to" if action == "subscribe" else "from"
+            input(f"\nPress Enter to start {gerund} {preposition} channels...")
+        print(f"\nStarting {gerund} process...")
+
+    def process_channels(self, channels, action="subscribe"):
+        """Visit every active channel and subscribe or unsubscribe.
+
+        Returns (total_processed, already_in_target_state, changed).
+        """
+        with PROFILER.phase(action):
+            handler = self.subscribe if action == "subscribe" else self.unsubscribe
+            changed_counter = (
+                self.metrics.subscribed if action == "subscribe" else self.metrics.unsubscribed
+            )
+            unchanged_counter = (
+                self.metrics.already_subscribed
+                if action == "subscribe"
+                else self.metrics.not_subscribed
+            )
+            try:
+                self.driver = self.get_secure_driver()
+                if self.session:
+                    self.session.apply_to_driver(self.driver, self.base_url)
+                self.driver.get(self.base_url)
+
+                if not self.wait_for_login():
+                    return 0, 0, 0
+
+                active_channels = self.pending_channels(channels)
+                total_active = len(active_channels)
+                self.announce_start(action, total_active)
+
+                self.results = []
+                self.recycle_events = []
+                total_processed = 0
+                unchanged = 0
+                changed = 0
+
+                navigator = PagePipeline(self.driver, self.metrics) if self.pipeline else None
+
+                for i, (name, url) in enumerate(active_channels, 1):
+                    if self.cancel_event.is_set():
+                        print("Cancelled, stopping before the remaining channels")
+                        break
+                    print(
+                        f"\nChecking {name} ({i}/{total_active}, {i/total_active*100:.1f}% done)"
+                    )
+                    with PROFILER.channel(i):
+                        self.metrics.in_flight.inc()
+                        next_url = active_channels[i][1] if i < total_active else None
+                        try:
+                            try:
+                                seconds = self.navigate(navigator, url, next_url)
+                            except WebDriverException:
+                                if not self.watchdog:
+                                    raise
+                                # The browser died under us: replace it and retry this channel
+                                logging.exception(f"Browser failed while opening {url}")
+                                if not self.recycle_driver("browser stopped responding"):
+                                    return total_processed, unchanged, changed
+                                navigator = PagePipeline(self.driver, self.metrics) if self.pipeline else None
+                                seconds = self.navigate(navigator, url, next_url)
+
+                            if self.wait_for_button():
+                                result = handler(name)
+                                if result == 1:
+                                    changed += 1
+                                    changed_counter.inc()
+                                elif result == 0:
+                                    unchanged += 1
+                                    unchanged_counter.inc()
+                                else:
+                                    self.metrics.failed.inc()
+                                total_processed += 1
+                            else:
+                                print(f"Subscribe button not found for {name}")
+                                self.metrics.failed.inc()
+                                result = None
+                            self.record_result(name, url, result, action)
+                        finally:
+                            self.metrics.in_flight.dec()
+                            self.metrics.flush()
+
+                    reason = self.watchdog.observe(self.driver, seconds) if self.watchdog else None
+                    if reason and i < total_active:
+                        if not self.recycle_driver(reason):
+                            print("Login lost after recycling the browser, stopping")
+                            break
+                        navigator = PagePipeline(self.driver, self.metrics) if self.pipeline else None
+
+                    time.sleep(self.DELAY_BETWEEN_CHANNELS)
+
+                return total_processed, unchanged, changed
+            finally:
+                self.close_devtools()
+                if self.driver:
+                    self.driver.quit()
+                    self.driver = None
+                    self.metrics.drivers.dec()
+                    self.metrics.flush()
+                self.timeouts.save()
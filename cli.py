@@ -0,0 +1,1095 @@
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+
+from channel_io import FORMATS, iter_channels, read_channels, read_channels_page, write_channels
+from channel_store import ChannelList, channel_key
+from journal import DONE_STATUSES, RunJournal
+import metrics
+from page_store import DEFAULT_ACCOUNT, DEFAULT_KEEP, DEFAULT_PAGE_DIR
+from audit import AUDIT_ACCOUNT, DEFAULT_AUDIT_DIR
+from session_state import DEFAULT_SESSION_FILE, SessionExpired
+from shards import parse_shard
+from snapshots import DEFAULT_SNAPSHOT_DIR
+from timeouts import DEFAULT_LATENCY_FILE
+from transfer_queue import DEFAULT_DB
+
+
+def write_report(report, path):
+    """Write a JSON report to a file, or to stdout when path is '-'."""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+ENGINES = ("selenium", "cdp", "api")
+
+# Exit status of unattended runs whose imported login no longer works
+EXIT_SESSION_EXPIRED = 3
+
+
+def build_api(args):
+    """Return a YouTubeApi client for --engine api, or None without credentials."""
+    from youtube_api import Credentials, QuotaLedger, YouTubeApi
+
+    credentials = Credentials.load(args.token_file) if args.token_file else Credentials.from_env()
+    if not credentials:
+        print("--engine api needs --token-file or YTT_API_TOKEN.", file=sys.stderr)
+        return None
+    ledger = QuotaLedger(project=args.quota_project, daily_limit=args.daily_quota)
+    return YouTubeApi(credentials, ledger=ledger)
+
+
+def add_api_arguments(parser):
+    parser.add_argument("--token-file", help="OAuth token for --engine api (or set YTT_API_TOKEN)")
+    parser.add_argument("--quota-project", default="default", help="Quota ledger entry to charge")
+    parser.add_argument("--daily-quota", type=int, default=10000, help="Daily quota of the API project")
+
+
+def build_timeouts(args):
+    from timeouts import TimeoutCalibration
+
+    return TimeoutCalibration(None if args.fixed_timeouts else DEFAULT_LATENCY_FILE)
+
+
+def build_tap(args):
+    """Return a NetworkTap for --record/--replay, or None."""
+    if not (args.record or args.replay):
+        return None
+    from page_archive import RECORD, REPLAY, NetworkTap, PageArchive
+
+    if args.record:
+        return NetworkTap(PageArchive(args.record), RECORD)
+    return NetworkTap(PageArchive(args.replay), REPLAY, timings=args.replay_timings)
+
+
+def add_archive_arguments(parser):
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument("--record", metavar="ARCHIVE", help="Record every response into this archive")
+    archive.add_argument("--replay", metavar="ARCHIVE", help="Serve responses from this archive, offline")
+    parser.add_argument(
+        "--replay-timings", action="store_true", help="Delay replayed responses as originally observed"
+    )
+
+
+def build_session(args):
+    """Return the imported SessionState for --session, or None."""
+    if not args.session:
+        return None
+    from session_state import SessionState
+
+    if not os.path.exists(args.session):
+        raise SessionExpired(f"{args.session} does not exist, create it with 'main.py session export'")
+    session = SessionState.load(args.session)
+    # Cookies that ran out fail here, before a browser is started
+    session.check()
+    return session
+
+
+def build_subscriber_factory(args):
+    """Return a factory of unattended subscribers for --engine, --profile and
+    the session options, or None when the API has no credentials.
+    """
+    if args.engine == "api":
+        from youtube_api import ApiChannelSubscriber
+
+        api = build_api(args)
+        if not api:
+            return None
+        return functools.partial(ApiChannelSubscriber, api, interactive=False)
+    if args.engine == "cdp":
+        from cdp_engine import CDPChannelSubscriber as ChannelSubscriber
+    else:
+        from channel_subscriber import ChannelSubscriber
+    return functools.partial(
+        ChannelSubscriber,
+        interactive=False,
+        profile_dir=args.profile,
+        headless=args.headless,
+        session=build_session(args),
+    )
+
+
+def add_session_arguments(parser):
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a window; never prompt")
+    parser.add_argument("--session", metavar="FILE", help="Import the login exported by 'session export'")
+
+
+def cmd_extract(args):
+    if args.html:
+        # A saved page needs no browser, so none of the engines are imported
+        return write_extracted(read_channels_page(args.html), args)
+    if args.page:
+        pages = build_pages(args)
+        try:
+            entry = pages.find(args.page, args.account)
+        except KeyError as e:
+            print(f"No such page: {e.args[0]}", file=sys.stderr)
+            return 2
+        return write_extracted(pages.read_channels(entry), args)
+    if args.engine == "api":
+        from youtube_api import ApiChannelExtractor
+
+        api = build_api(args)
+        if not api:
+            return 2
+        ChannelExtractor = functools.partial(ApiChannelExtractor, api)
+    elif args.engine == "cdp":
+        from cdp_engine import CDPChannelExtractor as ChannelExtractor
+    else:
+        from channel_extractor import ChannelExtractor
+
+    # Progress output goes to stderr so stdout stays machine-readable
+    with contextlib.redirect_stdout(sys.stderr):
+        tap = build_tap(args)
+        extractor = ChannelExtractor(
+            interactive=False,
+            timeouts=build_timeouts(args),
+            tap=tap,
+            headless=args.headless,
+            session=build_session(args),
+            pages=build_pages(args),
+            account=args.account,
+        )
+        try:
+            channels = extractor.get_channel_list()
+        finally:
+            if tap:
+                tap.close()
+    return write_extracted(channels, args)
+
+
+def build_pages(args):
+    from page_store import PageStore
+
+    return PageStore(args.page_dir, keep=args.keep)
+
+
+def add_page_arguments(parser):
+    parser.add_argument("--page-dir", default=DEFAULT_PAGE_DIR, help="Archive of saved channels pages")
+    parser.add_argument(
+        "--keep", type=int, default=DEFAULT_KEEP, help="Pages kept per account when one is saved (0: all)"
+    )
+
+
+def write_extracted(channels, args):
+    if not channels:
+        print("No channels extracted.", file=sys.stderr)
+        return 1
+    write_channels(channels, args.output, args.format)
+    return 0
+
+
+def cmd_select(args):
+    from selection_rules import RuleSet, apply_rules
+
+    channels = read_channels(args.input, args.input_format)
+    include = RuleSet.from_files(args.include)
+    exclude = RuleSet.from_files(args.exclude)
+    active = apply_rules(channels, include, exclude)
+    write_channels(channels, args.output, args.format)
+    print(f"Selected {active} of {len(channels)} channels.", file=sys.stderr)
+    return 0
+
+
+def build_watchdog(args):
+    """Return a DriverWatchdog for the recycling options, or None if none is set."""
+    limits = (args.recycle_after, args.max_browser_mb, args.max_heap_mb, args.max_slowdown)
+    if not any(limits):
+        return None
+    from driver_watchdog import DriverWatchdog
+
+    return DriverWatchdog(
+        max_rss_mb=args.max_browser_mb,
+        max_heap_mb=args.max_heap_mb,
+        max_navigations=args.recycle_after,
+        slowdown=args.max_slowdown,
+    )
+
+
+def build_governor(args):
+    """Return a ConcurrencyGovernor for --max-concurrency, or None."""
+    if not args.max_concurrency:
+        return None
+    from governor import ConcurrencyGovernor
+
+    return ConcurrencyGovernor(
+        minimum=args.min_concurrency,
+        maximum=args.max_concurrency,
+        min_free_mb=args.min_free_mb,
+        max_cpu=args.max_cpu,
+        max_worker_rss_mb=args.max_tab_mb,
+    )
+
+
+def build_resolver(api):
+    """Return a function mapping a channel URL to its ID through ``api``, or None."""
+    from youtube_api import ApiError, QuotaExhausted
+
+    def resolve(url):
+        try:
+            return api.channel_id(url)
+        except (ApiError, QuotaExhausted):
+            return None
+
+    return resolve
+
+
+def pending_count(channels, journal):
+    """Active channels a run still has to process; a resume skips what the journal records as done."""
+    pending = channels.active_count
+    if journal:
+        done = journal.completed_keys()
+        pending -= sum(1 for _, url in channels.active() if channel_key(url) in done)
+    return pending
+
+
+def build_engine(args, api=None):
+    """Return ``(make_subscriber, governor)`` for the run options, or
+    ``(None, None)`` after printing why they can't be used together.
+
+    ``make_subscriber`` takes the journal, tap and session of the run.
+    """
+    watchdog = build_watchdog(args)
+    if args.engine != "selenium" and (args.pipeline or watchdog):
+        print("--pipeline and the recycling options need the selenium engine.", file=sys.stderr)
+        return None, None
+    governor = build_governor(args)
+    if governor and args.engine != "cdp":
+        print("--max-concurrency needs the cdp engine.", file=sys.stderr)
+        return None, None
+    if args.engine == "api":
+        from youtube_api import ApiChannelSubscriber
+
+        api = api or build_api(args)
+        if not api:
+            return None, None
+        make_subscriber = functools.partial(ApiChannelSubscriber, api, concurrency=args.concurrency)
+    elif args.engine == "cdp":
+        from cdp_engine import CDPChannelSubscriber
+
+        make_subscriber = functools.partial(
+            CDPChannelSubscriber, concurrency=args.concurrency, governor=governor
+        )
+    else:
+        from channel_subscriber import ChannelSubscriber
+
+        make_subscriber = functools.partial(
+            ChannelSubscriber, pipeline=args.pipeline, watchdog=watchdog
+        )
+    make_subscriber = functools.partial(
+        make_subscriber,
+        interactive=False,
+        profile_dir=args.profile,
+        timeouts=build_timeouts(args),
+        confirm=not args.no_confirm,
+        headless=args.headless,
+        delay=args.delay,
+    )
+    return make_subscriber, governor
+
+
+def add_run_arguments(parser):
+    """Options shared by the commands that subscribe or unsubscribe."""
+    parser.add_argument("--journal", help="Journal file; channels it records as done are skipped")
+    parser.add_argument("--profile", help="Chrome profile directory of the account")
+    parser.add_argument("--delay", type=float, help="Seconds between channels (default: 0.5)")
+    parser.add_argument(
+        "--pipeline", action="store_true", help="Load the next channel in a second tab meanwhile"
+    )
+    parser.add_argument("--recycle-after", type=int, help="Restart the browser every N channels")
+    parser.add_argument("--max-browser-mb", type=float, help="Restart the browser above this RSS")
+    parser.add_argument("--max-heap-mb", type=float, help="Restart the browser above this JS heap")
+    parser.add_argument(
+        "--max-slowdown", type=float, help="Restart when page loads get this many times slower"
+    )
+    parser.add_argument(
+        "--engine", choices=ENGINES, default="selenium", help="Browser engine or the Data API"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Parallel tabs (cdp) or API calls (api)"
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, help="Let the tab count follow free resources up to this (cdp)"
+    )
+    parser.add_argument("--min-concurrency", type=int, default=1, help="Fewest tabs the governor keeps")
+    parser.add_argument(
+        "--min-free-mb", type=float, default=1024, help="Drop tabs when free memory falls below this"
+    )
+    parser.add_argument(
+        "--max-cpu", type=float, default=0.85, help="Drop tabs when the CPUs are busier than this share"
+    )
+    parser.add_argument("--max-tab-mb", type=float, help="Drop tabs when the browser uses more per tab")
+    add_api_arguments(parser)
+    parser.add_argument(
+        "--fixed-timeouts", action="store_true", help="Use the default timeouts, don't learn new ones"
+    )
+    parser.add_argument(
+        "--no-confirm",
+        action="store_true",
+        help="Count a click as done without waiting for YouTube's network response",
+    )
+    add_archive_arguments(parser)
+    add_session_arguments(parser)
+
+
+def add_model_arguments(parser):
+    parser.add_argument("--latency-file", default=DEFAULT_LATENCY_FILE, help="Recorded latencies to fit")
+    parser.add_argument(
+        "--trace", action="append", default=[], help="Journal or result file to fit the failure rate (repeatable)"
+    )
+    parser.add_argument("--page-load", type=float, help="Mean page load seconds (instead of recorded)")
+    parser.add_argument("--button-wait", type=float, help="Mean seconds until the button shows")
+    parser.add_argument("--click", type=float, help="Mean seconds per subscribe click")
+    parser.add_argument("--failure-rate", type=float, help="Share of channels that fail")
+    parser.add_argument("--jitter", type=float, help="Log-space deviation of parameter latencies")
+    parser.add_argument("--contention", type=float, help="Slowdown per additional busy tab (default 0.15)")
+
+
+def build_model(args):
+    from simulator import LatencyModel
+
+    return LatencyModel.fit(
+        args.latency_file,
+        args.trace,
+        page_load=args.page_load,
+        button_wait=args.button_wait,
+        click=args.click,
+        failure_rate=args.failure_rate,
+        jitter=args.jitter,
+        contention=args.contention,
+    )
+
+
+def print_projection(rows, best, total):
+    print(f"{total} channels")
+    print(f"{'tabs':>5}{'delay':>7}{'wall':>10}{'worst':>10}{'failures':>10}")
+    for row in rows:
+        marker = "  <- best" if row is best else ""
+        print(
+            f"{row['concurrency']:>5}{row['delay']:>7.2f}{format_duration(row['wall_seconds']):>10}"
+            f"{format_duration(row['wall_seconds_max']):>10}{row['expected_failures']:>10.1f}{marker}"
+        )
+
+
+def format_duration(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def cmd_simulate(args):
+    from simulator import best_setting, simulate
+
+    channels = read_channels(args.input, args.input_format)
+    model = build_model(args)
+    rows = [
+        simulate(channels, model, concurrency, delay, args.runs, args.latency_file)
+        for concurrency in args.concurrency
+        for delay in args.delay
+    ]
+    best = best_setting(rows)
+    if args.json:
+        write_report({"model": model.describe(), "settings": rows, "best": best}, "-")
+    else:
+        print_projection(rows, best, channels.active_count)
+    return 0
+
+
+def cmd_subscribe(args):
+    channels = read_channels(args.input, args.input_format)
+    shard = None
+    if args.shard:
+        from shards import select_shard, shard_info
+
+        # Every host reads the whole manifest and keeps only its own part
+        shard = shard_info(channels, *args.shard, args.action)
+        channels = select_shard(channels, *args.shard)
+        print(
+            f"Shard {args.shard[0]}/{args.shard[1]} of manifest {shard['manifest']}:"
+            f" {len(channels)} channels",
+            file=sys.stderr,
+        )
+    if args.dry_run:
+        from simulator import simulate
+
+        # The selenium engine works through one tab; its loop paces like one CDP tab
+        concurrency = 1 if args.engine == "selenium" else args.concurrency
+        delay = 0.5 if args.delay is None else args.delay
+        row = simulate(
+            channels, build_model(args), concurrency, delay, runs=args.runs, latency_file=args.latency_file
+        )
+        print_projection([row], None, channels.active_count)
+        return 0
+    journal = RunJournal(args.journal) if args.journal else None
+    pending = pending_count(channels, journal)
+    make_subscriber, governor = build_engine(args)
+    if not make_subscriber:
+        return 2
+    with contextlib.redirect_stdout(sys.stderr):
+        tap = build_tap(args)
+        subscriber = make_subscriber(journal=journal, tap=tap, session=build_session(args))
+        try:
+            total, unchanged, changed = subscriber.process_channels(channels, args.action)
+        finally:
+            if tap:
+                tap.close()
+    report = subscriber.summary(args.action, total, unchanged, changed)
+    if shard:
+        report["shard"] = shard
+    report["channels"] = subscriber.results
+    if subscriber.recycle_events:
+        report["recycles"] = subscriber.recycle_events
+    if governor:
+        report["governor"] = governor.decisions
+    write_report(report, args.results)
+    failed = sum(1 for r in subscriber.results if r["status"] not in DONE_STATUSES)
+    return 1 if failed or total < pending else 0
+
+
+def cmd_mirror(args):
+    from audit import match_by_id
+    from snapshots import diff_channels
+
+    source = read_channels(args.input, args.input_format)
+    api = None
+    if args.engine == "api" and not (args.dry_run and args.current):
+        api = build_api(args)
+        if not api:
+            return 2
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.current:
+            current = read_channels(args.current)
+        else:
+            if args.engine == "api":
+                from youtube_api import ApiChannelExtractor
+
+                ChannelExtractor = functools.partial(ApiChannelExtractor, api)
+            elif args.engine == "cdp":
+                from cdp_engine import CDPChannelExtractor as ChannelExtractor
+            else:
+                from channel_extractor import ChannelExtractor
+
+            print("Extracting the current subscriptions of the NEW account...")
+            current = ChannelExtractor(
+                interactive=False,
+                profile_dir=args.profile,
+                timeouts=build_timeouts(args),
+                headless=args.headless,
+                session=build_session(args),
+                account=None if args.profile else AUDIT_ACCOUNT,
+            ).get_channel_list()
+            if current is None:
+                print("Could not read the target's subscriptions.")
+                return 1
+        additions, removals = diff_channels(current, source)
+        if api:
+            # The API lists channel IDs; handles in the source stand for the same channels
+            additions, removals = match_by_id(additions, removals, build_resolver(api))
+        print(f"{len(additions)} channels to subscribe, {len(removals)} to unsubscribe")
+        report = {"channels": []}
+    if args.dry_run:
+        report["subscribe"] = [url for _, url in additions]
+        report["unsubscribe"] = [url for _, url in removals]
+        write_report(report, args.results)
+        return 0
+
+    with contextlib.redirect_stdout(sys.stderr):
+        make_subscriber, governor = build_engine(args, api)
+        if not make_subscriber:
+            return 2
+        journal = RunJournal(args.journal) if args.journal else None
+        tap = build_tap(args)
+        incomplete = False
+        try:
+            for action, delta in (("subscribe", additions), ("unsubscribe", removals)):
+                if not delta:
+                    continue
+                channels = ChannelList.from_records((n, u, True) for n, u in delta)
+                pending = pending_count(channels, journal)
+                subscriber = make_subscriber(journal=journal, tap=tap, session=build_session(args))
+                counts = subscriber.process_channels(channels, action)
+                report[action] = subscriber.summary(action, *counts)
+                report["channels"] += subscriber.results
+                if subscriber.recycle_events:
+                    report.setdefault("recycles", []).extend(subscriber.recycle_events)
+                # A login that failed returns before any channel is processed
+                incomplete = incomplete or counts[0] < pending
+        finally:
+            if tap:
+                tap.close()
+    if governor:
+        report["governor"] = governor.decisions
+    write_report(report, args.results)
+    failed = sum(1 for r in report["channels"] if r["status"] not in DONE_STATUSES)
+    return 1 if failed or incomplete else 0
+
+
+def cmd_audit(args):
+    from audit import SubscriptionAudit, missing_channels, print_audit, write_missing
+
+    intended = read_channels(args.input, args.input_format)
+    if args.engine == "api":
+        from youtube_api import ApiChannelExtractor, ApiChannelSubscriber
+
+        api = build_api(args)
+        if not api:
+            return 2
+        extractor_factory = functools.partial(ApiChannelExtractor, api, interactive=False)
+        subscriber_factory = functools.partial(ApiChannelSubscriber, api, interactive=False)
+        resolve = build_resolver(api)
+    else:
+        resolve = None
+        if args.engine == "cdp":
+            from cdp_engine import CDPChannelExtractor as ChannelExtractor
+            from cdp_engine import CDPChannelSubscriber as ChannelSubscriber
+        else:
+            from channel_extractor import ChannelExtractor
+            from channel_subscriber import ChannelSubscriber
+        session = build_session(args)
+        extractor_factory = functools.partial(
+            ChannelExtractor,
+            interactive=False,
+            profile_dir=args.profile,
+            headless=args.headless,
+            session=session,
+            account=None if args.profile else AUDIT_ACCOUNT,
+        )
+        subscriber_factory = functools.partial(
+            ChannelSubscriber,
+            interactive=False,
+            profile_dir=args.profile,
+            headless=args.headless,
+            session=session,
+        )
+
+    with contextlib.redirect_stdout(sys.stderr):
+        harvested = read_channels(args.current) if args.current else None
+        report = SubscriptionAudit(intended, extractor_factory, resolve).run(harvested)
+        if report is None:
+            print("Could not read the target's subscriptions.")
+            return 1
+        print_audit(report)
+        missing = missing_channels(report)
+        if missing and args.submit:
+            from transfer_queue import JobQueue
+
+            path = write_missing(report, args.audit_dir)
+            report["job"] = JobQueue(args.db).submit(path, args.profile)
+            print(f"Queued the missing channels as job {report['job']} ({path})")
+        elif missing and args.requeue:
+            subscriber = subscriber_factory()
+            counts = subscriber.subscribe_to_channels(missing)
+            report["requeue"] = subscriber.summary("subscribe", *counts)
+            report["channels"] = subscriber.results
+    write_report(report, args.results)
+    if "channels" in report:
+        return 1 if any(r["status"] not in DONE_STATUSES for r in report["channels"]) else 0
+    return 1 if report["missing"] and not args.submit else 0
+
+
+def cmd_session_export(args):
+    from channel_subscriber import ChannelSubscriber
+    from session_state import SessionState
+
+    subscriber = ChannelSubscriber(profile_dir=args.profile, confirm=False)
+    with contextlib.redirect_stdout(sys.stderr):
+        driver = subscriber.get_secure_driver()
+        try:
+            driver.get(subscriber.base_url)
+            if not subscriber.wait_for_login():
+                return 1
+            session = SessionState.from_driver(driver, subscriber.base_url)
+        finally:
+            driver.quit()
+            subscriber.metrics.drivers.dec()
+    session.save(args.output)
+    print(f"Saved {len(session.cookies)} cookies to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_session_check(args):
+    from channel_subscriber import ChannelSubscriber
+
+    subscriber = ChannelSubscriber(
+        interactive=False, confirm=False, headless=True, session=build_session(args)
+    )
+    with contextlib.redirect_stdout(sys.stderr):
+        driver = subscriber.get_secure_driver()
+        try:
+            subscriber.session.apply_to_driver(driver, subscriber.base_url)
+            driver.get(subscriber.base_url)
+            subscriber.check_session()
+        finally:
+            driver.quit()
+            subscriber.metrics.drivers.dec()
+    print(f"{args.session}: logged in", file=sys.stderr)
+    return 0
+
+
+def cmd_shard_split(args):
+    from shards import manifest_digest, write_shards
+
+    if args.count < 1:
+        print("--count must be at least 1.", file=sys.stderr)
+        return 2
+    channels = read_channels(args.input, args.input_format)
+    paths = write_shards(channels, args.count, args.output_dir)
+    print(f"Manifest {manifest_digest(channels)}:", file=sys.stderr)
+    for path in paths:
+        count = sum(1 for _ in iter_channels(path, "jsonl"))
+        print(f"  {path}: {count} channels", file=sys.stderr)
+    return 0
+
+
+def cmd_shard_merge(args):
+    from shards import merge_results
+
+    reports = []
+    for path in args.results_files:
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+    try:
+        merged = merge_results(reports)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(
+        f"{merged['total_processed']} channels from shards {merged['shards']}, "
+        f"{len(merged['failed'])} failed, {len(merged['conflicts'])} conflicts",
+        file=sys.stderr,
+    )
+    if merged["missing_shards"]:
+        print(f"Missing shards: {merged['missing_shards']}", file=sys.stderr)
+    write_report(merged, args.results)
+    return 1 if merged["failed"] or merged["conflicts"] or merged["missing_shards"] else 0
+
+
+def cmd_convert(args):
+    records = iter_channels(args.input, args.input_format)
+    count = write_channels(records, args.output, args.format)
+    print(f"Converted {count} channels.", file=sys.stderr)
+    return 0
+
+
+def cmd_fanout(args):
+    from fanout import FanOutTransfer, Target
+
+    targets = [Target.parse(spec) for spec in args.target or []]
+    if args.targets_file:
+        targets += Target.load_file(args.targets_file)
+    if not targets:
+        print("No target accounts given.", file=sys.stderr)
+        return 2
+    for target in targets:
+        if target.delay is None:
+            target.delay = args.delay
+    channels = read_channels(args.input, args.input_format)
+    with contextlib.redirect_stdout(sys.stderr):
+        transfer = FanOutTransfer(
+            channels, targets, max_parallel=args.max_parallel, action=args.action
+        )
+        accounts = transfer.run(progress_interval=args.progress_interval)
+    write_report({"accounts": accounts}, args.results)
+    failed = any(a.get("error") or a["failed"] for a in accounts)
+    return 1 if failed else 0
+
+
+def cmd_queue_submit(args):
+    from transfer_queue import JobQueue
+
+    job_id = JobQueue(args.db).submit(
+        args.source, args.profile, args.delay, args.input_format, args.action
+    )
+    print(job_id)
+    return 0
+
+
+def cmd_queue_list(args):
+    from transfer_queue import JobQueue
+
+    jobs = JobQueue(args.db).list(args.state)
+    if args.json:
+        write_report(jobs, "-")
+        return 0
+    for job in jobs:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["created"]))
+        print(
+            f"{job['id']:>5}  {job['state']:<10}  {job['action']:<11}  {created}"
+            f"  {job['profile'] or '-'}  {job['source']}"
+        )
+    return 0
+
+
+def cmd_queue_cancel(args):
+    from transfer_queue import JobQueue
+
+    state = JobQueue(args.db).cancel(args.job_id)
+    if state is None:
+        print(f"Job {args.job_id} is not queued or running.", file=sys.stderr)
+        return 1
+    print(f"Job {args.job_id}: {state}")
+    return 0
+
+
+def cmd_queue_serve(args):
+    from transfer_queue import JobQueue, TransferDaemon
+
+    TransferDaemon(JobQueue(args.db), workers=args.workers).serve()
+    return 0
+
+
+def cmd_sync(args):
+    from snapshots import IncrementalSync, SnapshotStore
+
+    fresh = read_channels(args.input, args.input_format)
+    sync = IncrementalSync(SnapshotStore(args.snapshot_dir), args.name)
+    if args.dry_run:
+        baseline, additions, removals = sync.plan(fresh, args.against)
+        report = {
+            "baseline": baseline,
+            "additions": [url for _, url in additions],
+            "removals": [url for _, url in removals],
+        }
+    else:
+        sync.subscriber_factory = build_subscriber_factory(args)
+        if not sync.subscriber_factory:
+            return 2
+        with contextlib.redirect_stdout(sys.stderr):
+            report = sync.run(fresh, mirror_removals=args.mirror_removals, against=args.against)
+    write_report(report, args.results)
+    return 1 if report.get("failed") else 0
+
+
+def cmd_pages_list(args):
+    pages = build_pages(args)
+    for entry in pages.entries(args.account):
+        print(
+            f"{entry['digest'][:12]}  {time.ctime(entry['saved'])}  {entry['account']:<16}"
+            f"{entry['channels']:>6} channels  {entry['stored'] // 1024:>6} KiB"
+        )
+    count, stored, size = pages.usage()
+    print(f"{count} distinct pages, {stored // 1024} KiB stored ({size // 1024} KiB of HTML)")
+    return 0
+
+
+def cmd_pages_import(args):
+    with open(args.file, "r", encoding="utf-8") as f:
+        html = f.read()
+    entry, _ = build_pages(args).save(html, args.account or DEFAULT_ACCOUNT)
+    print(f"Saved {entry['digest'][:12]} for {entry['account']} ({entry['channels']} channels)")
+    return 0
+
+
+def cmd_pages_prune(args):
+    max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+    removed = build_pages(args).prune(keep=args.keep or None, max_age=max_age, account=args.account)
+    print(f"Removed {len(removed)} pages")
+    return 0
+
+
+def cmd_snapshot_list(args):
+    from snapshots import SnapshotStore
+
+    store = SnapshotStore(args.snapshot_dir)
+    for version in store.versions(args.name):
+        info = store.info(args.name, version)
+        print(f"v{version:04d}  {info['channels']:>6} channels  {info['created']}")
+    return 0
+
+
+def cmd_snapshot_save(args):
+    from snapshots import SnapshotStore
+
+    version = SnapshotStore(args.snapshot_dir).save(
+        args.name, iter_channels(args.input, args.input_format)
+    )
+    print(f"Saved {args.name} v{version:04d}")
+    return 0
+
+
+def cmd_snapshot_diff(args):
+    from snapshots import SnapshotStore, diff_sorted
+
+    store = SnapshotStore(args.snapshot_dir)
+    additions, removals = diff_sorted(
+        store.iter_version(args.name, args.old), store.iter_version(args.name, args.new)
+    )
+    write_report(
+        {
+            "old": args.old,
+            "new": args.new,
+            "additions": [url for _, url in additions],
+            "removals": [url for _, url in removals],
+        },
+        "-",
+    )
+    return 0
+
+
+def cmd_timeouts(args):
+    from timeouts import TimeoutCalibration
+
+    if args.reset:
+        if os.path.exists(args.file):
+            os.remove(args.file)
+        print("Forgot all recorded latencies; the default timeouts apply again.")
+        return 0
+    calibration = TimeoutCalibration(args.file)
+    rows = calibration.describe()
+    if args.json:
+        write_report(rows, "-")
+        return 0
+    high = f"p{calibration.pct}"
+    print(f"Site: {calibration.site}")
+    print(f"{'step':<15}{'samples':>8}{'ran out':>8}{'p50':>8}{high:>8}{'timeout':>9}{'default':>9}")
+    for row in rows:
+        p50 = f"{row['p50']:.2f}" if row["p50"] is not None else "-"
+        high_value = f"{row['high']:.2f}" if row["high"] is not None else "-"
+        print(
+            f"{row['step']:<15}{row['samples']:>8}{row['timed_out']:>8}{p50:>8}{high_value:>8}"
+            f"{row['timeout']:>9.1f}{row['default']:>9.1f}"
+        )
+    return 0
+
+
+def cmd_archive_list(args):
+    from page_archive import PageArchive
+
+    count = 0
+    for entry in PageArchive(args.archive).entries():
+        if args.grep and args.grep not in entry["url"]:
+            continue
+        size = len(entry["body"]) * 3 // 4
+        print(f"{entry['status']:>4} {entry['method']:<6} {size:>9} B {entry['elapsed']:>7.3f}s  {entry['url']}")
+        count += 1
+    print(f"{count} responses", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Transfer YouTube subscriptions without interactive prompts.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="Extract channels from the OLD account")
+    extract.add_argument("-o", "--output", default="-", help="Channel list file ('-' for stdout)")
+    extract.add_argument("--html", help="Parse a saved channels page instead of opening Chrome")
+    extract.add_argument("--page", metavar="REF", help="Read an archived page ('latest' or a digest prefix)")
+    extract.add_argument("--account", help="Account the page is archived under (default: profile name)")
+    extract.add_argument("--format", choices=FORMATS, help="Output format (default: from extension)")
+    extract.add_argument("--engine", choices=ENGINES, default="selenium", help="Browser engine or the Data API")
+    add_api_arguments(extract)
+    extract.add_argument(
+        "--fixed-timeouts", action="store_true", help="Use the default timeouts, don't learn new ones"
+    )
+    add_archive_arguments(extract)
+    add_session_arguments(extract)
+    add_page_arguments(extract)
+    extract.set_defaults(func=cmd_extract)
+
+    select = subparsers.add_parser("select", help="Apply include/exclude rules to a channel list")
+    select.add_argument("-i", "--input", required=True, help="Channel list file")
+    select.add_argument("-o", "--output", default="-", help="Selected channel list ('-' for stdout)")
+    select.add_argument("--include", action="append", help="Rule file of channels to keep (repeatable)")
+    select.add_argument("--exclude", action="append", help="Rule file of channels to drop (repeatable)")
+    select.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    select.add_argument("--format", choices=FORMATS, help="Output format (default: from extension)")
+    select.set_defaults(func=cmd_select)
+
+    for action, help_text in (
+        ("subscribe", "Subscribe the NEW account to active channels"),
+        ("unsubscribe", "Unsubscribe the NEW account from active channels"),
+    ):
+        subscribe = subparsers.add_parser(action, help=help_text)
+        subscribe.add_argument("-i", "--input", required=True, help="Channel list file")
+        subscribe.add_argument("-r", "--results", default="-", help="JSON results file ('-' for stdout)")
+        subscribe.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+        add_run_arguments(subscribe)
+        subscribe.add_argument(
+            "--shard", type=parse_shard, metavar="I/K", help="Only handle shard I of K of the input"
+        )
+        subscribe.add_argument(
+            "--dry-run", action="store_true", help="Only project the run's duration, without Chrome"
+        )
+        subscribe.add_argument("--runs", type=int, default=3, help="Simulated runs for --dry-run")
+        add_model_arguments(subscribe)
+        subscribe.set_defaults(func=cmd_subscribe, action=action)
+
+    mirror = subparsers.add_parser("mirror", help="Make the NEW account's subscriptions match a list exactly")
+    mirror.add_argument("-i", "--input", required=True, help="Channel list the account should match")
+    mirror.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    mirror.add_argument("--current", help="The account's current subscriptions (default: extract them)")
+    mirror.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    add_run_arguments(mirror)
+    mirror.add_argument("-r", "--results", default="-", help="JSON results file ('-' for stdout)")
+    mirror.set_defaults(func=cmd_mirror)
+
+    fanout = subparsers.add_parser("fanout", help="Subscribe several NEW accounts to one channel list in parallel")
+    fanout.add_argument("-i", "--input", required=True, help="Channel list file")
+    fanout.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    fanout.add_argument("-t", "--target", action="append", help="Target account as NAME=PROFILE_DIR[,DELAY] (repeatable)")
+    fanout.add_argument("--targets-file", help="JSON list of {name, profile, delay} targets")
+    fanout.add_argument("--action", choices=("subscribe", "unsubscribe"), default="subscribe")
+    fanout.add_argument("--delay", type=float, default=0.5, help="Default seconds between channels per account")
+    fanout.add_argument("--max-parallel", type=int, help="Accounts processed at once (default: all)")
+    fanout.add_argument("--progress-interval", type=int, default=30, help="Seconds between progress lines")
+    fanout.add_argument("-r", "--results", default="-", help="JSON results file ('-' for stdout)")
+    fanout.set_defaults(func=cmd_fanout)
+
+    queue = subparsers.add_parser("queue", help="Manage the persistent transfer job queue")
+    queue.add_argument("--db", default=DEFAULT_DB, help="Queue database path")
+    queue_commands = queue.add_subparsers(dest="queue_command", required=True)
+    submit = queue_commands.add_parser("submit", help="Queue a channel list for a target profile")
+    submit.add_argument("source", help="Channel list file (JSONL, CSV, OPML or saved HTML page)")
+    submit.add_argument("--profile", help="Chrome profile directory of the target account")
+    submit.add_argument("--delay", type=float, help="Seconds between channels")
+    submit.add_argument("--action", choices=("subscribe", "unsubscribe"), default="subscribe")
+    submit.add_argument("--input-format", choices=FORMATS + ("html",), help="Source format")
+    submit.set_defaults(func=cmd_queue_submit)
+    listing = queue_commands.add_parser("list", help="List jobs")
+    listing.add_argument("--state", action="append", help="Only show jobs in this state (repeatable)")
+    listing.add_argument("--json", action="store_true", help="Print jobs as JSON")
+    listing.set_defaults(func=cmd_queue_list)
+    cancel = queue_commands.add_parser("cancel", help="Cancel a queued or running job")
+    cancel.add_argument("job_id", type=int)
+    cancel.set_defaults(func=cmd_queue_cancel)
+    serve = queue_commands.add_parser("serve", help="Run the transfer daemon")
+    serve.add_argument("--workers", type=int, default=1, help="Jobs executed at once")
+    serve.set_defaults(func=cmd_queue_serve)
+
+    sync = subparsers.add_parser("sync", help="Apply only what changed since the last transfer")
+    sync.add_argument("--name", required=True, help="Name of the target account's snapshot series")
+    sync.add_argument("-i", "--input", required=True, help="Fresh source channel list")
+    sync.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    sync.add_argument("--against", type=int, help="Snapshot version to diff against (default: latest)")
+    sync.add_argument("--mirror-removals", action="store_true", help="Unsubscribe channels dropped from the source")
+    sync.add_argument("--dry-run", action="store_true", help="Only print the delta")
+    sync.add_argument("--profile", help="Chrome profile directory of the account")
+    sync.add_argument("--engine", choices=ENGINES, default="selenium", help="Browser engine or the Data API")
+    add_api_arguments(sync)
+    add_session_arguments(sync)
+    sync.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="Snapshot directory")
+    sync.add_argument("-r", "--results", default="-", help="JSON results file ('-' for stdout)")
+    sync.set_defaults(func=cmd_sync)
+
+    pages = subparsers.add_parser("pages", help="Manage the archive of saved channels pages")
+    pages.add_argument("--page-dir", default=DEFAULT_PAGE_DIR, help="Archive of saved channels pages")
+    pages.add_argument("--account", help="Only this account")
+    pages_commands = pages.add_subparsers(dest="pages_command", required=True)
+    pages_list = pages_commands.add_parser("list", help="List archived pages, oldest first")
+    pages_list.set_defaults(func=cmd_pages_list, keep=DEFAULT_KEEP)
+    pages_import = pages_commands.add_parser("import", help="Archive a page saved from the browser")
+    pages_import.add_argument("file")
+    pages_import.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Pages kept per account (0: all)")
+    pages_import.set_defaults(func=cmd_pages_import)
+    pages_prune = pages_commands.add_parser("prune", help="Drop old pages (the newest of each account stays)")
+    pages_prune.add_argument("--keep", type=int, help="Pages kept per account")
+    pages_prune.add_argument("--max-age-days", type=float, help="Drop pages older than this")
+    pages_prune.set_defaults(func=cmd_pages_prune)
+
+    snapshot = subparsers.add_parser("snapshot", help="Inspect sync snapshots")
+    snapshot.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="Snapshot directory")
+    snapshot_commands = snapshot.add_subparsers(dest="snapshot_command", required=True)
+    snapshot_list = snapshot_commands.add_parser("list", help="List versions of a snapshot series")
+    snapshot_list.add_argument("name")
+    snapshot_list.set_defaults(func=cmd_snapshot_list)
+    snapshot_save = snapshot_commands.add_parser("save", help="Record a channel list as the next version")
+    snapshot_save.add_argument("name")
+    snapshot_save.add_argument("-i", "--input", required=True, help="Channel list file")
+    snapshot_save.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    snapshot_save.set_defaults(func=cmd_snapshot_save)
+    snapshot_diff = snapshot_commands.add_parser("diff", help="Diff two versions")
+    snapshot_diff.add_argument("name")
+    snapshot_diff.add_argument("old", type=int)
+    snapshot_diff.add_argument("new", type=int)
+    snapshot_diff.set_defaults(func=cmd_snapshot_diff)
+
+    audit = subparsers.add_parser("audit", help="Check the NEW account against the selected channels")
+    audit.add_argument("-i", "--input", required=True, help="Channel list the account should follow")
+    audit.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    audit.add_argument("--current", help="The account's current subscriptions (default: extract them)")
+    audit.add_argument("--profile", help="Chrome profile directory of the account")
+    audit.add_argument("--engine", choices=ENGINES, default="selenium", help="Browser engine or the Data API")
+    add_api_arguments(audit)
+    add_session_arguments(audit)
+    requeue = audit.add_mutually_exclusive_group()
+    requeue.add_argument("--requeue", action="store_true", help="Subscribe the missing channels right away")
+    requeue.add_argument("--submit", action="store_true", help="Add the missing channels to the job queue")
+    audit.add_argument("--db", default=DEFAULT_DB, help="Queue database path (with --submit)")
+    audit.add_argument("--audit-dir", default=DEFAULT_AUDIT_DIR, help="Where --submit keeps the missing list")
+    audit.add_argument("-r", "--results", default="-", help="JSON report file ('-' for stdout)")
+    audit.set_defaults(func=cmd_audit)
+
+    simulate = subparsers.add_parser("simulate", help="Project duration and failures of settings, without Chrome")
+    simulate.add_argument("-i", "--input", required=True, help="Channel list file")
+    simulate.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    simulate.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="Tab counts to try")
+    simulate.add_argument("--delay", type=float, nargs="+", default=[0.5], help="Seconds between channels to try")
+    simulate.add_argument("--runs", type=int, default=3, help="Simulated runs per setting")
+    simulate.add_argument("--json", action="store_true", help="Print the projection as JSON")
+    add_model_arguments(simulate)
+    simulate.set_defaults(func=cmd_simulate)
+
+    shard = subparsers.add_parser("shard", help="Split a transfer across machines and merge the results")
+    shard_commands = shard.add_subparsers(dest="shard_command", required=True)
+    split = shard_commands.add_parser("split", help="Write one channel list per shard")
+    split.add_argument("-i", "--input", required=True, help="Work manifest (channel list)")
+    split.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    split.add_argument("-k", "--count", type=int, required=True, help="Number of shards")
+    split.add_argument("-o", "--output-dir", default="shards", help="Directory for the shard lists")
+    split.set_defaults(func=cmd_shard_split)
+    merge = shard_commands.add_parser("merge", help="Combine shard result files into one report")
+    merge.add_argument("results_files", nargs="+", metavar="RESULTS", help="Result files of 'subscribe --shard'")
+    merge.add_argument("-r", "--results", default="-", help="Merged JSON report ('-' for stdout)")
+    merge.set_defaults(func=cmd_shard_merge)
+
+    session = subparsers.add_parser("session", help="Export or check a login for headless runs")
+    session_commands = session.add_subparsers(dest="session_command", required=True)
+    export = session_commands.add_parser("export", help="Log in once and save cookies and localStorage")
+    export.add_argument("-o", "--output", default=DEFAULT_SESSION_FILE, help="Session file")
+    export.add_argument("--profile", help="Chrome profile directory to log in with")
+    export.set_defaults(func=cmd_session_export)
+    check = session_commands.add_parser("check", help="Check headlessly that a session still logs in")
+    check.add_argument("session", nargs="?", default=DEFAULT_SESSION_FILE, help="Session file")
+    check.set_defaults(func=cmd_session_check)
+
+    convert = subparsers.add_parser("convert", help="Convert a channel list between JSONL, CSV and OPML")
+    convert.add_argument("-i", "--input", required=True, help="Channel list file ('-' for stdin)")
+    convert.add_argument("-o", "--output", default="-", help="Converted file ('-' for stdout)")
+    convert.add_argument("--input-format", choices=FORMATS, help="Input format (default: from extension)")
+    convert.add_argument("--format", choices=FORMATS, help="Output format (default: from extension)")
+    convert.set_defaults(func=cmd_convert)
+
+    timeouts = subparsers.add_parser("timeouts", help="Show the timeouts learned from earlier runs")
+    timeouts.add_argument("--file", default=DEFAULT_LATENCY_FILE, help="Latency history file")
+    timeouts.add_argument("--json", action="store_true", help="Print as JSON")
+    timeouts.add_argument("--reset", action="store_true", help="Forget the history")
+    timeouts.set_defaults(func=cmd_timeouts)
+
+    archive = subparsers.add_parser("archive", help="Inspect recorded page archives")
+    archive_commands = archive.add_subparsers(dest="archive_command", required=True)
+    archive_list = archive_commands.add_parser("list", help="List the recorded responses")
+    archive_list.add_argument("archive")
+    archive_list.add_argument("--grep", help="Only responses whose URL contains this text")
+    archive_list.set_defaults(func=cmd_archive_list)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics.configure_from_env()
+    try:
+        return args.func(args)
+    except SessionExpired as e:
+        print(f"Session expired: {e}", file=sys.stderr)
+        return EXIT_SESSION_EXPIRED
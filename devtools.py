@@ -0,0 +1,233 @@
+"""Minimal DevTools protocol client on asyncio, using only the standard library."""
+
+import asyncio
+import base64
+import itertools
+import json
+import os
+import struct
+import threading
+import urllib.request
+from urllib.parse import urlsplit
+
+
+class CDPError(Exception):
+    """A DevTools command failed or the browser went away."""
+
+
+class WebSocket:
+    """Just enough of RFC 6455 for a client talking to Chrome on localhost."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, url):
+        parts = urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f"GET {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.hostname}:{parts.port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        writer.write(request.encode())
+        await writer.drain()
+        response = await reader.readuntil(b"\r\n\r\n")
+        status = response.split(b"\r\n", 1)[0]
+        if b" 101 " not in status + b" ":
+            writer.close()
+            raise CDPError(f"Websocket handshake failed: {status.decode(errors='replace')}")
+        return cls(reader, writer)
+
+    def _frame(self, opcode, payload):
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", length)
+        # Client frames must be masked
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return bytes(header) + mask + masked
+
+    async def send(self, text):
+        self.writer.write(self._frame(0x1, text.encode("utf-8")))
+        await self.writer.drain()
+
+    async def recv(self):
+        """Return the next text message; raises CDPError when the socket closes."""
+        message = bytearray()
+        while True:
+            try:
+                head = await self.reader.readexactly(2)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                raise CDPError("Browser connection closed") from e
+            fin, opcode = head[0] & 0x80, head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(length)
+            if opcode == 0x8:
+                raise CDPError("Browser closed the connection")
+            if opcode == 0x9:
+                self.writer.write(self._frame(0xA, payload))
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if fin:
+                return message.decode("utf-8")
+
+    async def close(self):
+        try:
+            self.writer.write(self._frame(0x8, b""))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+class CDPConnection:
+    """One websocket to the browser, multiplexing commands for all tabs.
+
+    Replies are matched to commands by id; events can be awaited with
+    ``wait_for_event`` (register before sending the command that causes
+    them).
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._waiters = []
+        self._listeners = {}
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect(cls, url):
+        return cls(await WebSocket.connect(url))
+
+    async def _read_loop(self):
+        try:
+            while True:
+                message = json.loads(await self.websocket.recv())
+                if "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future and not future.done():
+                        if "error" in message:
+                            future.set_exception(CDPError(message["error"].get("message")))
+                        else:
+                            future.set_result(message.get("result", {}))
+                    continue
+                for callback in self._listeners.get(message.get("method"), ()):
+                    asyncio.ensure_future(
+                        callback(message.get("params", {}), message.get("sessionId"))
+                    )
+                for waiter in list(self._waiters):
+                    method, session_id, future = waiter
+                    if message.get("method") == method and message.get("sessionId") == session_id:
+                        self._waiters.remove(waiter)
+                        if not future.done():
+                            future.set_result(message.get("params", {}))
+        except CDPError as e:
+            for future in list(self._pending.values()) + [w[2] for w in self._waiters]:
+                if not future.done():
+                    future.set_exception(e)
+            self._pending.clear()
+            self._waiters.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        command_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        await self.websocket.send(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(command_id, None)
+
+    def on(self, method, callback):
+        """Run coroutine ``callback(params, session_id)`` for every ``method`` event."""
+        self._listeners.setdefault(method, []).append(callback)
+
+    def wait_for_event(self, method, session_id=None):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((method, session_id, future))
+        return future
+
+    async def close(self):
+        self._reader.cancel()
+        await self.websocket.close()
+
+
+class DriverSession:
+    """A second DevTools connection to a Chrome that chromedriver controls.
+
+    chromedriver reports the browser's debugging address in the session
+    capabilities. This connects to it from a background event loop and
+    passes every tab, the existing ones and those opened later, to the
+    ``enable(connection, session_id, target_id)`` coroutine of each
+    handler. Window handles in Selenium are these target IDs.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.connections = []
+
+    def run(self, coroutine, timeout=30):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def attach(self, driver, *handlers):
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=10) as response:
+            ws_url = json.load(response)["webSocketDebuggerUrl"]
+        self.run(self._attach(ws_url, handlers))
+
+    async def _attach(self, ws_url, handlers):
+        connection = await CDPConnection.connect(ws_url)
+        self.connections.append(connection)
+        seen = set()
+
+        async def attach(target_info):
+            if target_info.get("type") != "page" or target_info["targetId"] in seen:
+                return
+            seen.add(target_info["targetId"])
+            attached = await connection.send(
+                "Target.attachToTarget", {"targetId": target_info["targetId"], "flatten": True}
+            )
+            for handler in handlers:
+                await handler.enable(connection, attached["sessionId"], target_info["targetId"])
+
+        # Discovery reports the tabs that already exist as well as new ones
+        connection.on("Target.targetCreated", lambda p, s: attach(p["targetInfo"]))
+        await connection.send("Target.setDiscoverTargets", {"discover": True})
+        targets = await connection.send("Target.getTargets")
+        for target_info in targets["targetInfos"]:
+            await attach(target_info)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                self.run(connection.close(), timeout=10)
+            except Exception:
+                pass
+        self.connections = []
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=10)
@@ -0,0 +1,144 @@
+import os
+import statistics
+from collections import deque
+
+
+def _child_pids(pid):
+    """Return the direct children of ``pid`` from /proc (Linux only)."""
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tasks = os.listdir(task_dir)
+    except OSError:
+        return children
+    for task in tasks:
+        try:
+            with open(f"{task_dir}/{task}/children", "r") as f:
+                children.extend(int(p) for p in f.read().split())
+        except OSError:
+            continue
+    return children
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def process_tree_rss(pid):
+    """Sum the resident memory of ``pid`` and all its descendants.
+
+    Returns None where /proc is not available.
+    """
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    total = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += _rss_bytes(current)
+        stack.extend(_child_pids(current))
+    return total
+
+
+class DriverWatchdog:
+    """Decide when a long-running Chrome session should be recycled.
+
+    After every channel the subscriber reports how long the navigation
+    took. Every ``sample_every`` channels the watchdog also reads the JS
+    heap of the page through CDP ``Performance.getMetrics`` and the
+    resident memory of chromedriver and all Chrome processes. A recycle is
+    due when the browser exceeds ``max_rss_mb``, the page heap exceeds
+    ``max_heap_mb``, the median of the last ``window`` navigations is
+    ``slowdown`` times the median of the first ``window`` ones, or the
+    session has made ``max_navigations`` navigations. Limits set to None
+    are not checked.
+    """
+
+    def __init__(
+        self,
+        max_rss_mb=None,
+        max_heap_mb=None,
+        max_navigations=None,
+        slowdown=None,
+        window=20,
+        sample_every=10,
+    ):
+        self.max_rss_mb = max_rss_mb
+        self.max_heap_mb = max_heap_mb
+        self.max_navigations = max_navigations
+        self.slowdown = slowdown
+        self.window = window
+        self.sample_every = sample_every
+        self.recycles = 0
+        self.last_sample = {}
+        self.reset()
+
+    def reset(self):
+        """Start over for a freshly launched driver."""
+        self.navigations = 0
+        self.baseline = []
+        self.recent = deque(maxlen=self.window)
+        self._performance_enabled = False
+
+    def sample(self, driver):
+        """Return ``{"rss_mb", "heap_mb"}`` for the driver; missing values are None."""
+        heap_mb = None
+        try:
+            if not self._performance_enabled:
+                driver.execute_cdp_cmd("Performance.enable", {})
+                self._performance_enabled = True
+            result = driver.execute_cdp_cmd("Performance.getMetrics", {})
+            values = {m["name"]: m["value"] for m in result.get("metrics", [])}
+            if "JSHeapUsedSize" in values:
+                heap_mb = values["JSHeapUsedSize"] / 2**20
+        except Exception:
+            pass
+
+        rss_mb = None
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None:
+            rss = process_tree_rss(process.pid)
+            if rss is not None:
+                rss_mb = rss / 2**20
+        self.last_sample = {"rss_mb": rss_mb, "heap_mb": heap_mb}
+        return self.last_sample
+
+    def observe(self, driver, navigation_seconds):
+        """Record one navigation and return the reason to recycle, or None."""
+        self.navigations += 1
+        if len(self.baseline) < self.window:
+            self.baseline.append(navigation_seconds)
+        else:
+            self.recent.append(navigation_seconds)
+
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return f"{self.navigations} navigations"
+
+        if (
+            self.slowdown
+            and len(self.recent) == self.window
+            and statistics.median(self.recent) > self.slowdown * statistics.median(self.baseline)
+        ):
+            return (
+                f"navigation slowed to {statistics.median(self.recent):.2f}s "
+                f"from {statistics.median(self.baseline):.2f}s"
+            )
+
+        if (self.max_rss_mb or self.max_heap_mb) and self.navigations % self.sample_every == 0:
+            sample = self.sample(driver)
+            if self.max_rss_mb and sample["rss_mb"] and sample["rss_mb"] > self.max_rss_mb:
+                return f"browser memory {sample['rss_mb']:.0f} MB"
+            if self.max_heap_mb and sample["heap_mb"] and sample["heap_mb"] > self.max_heap_mb:
+                return f"page heap {sample['heap_mb']:.0f} MB"
+        return None
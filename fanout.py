@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import threading
+import time
+
+from journal import DONE_STATUSES
+
+
+class Target:
+    """One destination account: a name, its Chrome profile and its pacing."""
+
+    def __init__(self, name, profile_dir, delay=None):
+        self.name = name
+        self.profile_dir = profile_dir
+        self.delay = delay
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse ``NAME=PROFILE_DIR[,DELAY]`` as given on the command line."""
+        name, _, rest = spec.partition("=")
+        if not name or not rest:
+            raise ValueError(f"Invalid target '{spec}', expected NAME=PROFILE_DIR[,DELAY]")
+        profile_dir, _, delay = rest.partition(",")
+        return cls(name, profile_dir, float(delay) if delay else None)
+
+    @classmethod
+    def load_file(cls, path):
+        """Load targets from a JSON list of {name, profile, delay} objects."""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        return [cls(e["name"], e["profile"], e.get("delay")) for e in entries]
+
+
+class PrefixedOutput:
+    """stdout proxy that prefixes each line with the current thread's account."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        prefix = getattr(self.local, "prefix", "")
+        if not prefix:
+            return self.stream.write(text)
+        buffer = getattr(self.local, "buffer", "") + text
+        *lines, self.local.buffer = buffer.split("\n")
+        with self.lock:
+            for line in lines:
+                self.stream.write(f"[{prefix}] {line}\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def end(self):
+        """Write out the current thread's unfinished line and stop prefixing."""
+        buffer = getattr(self.local, "buffer", "")
+        if buffer:
+            with self.lock:
+                self.stream.write(f"[{self.local.prefix}] {buffer}\n")
+        self.local.buffer = ""
+        self.local.prefix = ""
+
+
+class FanOutTransfer:
+    """Apply one channel list to several target accounts in parallel.
+
+    Every target gets its own ChannelSubscriber, Chrome profile and
+    pacing; results are collected per account.
+    """
+
+    def __init__(
+        self, channels, targets, max_parallel=None, subscriber_factory=None, action="subscribe"
+    ):
+        self.channels = channels
+        self.targets = targets
+        self.action = action
+        self.max_parallel = max_parallel or len(targets)
+        self.subscriber_factory = subscriber_factory or _default_subscriber
+        self.subscribers = {}
+        self.results = {}
+
+    def run_target(self, target):
+        sys.stdout.local.prefix = target.name
+        start = time.monotonic()
+        result = {"account": target.name, "profile": target.profile_dir}
+        subscriber = None
+        try:
+            # A target whose browser can't start fails alone
+            subscriber = self.subscriber_factory(target)
+            self.subscribers[target.name] = subscriber
+            counts = subscriber.process_channels(self.channels, self.action)
+            result.update(subscriber.summary(self.action, *counts))
+            if counts[0] < self.channels.active_count:
+                # e.g. the login failed and process_channels returned early
+                result["error"] = f"only {counts[0]} of {self.channels.active_count} channels processed"
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            sys.stdout.end()
+        channels = subscriber.results if subscriber else []
+        result["failed"] = sum(1 for r in channels if r["status"] not in DONE_STATUSES)
+        result["duration"] = round(time.monotonic() - start, 2)
+        result["channels"] = channels
+        self.results[target.name] = result
+        return result
+
+    def progress(self):
+        """Return ``{account: channels processed so far}``."""
+        return {name: len(s.results) for name, s in self.subscribers.items()}
+
+    def print_progress(self):
+        total = self.channels.active_count
+        parts = [f"{name} {done}/{total}" for name, done in sorted(self.progress().items())]
+        if parts:
+            print("Progress: " + ", ".join(parts))
+
+    def run(self, progress_interval=30):
+        """Run all targets and return the per-account results."""
+        original_stdout = sys.stdout
+        sys.stdout = PrefixedOutput(original_stdout)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+                futures = [pool.submit(self.run_target, t) for t in self.targets]
+                next_report = time.monotonic() + progress_interval
+                while not all(f.done() for f in futures):
+                    time.sleep(0.5)
+                    if time.monotonic() >= next_report:
+                        self.print_progress()
+                        next_report += progress_interval
+                for future in futures:
+                    future.result()
+        finally:
+            sys.stdout = original_stdout
+        return [self.results[t.name] for t in self.targets if t.name in self.results]
+
+
+def _default_subscriber(target):
+    from channel_subscriber import ChannelSubscriber
+
+    os.makedirs(target.profile_dir, exist_ok=True)
+    return ChannelSubscriber(
+        interactive=False, profile_dir=target.profile_dir, delay=target.delay
+    )
@@ -0,0 +1,164 @@
+import os
+import time
+
+from driver_watchdog import process_tree_rss
+
+
+def available_memory_mb():
+    """Memory the system can still hand out, or None where it can't be read."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class CpuMeter:
+    """Share of CPU time the whole system was busy since the last reading.
+
+    Reads /proc/stat; elsewhere falls back to the one-minute load average
+    per CPU, or None.
+    """
+
+    def __init__(self):
+        self._last = self._times()
+
+    @staticmethod
+    def _times():
+        try:
+            with open("/proc/stat", "r") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # idle and iowait
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return sum(fields), idle
+
+    def busy(self):
+        current = self._times()
+        if current is None or self._last is None:
+            try:
+                return os.getloadavg()[0] / (os.cpu_count() or 1)
+            except (AttributeError, OSError):
+                return None
+        total = current[0] - self._last[0]
+        idle = current[1] - self._last[1]
+        self._last = current
+        return 1 - idle / total if total > 0 else None
+
+
+class ConcurrencyGovernor:
+    """Grow or shrink the number of workers from the resources they leave free.
+
+    Every ``interval`` seconds the caller reports how many workers run and
+    how many channels wait. The governor then reads the memory the
+    system has available, CPU load and the resident memory of the
+    browser (shared out per worker).
+
+    - It removes a worker when free memory drops below ``min_free_mb``,
+      CPU load goes over ``max_cpu``, or a worker's share of the browser
+      exceeds ``max_worker_rss_mb``.
+    - It adds one when there is more waiting work than workers, load is
+      well below ``max_cpu`` and free memory has room for two more
+      workers' shares. The second share is a margin, because per-worker
+      estimates undercount what a new tab really costs.
+
+    Changes wait ``cooldown`` seconds for the last one to show in the
+    readings. The exception is free memory falling under half the floor,
+    which halves the workers at once. The count stays between
+    ``minimum`` and ``maximum``. Limits set to None are not checked, and
+    neither are readings the platform can't provide.
+    """
+
+    def __init__(
+        self,
+        minimum=1,
+        maximum=4,
+        min_free_mb=1024,
+        max_cpu=0.85,
+        max_worker_rss_mb=None,
+        cooldown=20.0,
+        interval=5.0,
+        worker_guess_mb=300,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.min_free_mb = min_free_mb
+        self.max_cpu = max_cpu
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self.cooldown = cooldown
+        self.interval = interval
+        # What a worker is assumed to cost before the browser can be measured
+        self.worker_guess_mb = worker_guess_mb
+        self.cpu = CpuMeter()
+        self.decisions = []
+        self._last_change = None
+
+    def initial(self, requested):
+        return min(max(requested, self.minimum), self.maximum)
+
+    def sample(self, pid, workers):
+        """Return ``{"free_mb", "cpu", "browser_mb", "worker_mb"}``; missing values are None."""
+        rss = process_tree_rss(pid) if pid else None
+        browser_mb = rss / 2**20 if rss is not None else None
+        return {
+            "free_mb": available_memory_mb(),
+            "cpu": self.cpu.busy(),
+            "browser_mb": browser_mb,
+            "worker_mb": browser_mb / workers if browser_mb is not None and workers else None,
+        }
+
+    def decide(self, workers, waiting, sample, now=None):
+        """Return ``(target, reason)``; reason is None when nothing changes."""
+        now = time.monotonic() if now is None else now
+        free = sample.get("free_mb")
+        cpu = sample.get("cpu")
+        worker_mb = sample.get("worker_mb")
+        if workers > self.maximum:
+            return self.maximum, f"above the maximum of {self.maximum}"
+        if workers < self.minimum:
+            return self.minimum, f"below the minimum of {self.minimum}"
+        if self.min_free_mb and free is not None and free < self.min_free_mb / 2 and workers > self.minimum:
+            return max(self.minimum, workers // 2), f"free memory {free:.0f} MB"
+        if self._last_change is not None and now - self._last_change < self.cooldown:
+            return workers, None
+
+        pressure = None
+        if self.min_free_mb and free is not None and free < self.min_free_mb:
+            pressure = f"free memory {free:.0f} MB"
+        elif self.max_cpu and cpu is not None and cpu > self.max_cpu:
+            pressure = f"CPU {cpu:.0%} busy"
+        elif self.max_worker_rss_mb and worker_mb is not None and worker_mb > self.max_worker_rss_mb:
+            pressure = f"browser {worker_mb:.0f} MB per worker"
+        if pressure:
+            if workers > self.minimum:
+                return workers - 1, pressure
+            return workers, None
+
+        if workers >= self.maximum or waiting <= workers:
+            return workers, None
+        cost = worker_mb or self.worker_guess_mb
+        if self.min_free_mb and free is not None and free - 2 * cost < self.min_free_mb:
+            return workers, None
+        if self.max_cpu and cpu is not None and cpu > self.max_cpu * 0.75:
+            return workers, None
+        if self.max_worker_rss_mb and worker_mb is not None and worker_mb > self.max_worker_rss_mb * 0.75:
+            return workers, None
+        return workers + 1, "headroom"
+
+    def observe(self, workers, waiting, pid=None, now=None):
+        """Sample, decide and record a change; returns the target worker count."""
+        sample = self.sample(pid, workers)
+        target, reason = self.decide(workers, waiting, sample, now)
+        if target != workers:
+            self._last_change = time.monotonic() if now is None else now
+            decision = {"from": workers, "to": target, "reason": reason, "waiting": waiting}
+            decision.update({k: round(v, 2) for k, v in sample.items() if v is not None})
+            self.decisions.append(decision)
+        return target
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+from channel_store import channel_key
+
+
+DONE_STATUSES = ("subscribed", "already_subscribed", "unsubscribed", "not_subscribed")
+
+
+class RunJournal:
+    """Append-only JSON-lines log of per-channel outcomes and run events.
+
+    Every entry is flushed as soon as it is written, so an interrupted
+    run can be resumed by skipping the channels the journal already
+    records as done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, event, **fields):
+        entry = {"ts": round(time.time(), 3), "event": event}
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return entry
+
+    def entries(self, event=None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a truncated last line
+                    continue
+                if event is None or entry.get("event") == event:
+                    yield entry
+
+    def channel_results(self):
+        """Return the latest channel outcome per canonical key."""
+        latest = {}
+        for entry in self.entries("channel"):
+            latest[channel_key(entry["url"])] = entry
+        return latest
+
+    def completed_keys(self):
+        return {
+            key
+            for key, entry in self.channel_results().items()
+            if entry["status"] in DONE_STATUSES
+        }
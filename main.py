@@ -1,10 +1,16 @@
-from channel_extractor import ChannelExtractor
-from channel_subscriber import ChannelSubscriber
-import os
+# Selenium, webdriver-manager and BeautifulSoup take most of the startup
+# time, so they are imported only when the phase that needs them starts
+from selection_ui import SelectionUI
+from page_store import DEFAULT_ACCOUNT, PageStore
+import metrics
+import profiling
+import sys
 import time
 
 
 def main():
+    metrics.configure_from_env()
+
     print("\n" + "-" * 58)
     print("Welcome to YouTubeTransfer!")
     print("-" * 58)
@@ -20,17 +26,17 @@ def main():
     print("  - The tool automatically subscribes to the channels")
     print("-" * 58)
 
-    # Check for existing YouTube.html file
-    downloads_dir = os.path.expanduser("~/Downloads")
-    existing_file = os.path.join(downloads_dir, "YouTube.html")
+    # Check for a channels page saved by an earlier run
+    pages = PageStore()
+    existing_page = pages.latest(DEFAULT_ACCOUNT)
 
-    if os.path.exists(existing_file):
-        print(f"\nFound existing channels file: {existing_file}")
-        print("Last modified: ", time.ctime(os.path.getmtime(existing_file)))
+    if existing_page:
+        print(f"\nFound saved channels page of {existing_page['account']}")
+        print("Saved: ", time.ctime(existing_page["saved"]), f"({existing_page['channels']} channels)")
 
         while True:
             choice = (
-                input("\nUse existing file? (Y)es, (N)ew, or (Q)uit: ").strip().upper()
+                input("\nUse saved page? (Y)es, (N)ew, or (Q)uit: ").strip().upper()
             )
 
             if choice == "Q":
@@ -41,9 +47,8 @@ def main():
             print("Invalid choice. Please try again.")
 
         if choice == "Y":
-            print("\nUsing existing channels file...")
-            extractor = ChannelExtractor()
-            channels = extractor.extract_channels(existing_file)
+            print("\nUsing saved channels page...")
+            channels = pages.read_channels(existing_page)
             if not channels:
                 print("No channels found in file. Please generate a new one.")
                 return
@@ -71,7 +76,9 @@ def main():
 
     if choice == "N":
         try:
-            extractor = ChannelExtractor()
+            from channel_extractor import ChannelExtractor
+
+            extractor = ChannelExtractor(account=DEFAULT_ACCOUNT)
             channels = extractor.get_channel_list()
 
             if not channels:
@@ -96,31 +103,11 @@ def main():
         print("to subscribe to the selected channels.")
         print("-" * 58)
         # Menu loop
-        while True:
-            display_channels(channels)
-            print("-" * 58)
-            print("\nOptions:")
-            print("A) Toggle all to Activate")
-            print("D) Toggle all to Deactivate")
-            print("Enter an index to toggle a specific channel")
-            print("C) Continue")
-
-            choice = input("\nEnter your choice: ").strip().upper()
-
-            if choice == "A":
-                toggle_all_channels(channels, True)
-            elif choice == "D":
-                toggle_all_channels(channels, False)
-            elif choice == "C":
-                break
-            else:
-                try:
-                    index = int(choice)
-                    toggle_channel(channels, index)
-                except ValueError:
-                    print("Invalid input. Please try again.")
+        SelectionUI(channels).run()
 
         # After breaking from the menu loop, proceed with subscriptions
+        from channel_subscriber import ChannelSubscriber
+
         subscriber = ChannelSubscriber()
         total, already, new = subscriber.subscribe_to_channels(channels)
         print(f"\nSubscription Summary:")
@@ -128,39 +115,37 @@ def main():
         print(f"Already subscribed: {already}")
         print(f"New subscriptions: {new}")
 
-
-def display_channels(channels):
-    """Display the list of channels in a formatted manner."""
-    max_name_length = max(len(channel[0]) for channel in channels)
-    max_index_length = len(str(len(channels)))
-
-    for i, (name, url, active) in enumerate(channels, 1):
-        status = "Y" if active else "N"
-        padded_index = str(i).rjust(max_index_length)
-        padded_name = name.ljust(max_name_length)
-        print(f"{padded_index}. [{status}] {padded_name} {url}")
-
-
-def toggle_channel(channels, index):
-    """Toggle the active status of a channel."""
-    if 1 <= index <= len(channels):
-        name, url, active = channels[index - 1]
-        channels[index - 1] = (name, url, not active)
-        print("-" * 58)
-        print(f"Toggled channel: {name}")
-        print("-" * 58)
-    else:
-        print("Invalid index")
-
-
-def toggle_all_channels(channels, state):
-    """Toggle the active status of all channels."""
-    for i in range(len(channels)):
-        channels[i] = (channels[i][0], channels[i][1], state)
-    print("-" * 58)
-    print(f"{'Activated' if state else 'Deactivated'} all channels")
-    print("-" * 58)
+        choice = input("\nCheck the NEW account for missing channels? (Y/N): ").strip().upper()
+        if choice == "Y":
+            audit_account(channels)
+
+
+def audit_account(channels):
+    from audit import AUDIT_ACCOUNT, SubscriptionAudit, missing_channels, print_audit
+    from channel_extractor import ChannelExtractor
+    from channel_subscriber import ChannelSubscriber
+
+    print("\nThe channels page of your NEW account will be read once more.")
+    report = SubscriptionAudit(channels, lambda: ChannelExtractor(account=AUDIT_ACCOUNT)).run()
+    if report is None:
+        print("Could not read the subscriptions of the NEW account.")
+        return
+    print_audit(report)
+    missing = missing_channels(report)
+    if not missing:
+        print("\nAll selected channels are subscribed.")
+        return
+    choice = input(f"\nSubscribe to the {len(missing)} missing channels now? (Y/N): ").strip().upper()
+    if choice == "Y":
+        total, already, new = ChannelSubscriber().subscribe_to_channels(missing)
+        print(f"\nRetried {total} channels, {new} newly subscribed, {already} already subscribed")
 
 
 if __name__ == "__main__":
+    # Profiling options work with every subcommand and the interactive mode
+    argv = profiling.configure_from_argv(sys.argv[1:])
+    if argv:
+        import cli
+
+        sys.exit(cli.main(argv))
     main()
@@ -0,0 +1,236 @@
+import bisect
+import os
+import threading
+
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+
+class Histogram:
+    """Cumulative bucketed distribution of observed values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def samples(self):
+        with self._lock:
+            counts = list(self.counts)
+            total_sum = self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            samples.append((f'{self.name}_bucket{{le="{_format_value(bound)}"}}', cumulative))
+        cumulative += counts[-1]
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', cumulative))
+        samples.append((f"{self.name}_sum", total_sum))
+        samples.append((f"{self.name}_count", cumulative))
+        return samples
+
+
+def _format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.textfile_path = None
+
+    def _register(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, value in metric.samples():
+                lines.append(f"{sample_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=None):
+        """Atomically write metrics for the node_exporter textfile collector."""
+        path = path or self.textfile_path
+        if not path:
+            return None
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+        return path
+
+    def start_http_server(self, port, addr="127.0.0.1"):
+        """Serve /metrics from a background thread and return the server."""
+        # Only needed when the exporter is enabled; keeps startup light otherwise
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        print(f"Serving metrics on http://{addr}:{server.server_port}/metrics")
+        return server
+
+
+class TransferMetrics:
+    """The metrics recorded by ChannelExtractor and ChannelSubscriber."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.subscribed = registry.counter(
+            "ytt_channels_subscribed_total", "Channels newly subscribed to."
+        )
+        self.already_subscribed = registry.counter(
+            "ytt_channels_already_subscribed_total",
+            "Channels that were already subscribed.",
+        )
+        self.unsubscribed = registry.counter(
+            "ytt_channels_unsubscribed_total", "Channels unsubscribed from."
+        )
+        self.not_subscribed = registry.counter(
+            "ytt_channels_not_subscribed_total",
+            "Channels to unsubscribe from that were not subscribed.",
+        )
+        self.failed = registry.counter(
+            "ytt_channels_failed_total", "Channels that could not be processed."
+        )
+        self.extracted = registry.counter(
+            "ytt_channels_extracted_total", "Channels extracted from the old account."
+        )
+        self.page_load = registry.histogram(
+            "ytt_page_load_seconds", "Time spent in driver.get() per page."
+        )
+        self.button_wait = registry.histogram(
+            "ytt_button_wait_seconds", "Time spent waiting for the subscribe button."
+        )
+        self.in_flight = registry.gauge(
+            "ytt_channels_in_flight", "Channels currently being processed."
+        )
+        self.drivers = registry.gauge(
+            "ytt_drivers", "Chrome drivers currently running."
+        )
+        self.recycles = registry.counter(
+            "ytt_driver_recycles_total", "Drivers replaced by the watchdog."
+        )
+        self.recycle_time = registry.histogram(
+            "ytt_driver_recycle_seconds", "Time spent replacing a driver."
+        )
+
+    def flush(self):
+        """Write the textfile collector file if one is configured."""
+        try:
+            self.registry.write_textfile()
+        except OSError as e:
+            print(f"Error writing metrics file: {str(e)}")
+
+
+REGISTRY = MetricsRegistry()
+METRICS = TransferMetrics(REGISTRY)
+
+
+def configure_from_env():
+    """Enable exporters from YTT_METRICS_PORT and YTT_METRICS_TEXTFILE."""
+    port = os.environ.get("YTT_METRICS_PORT")
+    if port:
+        REGISTRY.start_http_server(int(port))
+    textfile = os.environ.get("YTT_METRICS_TEXTFILE")
+    if textfile:
+        REGISTRY.textfile_path = textfile
+    return REGISTRY
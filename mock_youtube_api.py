@@ -0,0 +1,247 @@
+"""Local imitation of the YouTube Data API endpoints the API backend uses.
+
+Implements subscriptions.list (paged, ``mine=true``), subscriptions.insert,
+subscriptions.delete and channels.list (``forHandle``) with bearer-token
+checks, Google-style error bodies, a daily quota and optional latency.
+Point the tools at it with YTT_API_URL, e.g.:
+
+    python mock_youtube_api.py --port 8001 --channels 500 --subscribed 100 --write-list list.jsonl
+    YTT_API_URL=http://127.0.0.1:8001/youtube/v3 YTT_API_TOKEN=test-token \\
+        python main.py subscribe --engine api -i list.jsonl
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+
+def mock_channel_id(handle):
+    digest = hashlib.sha256(handle.encode()).hexdigest()
+    return "UC" + "".join(c if c.isalnum() else "x" for c in digest[:22])
+
+
+class MockApiState:
+    """Channels, one account's subscriptions, quota use and the fault model."""
+
+    def __init__(
+        self,
+        channel_count=100,
+        subscribed=0,
+        latency=0.0,
+        error_rate=0.0,
+        daily_quota=10000,
+        token="test-token",
+        seed=0,
+    ):
+        self.handles = [f"mockchannel{i:05d}" for i in range(channel_count)]
+        self.ids = {mock_channel_id(h): h for h in self.handles}
+        self.by_handle = {"@" + h: mock_channel_id(h) for h in self.handles}
+        # subscription id -> channel id, in insertion order
+        self.subscriptions = {}
+        for handle in self.handles[:subscribed]:
+            self.subscriptions[f"sub-{handle}"] = mock_channel_id(handle)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.daily_quota = daily_quota
+        self.quota_used = 0
+        self.token = token
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def charge(self, units):
+        with self.lock:
+            if self.quota_used + units > self.daily_quota:
+                return False
+            self.quota_used += units
+            return True
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API. Headers and body go out in separate
+    # writes, so Nagle would stall every reused connection on delayed ACKs.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def _send(self, status, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, reason, message):
+        self._send(status, {"error": {
+            "code": status,
+            "message": message,
+            "errors": [{"reason": reason, "message": message}],
+        }})
+
+    def _begin(self, units):
+        """Common checks; returns the query parameters or None after an error reply."""
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        with self.state.lock:
+            self.state.requests += 1
+            fail = self.state.random.random() < self.state.error_rate
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.headers.get("Authorization") != f"Bearer {self.state.token}":
+            self._error(401, "authError", "Invalid Credentials")
+            return None
+        if fail:
+            self._error(503, "backendError", "Backend Error")
+            return None
+        if not self.state.charge(units):
+            self._error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+            return None
+        return {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+
+    def _route(self):
+        return urlsplit(self.path).path.rstrip("/").rsplit("/", 1)[-1]
+
+    def do_GET(self):
+        route = self._route()
+        if route == "subscriptions":
+            params = self._begin(1)
+            if params is not None:
+                self._send(200, self.list_page(params))
+        elif route == "channels":
+            params = self._begin(1)
+            if params is not None:
+                channel_id = self.state.by_handle.get(params.get("forHandle", "").lower())
+                self._send(200, {"items": [{"kind": "youtube#channel", "id": channel_id}] if channel_id else []})
+        else:
+            self._error(404, "notFound", "Not Found")
+
+    def do_POST(self):
+        if self._route() != "subscriptions":
+            self._error(404, "notFound", "Not Found")
+            return
+        params = self._begin(50)
+        if params is None:
+            return
+        try:
+            channel_id = json.loads(self.body)["snippet"]["resourceId"]["channelId"]
+        except (ValueError, KeyError, TypeError):
+            self._error(400, "invalidValue", "Invalid request body")
+            return
+        if channel_id not in self.state.ids:
+            self._error(404, "publisherNotFound", "The subscription's channel could not be found.")
+            return
+        with self.state.lock:
+            if channel_id in self.state.subscriptions.values():
+                duplicate = True
+            else:
+                duplicate = False
+                subscription_id = f"sub-{self.state.ids[channel_id]}"
+                self.state.subscriptions[subscription_id] = channel_id
+        if duplicate:
+            self._error(400, "subscriptionDuplicate", "The subscription that you are trying to create already exists.")
+            return
+        self._send(200, self.resource(subscription_id, channel_id))
+
+    def do_DELETE(self):
+        if self._route() != "subscriptions":
+            self._error(404, "notFound", "Not Found")
+            return
+        params = self._begin(50)
+        if params is None:
+            return
+        with self.state.lock:
+            removed = self.state.subscriptions.pop(params.get("id"), None)
+        if removed is None:
+            self._error(404, "subscriptionNotFound", "The subscription could not be found.")
+            return
+        self._send(204)
+
+    def resource(self, subscription_id, channel_id):
+        return {
+            "kind": "youtube#subscription",
+            "id": subscription_id,
+            "snippet": {
+                "title": self.state.ids[channel_id],
+                "resourceId": {"kind": "youtube#channel", "channelId": channel_id},
+            },
+        }
+
+    def list_page(self, params):
+        page_size = min(int(params.get("maxResults", 5)), 50)
+        offset = int(params.get("pageToken") or 0)
+        with self.state.lock:
+            entries = list(self.state.subscriptions.items())
+        page = entries[offset:offset + page_size]
+        result = {
+            "kind": "youtube#subscriptionListResponse",
+            "pageInfo": {"totalResults": len(entries), "resultsPerPage": page_size},
+            "items": [self.resource(s, c) for s, c in page],
+        }
+        if offset + page_size < len(entries):
+            result["nextPageToken"] = str(offset + page_size)
+        return result
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(state, port=0, addr="127.0.0.1"):
+    """Start the mock API on a background thread and return the server."""
+    handler = type("BoundMockApiHandler", (MockApiHandler,), {"state": state})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    server.base_url = f"http://{addr}:{server.server_port}/youtube/v3"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def channel_records(state):
+    """Return ``(name, url, active)`` records, half by handle and half by ID."""
+    return [
+        (h, f"https://www.youtube.com/@{h}" if i % 2 else f"https://www.youtube.com/channel/{mock_channel_id(h)}", True)
+        for i, h in enumerate(state.handles)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local imitation of the YouTube Data API.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--channels", type=int, default=100, help="Number of channels")
+    parser.add_argument("--subscribed", type=int, default=0, help="Channels already subscribed")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--quota", type=int, default=10000, help="Daily quota in units")
+    parser.add_argument("--token", default="test-token", help="Accepted bearer token")
+    parser.add_argument("--write-list", help="Also write the channel list to this file")
+    args = parser.parse_args()
+
+    state = MockApiState(
+        args.channels, args.subscribed, args.latency, args.error_rate, args.quota, args.token
+    )
+    server = start_server(state, args.port)
+    if args.write_list:
+        from channel_io import write_channels
+
+        write_channels(channel_records(state), args.write_list)
+    print(f"Mock YouTube Data API running on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Record the responses Chrome receives and serve them back later.
+
+In record mode every response the browser gets is paused at the response
+stage with the DevTools ``Fetch`` domain, copied into a gzip-compressed
+JSON-lines archive and let through. In replay mode requests are paused
+before they leave the browser and answered from the archive with
+``Fetch.fulfillRequest``, optionally after the originally observed delay.
+Requests the archive doesn't know fail as if the machine were offline, so
+a replayed run never touches the network.
+
+The tap works with both engines; for Selenium it is attached through a
+devtools.DriverSession.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import threading
+import time
+
+from devtools import CDPError
+
+
+RECORD = "record"
+REPLAY = "replay"
+
+# getResponseBody returns the decoded body, so these no longer apply
+STRIPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def request_key(method, url):
+    # Fragments never reach the server
+    return f"{method} {url.split('#', 1)[0]}"
+
+
+class PageArchive:
+    """A gzip JSON-lines file of recorded responses, one object per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                # Appending adds a new gzip member; readers see one stream
+                self._file = gzip.open(self.path, "ab")
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def entries(self):
+        try:
+            with gzip.open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except EOFError:
+            # A recording that was killed leaves a truncated last member
+            return
+
+    def load(self):
+        """Return ``{request_key: [entry, ...]}`` in recording order."""
+        responses = {}
+        for entry in self.entries():
+            responses.setdefault(request_key(entry["method"], entry["url"]), []).append(entry)
+        return responses
+
+
+class NetworkTap:
+    """Records into or replays from a PageArchive for every tab it is attached to.
+
+    Replayed responses for the same request are served in the order they
+    were recorded, repeating the last one, so a page fetched before and
+    after a subscribe click looks the same on replay.
+    """
+
+    def __init__(self, archive, mode, timings=False):
+        self.archive = archive
+        self.mode = mode
+        self.timings = timings
+        self.responses = archive.load() if mode == REPLAY else {}
+        self.served = {}
+        self.recorded = 0
+        self.missing = []
+        self._started = {}
+        self._connections = set()
+
+    async def enable(self, connection, session_id, target_id=None):
+        """Start intercepting the requests of one attached tab."""
+        if connection not in self._connections:
+            self._connections.add(connection)
+            connection.on("Fetch.requestPaused", lambda p, s: self._paused(connection, p, s))
+            connection.on("Network.requestWillBeSent", self._request_sent)
+        if self.mode == RECORD:
+            await connection.send("Network.enable", {}, session_id)
+            patterns = [{"urlPattern": "*", "requestStage": "Response"}]
+        else:
+            patterns = [{"urlPattern": "*", "requestStage": "Request"}]
+        await connection.send("Fetch.enable", {"patterns": patterns}, session_id)
+
+    async def _request_sent(self, params, session_id):
+        self._started[params["requestId"]] = time.monotonic()
+
+    async def _paused(self, connection, params, session_id):
+        try:
+            if self.mode == RECORD:
+                await self._record(connection, params, session_id)
+            else:
+                await self._replay(connection, params, session_id)
+        except CDPError:
+            # The tab navigated away or closed while the request was paused
+            pass
+
+    async def _record(self, connection, params, session_id):
+        request = params["request"]
+        request_id = params["requestId"]
+        if "responseStatusCode" in params:
+            body = ""
+            if not 300 <= params["responseStatusCode"] < 400:
+                try:
+                    result = await connection.send(
+                        "Fetch.getResponseBody", {"requestId": request_id}, session_id
+                    )
+                    body = result["body"]
+                    if not result.get("base64Encoded"):
+                        body = base64.b64encode(body.encode("utf-8")).decode("ascii")
+                except CDPError:
+                    pass
+            started = self._started.pop(params.get("networkId"), None)
+            self.archive.append({
+                "method": request["method"],
+                "url": request["url"],
+                "status": params["responseStatusCode"],
+                "headers": [
+                    h for h in params.get("responseHeaders", [])
+                    if h["name"].lower() not in STRIPPED_HEADERS
+                ],
+                "body": body,
+                "elapsed": round(time.monotonic() - started, 3) if started else 0,
+                "ts": round(time.time(), 3),
+            })
+            self.recorded += 1
+        await connection.send("Fetch.continueRequest", {"requestId": request_id}, session_id)
+
+    async def _replay(self, connection, params, session_id):
+        request = params["request"]
+        key = request_key(request["method"], request["url"])
+        recorded = self.responses.get(key)
+        if not recorded:
+            self.missing.append(key)
+            await connection.send(
+                "Fetch.failRequest",
+                {"requestId": params["requestId"], "errorReason": "InternetDisconnected"},
+                session_id,
+            )
+            return
+        index = self.served.get(key, 0)
+        self.served[key] = index + 1
+        entry = recorded[min(index, len(recorded) - 1)]
+        if self.timings and entry.get("elapsed"):
+            await asyncio.sleep(entry["elapsed"])
+        await connection.send(
+            "Fetch.fulfillRequest",
+            {
+                "requestId": params["requestId"],
+                "responseCode": entry["status"],
+                "responseHeaders": entry["headers"],
+                "body": entry["body"],
+            },
+            session_id,
+        )
+
+    def close(self):
+        self._connections.clear()
+        self.archive.close()
+        if self.mode == REPLAY and self.missing:
+            print(f"{len(self.missing)} requests were not in the archive, e.g. {self.missing[0]}")
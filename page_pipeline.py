@@ -0,0 +1,55 @@
+import time
+
+
+class PagePipeline:
+    """Double-buffered channel navigation over two browser tabs.
+
+    While the channel in the front tab is inspected, clicked and paced,
+    the next channel is already loading in the back tab. ``show()`` then
+    swaps the tabs instead of starting a fresh blocking ``driver.get``.
+    """
+
+    def __init__(self, driver, metrics=None):
+        self.driver = driver
+        self.metrics = metrics
+        self.front = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+        self.back = driver.current_window_handle
+        driver.switch_to.window(self.front)
+        self.back_url = None
+        self.prefetch_hits = 0
+
+    def prefetch(self, url):
+        """Start loading ``url`` in the back tab without waiting for it."""
+        self.driver.switch_to.window(self.back)
+        # Assigning location returns immediately, unlike driver.get
+        self.driver.execute_script("window.location.href = arguments[0];", url)
+        self.driver.switch_to.window(self.front)
+        self.back_url = url
+
+    def show(self, url, next_url=None):
+        """Bring ``url`` to the front tab and prefetch ``next_url`` behind it.
+
+        The previous channel's tab is reused for the prefetch, so callers
+        should keep a short delay after a click for its request to finish.
+        """
+        start = time.monotonic()
+        if self.back_url == url:
+            self.front, self.back = self.back, self.front
+            self.driver.switch_to.window(self.front)
+            self.prefetch_hits += 1
+        else:
+            self.driver.get(url)
+        self.back_url = None
+        if self.metrics:
+            self.metrics.page_load.observe(time.monotonic() - start)
+        if next_url:
+            self.prefetch(next_url)
+
+    def close(self):
+        """Close the back tab and leave the driver on the front one."""
+        try:
+            self.driver.switch_to.window(self.back)
+            self.driver.close()
+        finally:
+            self.driver.switch_to.window(self.front)
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+
+DEFAULT_PAGE_DIR = os.path.expanduser("~/.youtubetransfer/pages")
+DEFAULT_ACCOUNT = "default"
+# Pages kept per account when a new one is saved
+DEFAULT_KEEP = 20
+
+
+class PageStore:
+    """Archive of the /feed/channels pages saved by extraction runs.
+
+    Each page is stored once, gzip-compressed, under the SHA-256 of its
+    HTML in ``objects/``; saving the same page again only adds an index
+    entry. ``index.jsonl`` records one line per save with the account,
+    time, channel count and sizes. Pages are read back by streaming the
+    compressed object, never by unpacking it to disk.
+    """
+
+    def __init__(self, root=DEFAULT_PAGE_DIR, keep=DEFAULT_KEEP):
+        self.root = root
+        self.keep = keep
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, "index.jsonl")
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".html.gz")
+
+    def entries(self, account=None):
+        """Index entries, oldest first, optionally for one account."""
+        if not os.path.exists(self.index_path):
+            return []
+        entries = []
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A save that was killed mid-write
+                    continue
+                if account is None or entry["account"] == account:
+                    entries.append(entry)
+        entries.sort(key=lambda e: e["saved"])
+        return entries
+
+    def latest(self, account=None):
+        entries = self.entries(account)
+        return entries[-1] if entries else None
+
+    def find(self, ref, account=None):
+        """Resolve ``latest`` or a digest prefix to an index entry."""
+        entries = self.entries(account)
+        if ref == "latest":
+            if not entries:
+                raise KeyError(f"no pages saved for {account or 'any account'}")
+            return entries[-1]
+        matches = {e["digest"] for e in entries if e["digest"].startswith(ref)}
+        if len(matches) != 1:
+            raise KeyError(f"{ref} matches {len(matches)} pages")
+        return [e for e in entries if e["digest"] in matches][-1]
+
+    def _put_object(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def open(self, entry):
+        """Open a page for reading as text, decompressing as it is read."""
+        return gzip.open(self.object_path(entry["digest"]), "rt", encoding="utf-8")
+
+    def read_channels(self, entry, base_url=None):
+        from channel_io import read_channels_page
+
+        with self.open(entry) as f:
+            return read_channels_page(f, base_url)
+
+    def save(self, html, account=DEFAULT_ACCOUNT, base_url=None):
+        """Archive a page and return ``(entry, channels)`` read back from it.
+
+        Older pages of the account beyond ``keep`` are pruned afterwards.
+        """
+        data = html.encode("utf-8")
+        digest = self._put_object(data)
+        entry = {"digest": digest, "account": account, "saved": time.time()}
+        channels = self.read_channels(entry, base_url)
+        entry["channels"] = len(channels)
+        entry["size"] = len(data)
+        entry["stored"] = os.path.getsize(self.object_path(digest))
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        if self.keep:
+            self.prune(keep=self.keep, account=account)
+        return entry, channels
+
+    def prune(self, keep=None, max_age=None, account=None):
+        """Drop index entries beyond the newest ``keep`` per account or
+        older than ``max_age`` seconds, then delete unreferenced pages.
+
+        The newest page of every account is always kept. Returns the
+        removed entries.
+        """
+        entries = self.entries()
+        now = time.time()
+        by_account = {}
+        for entry in entries:
+            by_account.setdefault(entry["account"], []).append(entry)
+        kept = []
+        removed = []
+        for name, history in by_account.items():
+            for age, entry in enumerate(reversed(history)):
+                expired = (keep is not None and age >= keep) or (
+                    max_age is not None and now - entry["saved"] > max_age
+                )
+                if age > 0 and expired and account in (None, name):
+                    removed.append(entry)
+                else:
+                    kept.append(entry)
+        if not removed:
+            return []
+        kept.sort(key=lambda e: e["saved"])
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in kept:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.index_path)
+        referenced = {e["digest"] for e in kept}
+        for digest in {e["digest"] for e in removed} - referenced:
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def usage(self):
+        """``(pages, stored_bytes, html_bytes)`` over the distinct pages."""
+        distinct = {e["digest"]: e for e in self.entries()}
+        return (
+            len(distinct),
+            sum(e["stored"] for e in distinct.values()),
+            sum(e["size"] for e in distinct.values()),
+        )
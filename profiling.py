@@ -0,0 +1,282 @@
+"""Opt-in profiling of the extraction and subscription phases.
+
+Off by default; every hook is then a shared no-op. When enabled, each
+phase (extract, subscribe, unsubscribe) is timed and, with ``cprofile``,
+run under cProfile, or with ``sample``, under a thread that samples the
+phase's stack every few milliseconds. With ``--profile-channels N`` only
+every Nth channel is profiled, into one profile per phase.
+
+WebDriver commands are timed separately by wrapping the driver's
+``execute``: the summary splits a phase's wall time into CPU in our own
+code, CPU inside WebDriver calls, time blocked waiting for ChromeDriver
+and idle time (sleeps, pacing and WebDriverWait polling). The CDP engine
+has no WebDriver, so there idle is all time spent waiting on Chrome.
+
+    python main.py --profile-out profiles subscribe -i selected.jsonl
+    python ytt.py --profile-out profiles --profiler sample --profile-channels 20
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+
+PROFILERS = ("cprofile", "sample")
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled from a background thread.
+
+    Has the enable/disable/dump_stats interface of cProfile.Profile;
+    stats are written in the collapsed format flame graph tools read.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = {}
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def enable(self):
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._sampler.start()
+
+    def disable(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def dump_stats(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+
+class PhaseTimes:
+    """Where one phase's wall time went."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.webdriver_wall = 0.0
+        self.webdriver_cpu = 0.0
+        self.commands = {}
+        self.channels = 0
+        self.channel_collector = None
+
+    def add_command(self, command, wall, cpu):
+        self.webdriver_wall += wall
+        self.webdriver_cpu += cpu
+        calls, seconds = self.commands.get(command, (0, 0.0))
+        self.commands[command] = (calls + 1, seconds + wall)
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+        self.cpu = time.thread_time() - self.cpu_started
+
+    def report(self):
+        blocked = max(self.webdriver_wall - self.webdriver_cpu, 0.0)
+        return {
+            "phase": self.name,
+            "wall_seconds": round(self.wall, 3),
+            "own_cpu_seconds": round(max(self.cpu - self.webdriver_cpu, 0.0), 3),
+            "webdriver_cpu_seconds": round(self.webdriver_cpu, 3),
+            "webdriver_blocked_seconds": round(blocked, 3),
+            "idle_seconds": round(max(self.wall - self.cpu - blocked, 0.0), 3),
+            "profiled_channels": self.channels,
+            "webdriver_commands": {
+                command: {"calls": calls, "seconds": round(seconds, 3)}
+                for command, (calls, seconds) in sorted(self.commands.items(), key=lambda item: -item[1][1])
+            },
+        }
+
+
+class Profiler:
+    """Profiles phases and sampled channels into ``directory`` when enabled."""
+
+    def __init__(self, directory=None, mode="cprofile", channel_every=0, interval=0.005):
+        self.directory = directory
+        self.mode = mode
+        self.channel_every = channel_every
+        self.interval = interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def _collector(self):
+        if self.mode == "sample":
+            return StackSampler(self.interval)
+        import cProfile
+
+        return cProfile.Profile()
+
+    def _current(self):
+        stack = getattr(self._local, "phases", None)
+        return stack[-1] if stack else None
+
+    def phase(self, name):
+        """Context manager around one phase; a no-op when disabled."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._phase(name)
+
+    @contextlib.contextmanager
+    def _phase(self, name):
+        times = PhaseTimes(name)
+        collector = self._collector()
+        if self.channel_every:
+            # The phase itself is only timed; its sampled channels share one profile
+            times.channel_collector = collector
+        elif not _start(collector):
+            collector = None
+        self._local.phases = getattr(self._local, "phases", []) + [times]
+        try:
+            yield times
+        finally:
+            if collector and not self.channel_every:
+                collector.disable()
+            times.finish()
+            self._local.phases.pop()
+            if self.channel_every and not times.channels:
+                collector = None
+            self._write(times, collector)
+
+    def channel(self, index):
+        """Context manager around the ``index``-th (1-based) channel of a phase.
+
+        Profiles it into the phase's channel profile when it is sampled.
+        """
+        times = self._current() if self.channel_every else None
+        if times is None or (index - 1) % self.channel_every:
+            return contextlib.nullcontext()
+        return self._channel(times)
+
+    @contextlib.contextmanager
+    def _channel(self, times):
+        started = _start(times.channel_collector)
+        try:
+            yield
+        finally:
+            if started:
+                times.channel_collector.disable()
+                times.channels += 1
+
+    def instrument_driver(self, driver):
+        """Time every WebDriver command of ``driver`` against the current phase."""
+        if not self.enabled:
+            return driver
+        execute = driver.execute
+
+        @functools.wraps(execute)
+        def timed_execute(driver_command, params=None):
+            times = self._current()
+            if times is None:
+                return execute(driver_command, params)
+            start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                return execute(driver_command, params)
+            finally:
+                times.add_command(driver_command, time.perf_counter() - start, time.thread_time() - cpu_start)
+
+        driver.execute = timed_execute
+        return driver
+
+    def _write(self, times, collector):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            stem = os.path.join(
+                self.directory, f"{times.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence}"
+            )
+        report = times.report()
+        if collector:
+            suffix = ".folded" if self.mode == "sample" else ".prof"
+            collector.dump_stats(stem + suffix)
+            report["profile"] = stem + suffix
+        with open(stem + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print_report(report, sys.stderr)
+
+
+def _start(collector):
+    try:
+        collector.enable()
+        return True
+    except ValueError:
+        # Python 3.12+ allows only one cProfile at a time per process
+        print("Another profiler is active; only timing this phase", file=sys.stderr)
+        return False
+
+
+def print_report(report, out=sys.stdout):
+    wall = report["wall_seconds"] or 1
+    print("\n" + "=" * 58, file=out)
+    print(f"Profile of {report['phase']}: {report['wall_seconds']:.1f}s wall", file=out)
+    for label, field in (
+        ("our code (CPU)", "own_cpu_seconds"),
+        ("WebDriver client (CPU)", "webdriver_cpu_seconds"),
+        ("blocked on WebDriver", "webdriver_blocked_seconds"),
+        ("idle (sleeps, waits)", "idle_seconds"),
+    ):
+        print(f"  {label:<24}{report[field]:>9.1f}s {report[field] / wall * 100:>5.1f}%", file=out)
+    for command, info in list(report["webdriver_commands"].items())[:5]:
+        print(f"    {command:<22}{info['calls']:>6} calls {info['seconds']:>8.1f}s", file=out)
+    if "profile" in report:
+        print(f"  Profile: {report['profile']}", file=out)
+    print("=" * 58, file=out)
+
+
+PROFILER = Profiler()
+
+
+def configure(directory, mode="cprofile", channel_every=0):
+    """Enable the process-wide profiler."""
+    PROFILER.directory = directory
+    PROFILER.mode = mode
+    PROFILER.channel_every = channel_every
+    return PROFILER
+
+
+def configure_from_argv(argv):
+    """Take the profiling options out of ``argv``; enable profiling if given.
+
+    Returns the remaining arguments, so entry points can parse the rest
+    as before.
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--profile-out")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--profile-channels", type=int, default=0)
+    args, rest = parser.parse_known_args(argv)
+    if args.profile_out:
+        configure(args.profile_out, args.profiler, args.profile_channels)
+    return rest
@@ -0,0 +1,66 @@
+import re
+
+from channel_store import channel_key
+
+
+class RuleSet:
+    """Channel matching rules loaded from include/exclude rule files.
+
+    Each non-empty line of a rule file is one rule:
+
+    - ``re:<pattern>`` matches the channel name or URL with a regex
+    - ``id:<UC...>`` or a bare ``UC...`` channel ID matches that channel
+    - ``@handle`` or a bare handle matches that handle (case-insensitive)
+
+    Lines starting with ``#`` are comments.
+    """
+
+    def __init__(self):
+        self.patterns = []
+        self.keys = set()
+
+    @classmethod
+    def from_files(cls, paths):
+        rules = cls()
+        for path in paths or []:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    rules.add(line)
+        return rules
+
+    def add(self, line):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return
+        if line.startswith("re:"):
+            self.patterns.append(re.compile(line[3:], re.IGNORECASE))
+        elif line.startswith("id:"):
+            self.keys.add(line[3:].strip())
+        elif line.startswith("UC") and len(line) == 24:
+            self.keys.add(line)
+        else:
+            self.keys.add("@" + line.lstrip("@").lower())
+
+    def __bool__(self):
+        return bool(self.patterns or self.keys)
+
+    def matches(self, name, url):
+        if channel_key(url) in self.keys:
+            return True
+        return any(p.search(name) or p.search(url) for p in self.patterns)
+
+
+def apply_rules(channels, include=None, exclude=None):
+    """Set active flags on ``channels`` from include and exclude rules.
+
+    With include rules, exactly the matching channels become active;
+    without them the current flags are kept. Exclude rules always win.
+    Returns the number of active channels.
+    """
+    for position, (name, url, active) in enumerate(channels):
+        if include:
+            active = include.matches(name, url)
+        if active and exclude and exclude.matches(name, url):
+            active = False
+        channels.set_active(position, active)
+    return channels.active_count
@@ -0,0 +1,239 @@
+import bisect
+import re
+import sys
+
+
+PAGE_SIZE = 25
+RANGE_PATTERN = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+
+class ChannelIndex:
+    """Prebuilt prefix and substring index over channel names and handles.
+
+    Prefix lookups bisect a sorted key list; substring lookups intersect
+    trigram posting lists and only verify the surviving candidates.
+    Results are cached so a query that extends the previous one only
+    filters the previous hits.
+    """
+
+    def __init__(self, channels):
+        self.keys = []
+        self.trigrams = {}
+        for position in range(len(channels)):
+            handle = channels.url(position).rstrip("/").rsplit("/", 1)[-1].lstrip("@")
+            key = f"{channels.name(position)} {handle}".lower()
+            self.keys.append(key)
+            for gram in {key[i : i + 3] for i in range(len(key) - 2)}:
+                self.trigrams.setdefault(gram, []).append(position)
+        self.sorted_keys = sorted((key, i) for i, key in enumerate(self.keys))
+        self._last_query = None
+        self._last_hits = None
+
+    def prefix(self, text):
+        """Return the sorted positions whose key starts with ``text``."""
+        text = text.lower()
+        start = bisect.bisect_left(self.sorted_keys, (text, -1))
+        hits = []
+        for key, position in self.sorted_keys[start:]:
+            if not key.startswith(text):
+                break
+            hits.append(position)
+        return sorted(hits)
+
+    def search(self, text):
+        """Return the positions whose name or handle contains ``text``."""
+        text = text.lower()
+        if not text:
+            return list(range(len(self.keys)))
+        if self._last_query and text.startswith(self._last_query):
+            candidates = self._last_hits
+        elif len(text) >= 3:
+            postings = [self.trigrams.get(text[i : i + 3], ()) for i in range(len(text) - 2)]
+            postings.sort(key=len)
+            candidates = postings[0]
+            for other in postings[1:]:
+                other = set(other)
+                candidates = [p for p in candidates if p in other]
+        else:
+            candidates = range(len(self.keys))
+        hits = [p for p in candidates if text in self.keys[p]]
+        self._last_query = text
+        self._last_hits = hits
+        return hits
+
+
+class SelectionUI:
+    """Paginated, searchable channel selection menu."""
+
+    def __init__(self, channels, page_size=PAGE_SIZE):
+        self.channels = channels
+        self.page_size = page_size
+        self.index = ChannelIndex(channels)
+        self.view = None  # None means every channel is visible
+        self.query = ""
+        self.page = 0
+
+    def visible(self):
+        return range(len(self.channels)) if self.view is None else self.view
+
+    def page_count(self):
+        return max(1, -(-len(self.visible()) // self.page_size))
+
+    def render(self):
+        """Print only the rows on the current page."""
+        visible = self.visible()
+        start = self.page * self.page_size
+        width = len(str(len(self.channels)))
+        name_width = self.channels.name_width
+        print("-" * 58)
+        for position in visible[start : start + self.page_size]:
+            name, url, active = self.channels[position]
+            status = "Y" if active else "N"
+            print(f"{str(position + 1).rjust(width)}. [{status}] {name.ljust(name_width)} {url}")
+        filter_note = f", filter '/{self.query}'" if self.view is not None else ""
+        print("-" * 58)
+        print(
+            f"Page {self.page + 1}/{self.page_count()} - {len(visible)} shown{filter_note}, "
+            f"{self.channels.active_count}/{len(self.channels)} active"
+        )
+
+    def print_help(self):
+        print("\nOptions:")
+        print("N) Next page            P) Previous page")
+        print("12) Toggle channel 12   1-200) Activate channels 1 to 200")
+        print("!45 or !1-200) Deactivate channels")
+        print("/text) Search names and handles, /^text) Names starting with text")
+        print("/) Search as you type")
+        print("A) Activate shown       D) Deactivate shown")
+        print("INVERT) Invert shown    C) Continue")
+
+    def _parse_range(self, spec):
+        match = RANGE_PATTERN.match(spec)
+        if not match:
+            return None
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if not 1 <= first <= last <= len(self.channels):
+            return None
+        return range(first - 1, last)
+
+    def _set_many(self, positions, state):
+        if self.view is None and len(positions) == len(self.channels):
+            self.channels.set_all(state)
+            return
+        for position in positions:
+            self.channels.set_active(position, state)
+
+    def search(self, query):
+        self.query = query
+        if not query:
+            self.view = None
+        elif query.startswith("^"):
+            self.view = self.index.prefix(query[1:])
+        else:
+            self.view = self.index.search(query)
+        self.page = 0
+
+    def handle(self, command):
+        """Apply one command; return False when the user chose to continue."""
+        command = command.strip()
+        lowered = command.lower()
+        if lowered == "c":
+            return False
+        if lowered in ("", "n"):
+            self.page = min(self.page + 1, self.page_count() - 1)
+        elif lowered == "p":
+            self.page = max(self.page - 1, 0)
+        elif lowered == "a":
+            self._set_many(self.visible(), True)
+        elif lowered == "d":
+            self._set_many(self.visible(), False)
+        elif lowered == "invert":
+            if self.view is None:
+                self.channels.invert()
+            else:
+                for position in self.view:
+                    self.channels.set_active(position, not self.channels.is_active(position))
+        elif command.startswith("/"):
+            self.search(command[1:])
+        elif command.startswith("!"):
+            positions = self._parse_range(command[1:])
+            if positions is None:
+                print("Invalid range")
+            else:
+                self._set_many(positions, False)
+        elif "-" in command:
+            positions = self._parse_range(command)
+            if positions is None:
+                print("Invalid range")
+            else:
+                self._set_many(positions, True)
+        elif command.isdigit():
+            self.channels.toggle_channel(int(command))
+        else:
+            print("Invalid input. Please try again.")
+        return True
+
+    def live_search(self):
+        """Refine the search on every keystroke until Enter is pressed."""
+        read_key = _raw_key_reader()
+        if read_key is None:
+            self.search(input("Search: /").strip())
+            return
+        query = ""
+        while True:
+            self.search(query)
+            self.render()
+            print(f"Search: /{query}", end="", flush=True)
+            key = read_key()
+            print()
+            if key in ("\r", "\n"):
+                return
+            if key == "\x1b":
+                self.search("")
+                return
+            if key in ("\x7f", "\b"):
+                query = query[:-1]
+            elif key.isprintable():
+                query += key
+
+    def run(self):
+        """Run the menu loop until the user continues."""
+        self.print_help()
+        while True:
+            self.render()
+            command = input("\nEnter your choice (H for help): ")
+            if command.strip().lower() == "h":
+                self.print_help()
+                continue
+            if command.strip() == "/" and sys.stdin.isatty():
+                self.live_search()
+                continue
+            if not self.handle(command):
+                return self.channels
+
+
+def _raw_key_reader():
+    """Return a function reading one key press, or None if unsupported."""
+    if not sys.stdin.isatty():
+        return None
+    try:
+        import termios
+        import tty
+    except ImportError:
+        try:
+            import msvcrt
+        except ImportError:
+            return None
+        return lambda: msvcrt.getwch()
+
+    def read_key():
+        fd = sys.stdin.fileno()
+        old_settings = termios.tcgetattr(fd)
+        try:
+            tty.setraw(fd)
+            return sys.stdin.read(1)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+    return read_key
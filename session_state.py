@@ -0,0 +1,124 @@
+import json
+import os
+import time
+
+
+DEFAULT_SESSION_FILE = os.path.expanduser("~/.youtubetransfer/session.json")
+
+# Google's login cookies; the session is gone once all of them expired
+AUTH_COOKIES = ("SID", "__Secure-1PSID", "__Secure-3PSID", "LOGIN_INFO")
+
+# Fields Network.setCookies accepts out of what Network.getAllCookies returns
+COOKIE_FIELDS = (
+    "name", "value", "domain", "path", "secure", "httpOnly", "sameSite",
+    "expires", "priority", "sourceScheme", "sourcePort",
+)
+
+# A small page on the origin is enough to write its localStorage
+STORAGE_PAGE = "/robots.txt"
+
+# true when logged in, false when YouTube shows its sign-in link, null while loading
+LOGIN_STATE_SCRIPT = """(function () {
+  if (document.querySelector("button#avatar-btn")) return true;
+  if (document.querySelector('a[href*="accounts.google.com/ServiceLogin"]')) return false;
+  return null;
+})()"""
+
+
+class SessionExpired(Exception):
+    """The imported session no longer logs in to YouTube."""
+
+
+class SessionState:
+    """Cookies and localStorage of a logged-in YouTube session.
+
+    Exported once from an interactive login and imported into fresh
+    headless browsers, so unattended runs need neither a window nor a
+    prompt. The file holds live credentials and is written owner-only.
+    """
+
+    def __init__(self, cookies, local_storage=None, origin=None, saved=None):
+        self.cookies = cookies
+        self.local_storage = local_storage or {}
+        self.origin = origin
+        self.saved = saved
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["cookies"], data.get("local_storage"), data.get("origin"), data.get("saved"))
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "origin": self.origin,
+                    "saved": self.saved or round(time.time()),
+                    "cookies": self.cookies,
+                    "local_storage": self.local_storage,
+                },
+                f,
+                indent=1,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_driver(cls, driver, origin):
+        """Capture the session of a logged-in Selenium browser showing ``origin``."""
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        local_storage = driver.execute_script("return Object.assign({}, window.localStorage);")
+        return cls(cookies, local_storage, origin, round(time.time()))
+
+    def check(self, now=None):
+        """Raise SessionExpired if the login cookies have run out."""
+        now = time.time() if now is None else now
+        auth = [c for c in self.cookies if c["name"] in AUTH_COOKIES]
+        # Session cookies (expires -1) last as long as the server accepts them
+        if auth and all(0 < c.get("expires", -1) < now for c in auth):
+            newest = max(c["expires"] for c in auth)
+            raise SessionExpired(
+                f"the login cookies expired on {time.strftime('%Y-%m-%d %H:%M', time.localtime(newest))}"
+            )
+
+    def cookie_params(self):
+        params = []
+        for cookie in self.cookies:
+            param = {k: cookie[k] for k in COOKIE_FIELDS if k in cookie}
+            if cookie.get("session") or param.get("expires", -1) < 0:
+                param.pop("expires", None)
+            params.append(param)
+        return params
+
+    def storage_script(self):
+        items = json.dumps(self.local_storage)
+        return f"(function (items) {{ for (var k in items) localStorage.setItem(k, items[k]); }})({items})"
+
+    def apply_to_driver(self, driver, base_url):
+        """Import the session into a fresh Selenium browser."""
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": self.cookie_params()})
+        if self.local_storage:
+            driver.get((self.origin or base_url) + STORAGE_PAGE)
+            driver.execute_script(self.storage_script())
+
+    async def apply_to_page(self, page, base_url):
+        """Import the session into a fresh tab of the CDP engine."""
+        await page.send("Network.setCookies", {"cookies": self.cookie_params()})
+        if self.local_storage:
+            await page.navigate((self.origin or base_url) + STORAGE_PAGE)
+            await page.evaluate(self.storage_script())
+
+
+def wait_for_session(driver, timeout):
+    """Return True once the page shows the account, False if it shows a sign-in link."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = driver.execute_script("return " + LOGIN_STATE_SCRIPT)
+        if state is not None:
+            return state
+        time.sleep(0.25)
+    return False
@@ -0,0 +1,130 @@
+import hashlib
+import os
+
+from channel_io import write_channels
+from channel_store import ChannelList, channel_key
+from journal import DONE_STATUSES
+
+
+def parse_shard(text):
+    """Parse ``I/K`` (1-based) into ``(index, count)``."""
+    index, _, count = text.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {text} is not between 1/{count} and {count}/{count}")
+    return index, count
+
+
+def shard_index(url, count):
+    """The 1-based shard a channel belongs to.
+
+    A stable hash of the canonical key, so every host that splits the same
+    manifest assigns each channel to the same shard, whatever the order or
+    URL form of the list.
+    """
+    digest = hashlib.sha256(channel_key(url).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def manifest_digest(records):
+    """Identify a manifest by the set of channels it asks for."""
+    keys = sorted({channel_key(url) for _, url, active in records if active})
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()[:16]
+
+
+def split_manifest(records, count):
+    """Return the active channels split into ``count`` ChannelLists."""
+    shards = [ChannelList() for _ in range(count)]
+    for name, url, active in records:
+        if active:
+            shards[shard_index(url, count) - 1].append(name, url, True)
+    return shards
+
+
+def select_shard(records, index, count):
+    shard = ChannelList()
+    for name, url, active in records:
+        if active and shard_index(url, count) == index:
+            shard.append(name, url, True)
+    return shard
+
+
+def shard_info(records, index, count, action):
+    """What a shard's result file records about where its work came from."""
+    return {"index": index, "count": count, "manifest": manifest_digest(records), "action": action}
+
+
+def write_shards(records, count, directory):
+    """Write one channel list per shard; returns the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, shard in enumerate(split_manifest(records, count), 1):
+        path = os.path.join(directory, f"shard-{index}-of-{count}.jsonl")
+        write_channels(shard, path, "jsonl")
+        paths.append(path)
+    return paths
+
+
+def merge_results(reports):
+    """Combine the result files of the shards of one manifest.
+
+    Conflicts are shards of different manifests, counts or actions, a
+    shard reported twice, and channels reported by more than one shard
+    or by a shard they don't belong to. A channel that one shard
+    finished counts as done even if another shard failed it.
+    """
+    conflicts = []
+    shards = [report.get("shard") for report in reports]
+    if not all(shards):
+        raise ValueError("result files without shard information can't be merged")
+    first = shards[0]
+    for shard in shards[1:]:
+        for field in ("manifest", "count", "action"):
+            if shard[field] != first[field]:
+                conflicts.append({
+                    "type": f"{field}_mismatch",
+                    "shard": shard["index"],
+                    "expected": first[field],
+                    "found": shard[field],
+                })
+    seen_shards = {}
+    for shard in shards:
+        seen_shards[shard["index"]] = seen_shards.get(shard["index"], 0) + 1
+    conflicts += [
+        {"type": "duplicate_shard", "shard": index, "files": n}
+        for index, n in sorted(seen_shards.items()) if n > 1
+    ]
+
+    outcomes = {}
+    for report, shard in zip(reports, shards):
+        for result in report.get("channels", []):
+            key = channel_key(result["url"])
+            outcomes.setdefault(key, []).append((shard["index"], result))
+            if shard_index(result["url"], shard["count"]) != shard["index"]:
+                conflicts.append({"type": "wrong_shard", "url": result["url"], "shard": shard["index"]})
+
+    channels = []
+    for key, reported in outcomes.items():
+        if len(reported) > 1:
+            conflicts.append({
+                "type": "duplicate_channel",
+                "url": reported[0][1]["url"],
+                "outcomes": [{"shard": index, "status": r["status"]} for index, r in reported],
+            })
+        done = [r for _, r in reported if r["status"] in DONE_STATUSES]
+        channels.append(dict(done[0] if done else reported[-1][1]))
+
+    statuses = {}
+    for result in channels:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return {
+        "manifest": first["manifest"],
+        "action": first["action"],
+        "shards": sorted(seen_shards),
+        "missing_shards": [i for i in range(1, first["count"] + 1) if i not in seen_shards],
+        "total_processed": len(channels),
+        "statuses": statuses,
+        "failed": [r for r in channels if r["status"] not in DONE_STATUSES],
+        "conflicts": conflicts,
+        "channels": channels,
+    }
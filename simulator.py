@@ -0,0 +1,280 @@
+"""Dry-run a transfer in simulated time to see how long it would take.
+
+The real CDP scheduler (CDPChannelSubscriber's tab workers, queue and
+pacing) runs on an event loop whose clock only moves when every task is
+waiting, so hours of page loads finish in a fraction of a second. Tabs
+are simulated: each step takes a latency drawn from a LatencyModel,
+either fitted from the latencies and outcomes of earlier runs or given
+as parameters. Chrome is never started.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import math
+import random
+import selectors
+import statistics
+
+from cdp_engine import CDPChannelSubscriber
+from journal import DONE_STATUSES
+from metrics import MetricsRegistry, TransferMetrics
+from timeouts import DEFAULT_LATENCY_FILE, TimeoutCalibration
+
+
+class VirtualClockSelector:
+    """Selector that jumps the loop's clock ahead instead of sleeping.
+
+    I/O that is already ready (e.g. a finished executor job waking the
+    loop) is still delivered; only idle waits are skipped.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            # Nothing is scheduled, so only real I/O can make progress
+            return self._selector.select(None)
+        self._loop.now += timeout
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class SimulatedLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self.now = 0.0
+        super().__init__(VirtualClockSelector(self))
+
+    def time(self):
+        return self.now
+
+
+class LatencyModel:
+    """How long each step of a channel takes and how often a channel fails.
+
+    A step's latency is drawn from recorded samples when there are any,
+    else from a lognormal distribution around its mean. A failed channel
+    costs the full button timeout, like a button that never appears.
+    ``contention`` slows every step by that fraction per other busy tab,
+    standing in for Chrome and YouTube slowing down under parallel load.
+    """
+
+    STEPS = ("page_load", "button_wait", "click")
+
+    def __init__(
+        self,
+        page_load=2.0,
+        button_wait=1.0,
+        click=0.6,
+        failure_rate=0.02,
+        jitter=0.5,
+        contention=0.15,
+        samples=None,
+    ):
+        self.means = {"page_load": page_load, "button_wait": button_wait, "click": click}
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self.contention = contention
+        self.samples = samples or {}
+
+    @classmethod
+    def fit(cls, latency_file=DEFAULT_LATENCY_FILE, traces=(), **parameters):
+        """Build a model from recorded latencies and earlier results.
+
+        Latencies come from the timeout calibration file; samples at or
+        above a step's timeout are waits that ran out and are left to the
+        failure rate. ``traces`` are journals or JSON result files; their
+        share of failed channels becomes the failure rate. Explicit
+        ``parameters`` override what was fitted.
+        """
+        calibration = TimeoutCalibration(latency_file)
+        samples = {}
+        for step in ("page_load", "button_wait"):
+            limit = calibration.timeout(step)
+            values = [v for v in calibration.latencies(step) if v < limit]
+            if values:
+                samples[step] = values
+        statuses = [status for trace in traces for status in trace_statuses(trace)]
+        if statuses and parameters.get("failure_rate") is None:
+            parameters["failure_rate"] = sum(s not in DONE_STATUSES for s in statuses) / len(statuses)
+        for step, value in parameters.items():
+            if value is not None and step in cls.STEPS:
+                # A latency given explicitly replaces the recorded samples
+                samples.pop(step, None)
+        return cls(samples=samples, **{k: v for k, v in parameters.items() if v is not None})
+
+    def draw(self, step, rng, busy=1):
+        values = self.samples.get(step)
+        if values:
+            seconds = rng.choice(values)
+        else:
+            mean = self.means[step]
+            # Lognormal with the given mean; jitter is the log-space deviation
+            seconds = rng.lognormvariate(math.log(mean) - self.jitter**2 / 2, self.jitter)
+        return seconds * (1 + self.contention * max(busy - 1, 0))
+
+    def describe(self):
+        steps = {}
+        for step in self.STEPS:
+            values = self.samples.get(step)
+            if values:
+                steps[step] = {"source": "recorded", "samples": len(values), "median": statistics.median(values)}
+            else:
+                steps[step] = {"source": "parameter", "mean": self.means[step], "jitter": self.jitter}
+        return {"steps": steps, "failure_rate": round(self.failure_rate, 4), "contention": self.contention}
+
+
+def trace_statuses(path):
+    """Channel statuses from a run journal (JSON lines) or a JSON result file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        report = json.loads(text)
+    except ValueError:
+        report = None
+    if isinstance(report, dict):
+        return [c["status"] for c in report.get("channels", [])]
+    statuses = []
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("event") == "channel":
+            statuses.append(entry["status"])
+    return statuses
+
+
+class _DryRunTimeouts(TimeoutCalibration):
+    """The timeouts a real run would use; simulated waits are never recorded."""
+
+    def record(self, step, seconds, timed_out=False):
+        pass
+
+    def save(self):
+        pass
+
+
+class SimulatedPage:
+    def __init__(self, subscriber):
+        self.subscriber = subscriber
+        self.failing = False
+
+    async def step(self, name, timeout=None):
+        """Spend one step's latency; False if it would outlast ``timeout``."""
+        subscriber = self.subscriber
+        subscriber.busy += 1
+        try:
+            seconds = subscriber.model.draw(name, subscriber.rng, subscriber.busy)
+            if timeout is not None and seconds > timeout:
+                await asyncio.sleep(timeout)
+                return False
+            await asyncio.sleep(seconds)
+            return True
+        finally:
+            subscriber.busy -= 1
+
+    async def navigate(self, url, timeout=60):
+        self.subscriber.page_loads += 1
+        self.failing = self.subscriber.rng.random() < self.subscriber.model.failure_rate
+        if not await self.step("page_load", timeout):
+            raise asyncio.TimeoutError(f"Page load timed out after {timeout}s")
+
+    async def wait_for(self, expression, timeout, interval=0.1):
+        if self.failing:
+            await asyncio.sleep(timeout)
+            return False
+        return await self.step("button_wait", timeout)
+
+    async def close(self):
+        pass
+
+
+class SimulatedBrowser:
+    def __init__(self, subscriber):
+        self.subscriber = subscriber
+
+    async def start(self):
+        return self
+
+    async def new_page(self):
+        return SimulatedPage(self.subscriber)
+
+    async def close(self):
+        pass
+
+
+class SimulatedSubscriber(CDPChannelSubscriber):
+    """CDPChannelSubscriber whose tabs and clock are simulated."""
+
+    def __init__(self, model, seed=0, latency_file=DEFAULT_LATENCY_FILE, **kwargs):
+        super().__init__(
+            interactive=False,
+            metrics=TransferMetrics(MetricsRegistry()),
+            timeouts=_DryRunTimeouts(latency_file),
+            confirm=False,
+            **kwargs,
+        )
+        self.model = model
+        self.rng = random.Random(seed)
+        self.busy = 0
+        self.page_loads = 0
+        self.elapsed = 0.0
+
+    def make_browser(self):
+        return SimulatedBrowser(self)
+
+    async def login(self, page):
+        return True
+
+    async def _set_subscription(self, page, channel_name, subscribed):
+        await page.step("click")
+        return 1
+
+    def process_channels(self, channels, action="subscribe"):
+        loop = SimulatedLoop()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                counts = loop.run_until_complete(self._process_channels(channels, action))
+        finally:
+            self.elapsed = loop.time()
+            loop.close()
+        return counts
+
+
+def simulate(channels, model, concurrency=1, delay=0.5, runs=3, latency_file=DEFAULT_LATENCY_FILE):
+    """Project one setting over ``runs`` seeds; returns a summary dict."""
+    walls = []
+    failures = []
+    page_loads = 0
+    for seed in range(runs):
+        subscriber = SimulatedSubscriber(
+            model, seed=seed, latency_file=latency_file, concurrency=concurrency, delay=delay
+        )
+        subscriber.subscribe_to_channels(channels)
+        walls.append(subscriber.elapsed)
+        failures.append(sum(1 for r in subscriber.results if r["status"] not in DONE_STATUSES))
+        page_loads = subscriber.page_loads
+    return {
+        "concurrency": concurrency,
+        "delay": delay,
+        "wall_seconds": round(statistics.median(walls), 1),
+        "wall_seconds_max": round(max(walls), 1),
+        "expected_failures": round(statistics.mean(failures), 1),
+        "page_loads": page_loads,
+    }
+
+
+def best_setting(rows, tolerance=0.05):
+    """The fastest setting, preferring fewer tabs when within ``tolerance``."""
+    fastest = min(row["wall_seconds"] for row in rows)
+    close = [row for row in rows if row["wall_seconds"] <= fastest * (1 + tolerance)]
+    return min(close, key=lambda row: (row["concurrency"], -row["delay"]))
@@ -0,0 +1,182 @@
+import heapq
+import os
+import re
+import time
+
+from channel_io import iter_channels, write_channels
+from channel_store import ChannelList, channel_key
+
+
+DEFAULT_SNAPSHOT_DIR = os.path.expanduser("~/.youtubetransfer/snapshots")
+VERSION_PATTERN = re.compile(r"^v(\d+)\.jsonl$")
+
+
+class SnapshotStore:
+    """Versioned snapshots of the channels a target account is subscribed to.
+
+    Each named sync target gets a directory of ``vNNNN.jsonl`` files. A
+    snapshot holds only active channels, sorted by canonical key, so any
+    two versions can be diffed with a single streaming merge.
+    """
+
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = root
+
+    def _dir(self, name):
+        return os.path.join(self.root, name)
+
+    def path(self, name, version):
+        return os.path.join(self._dir(name), f"v{version:04d}.jsonl")
+
+    def versions(self, name):
+        if not os.path.isdir(self._dir(name)):
+            return []
+        found = (VERSION_PATTERN.match(f) for f in os.listdir(self._dir(name)))
+        return sorted(int(m.group(1)) for m in found if m)
+
+    def latest(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def save(self, name, records):
+        """Store the active records as the next version and return it."""
+        os.makedirs(self._dir(name), exist_ok=True)
+        version = (self.latest(name) or 0) + 1
+        rows = sorted(
+            {channel_key(u): (channel_key(u), n, u) for n, u, active in records if active}.values()
+        )
+        tmp_path = self.path(name, version) + ".tmp"
+        write_channels(((n, u, True) for _, n, u in rows), tmp_path, "jsonl")
+        os.replace(tmp_path, self.path(name, version))
+        return version
+
+    def iter_version(self, name, version):
+        """Stream ``(key, name, url)`` in key order from one version."""
+        if version is None:
+            return
+        for channel_name, url, _ in iter_channels(self.path(name, version), "jsonl"):
+            yield channel_key(url), channel_name, url
+
+    def load(self, name, version=None):
+        version = self.latest(name) if version is None else version
+        return ChannelList.from_records(
+            (n, u, True) for _, n, u in self.iter_version(name, version)
+        )
+
+    def info(self, name, version):
+        path = self.path(name, version)
+        count = sum(1 for _ in self.iter_version(name, version))
+        return {"version": version, "channels": count, "created": time.ctime(os.path.getmtime(path))}
+
+
+def diff_sorted(old, new):
+    """Merge two key-sorted ``(key, name, url)`` streams.
+
+    Returns ``(additions, removals)`` as lists of ``(name, url)``.
+    """
+    additions = []
+    removals = []
+    tagged_old = ((key, 0, name, url) for key, name, url in old)
+    tagged_new = ((key, 1, name, url) for key, name, url in new)
+    previous = None
+    for key, side, name, url in heapq.merge(tagged_old, tagged_new):
+        if previous and previous[0] == key:
+            previous = None
+            continue
+        if previous:
+            (removals if previous[1] == 0 else additions).append(previous[2:])
+        previous = (key, side, name, url)
+    if previous:
+        (removals if previous[1] == 0 else additions).append(previous[2:])
+    return additions, removals
+
+
+def diff_channels(baseline, fresh):
+    """Diff two channel collections by canonical key (active channels only)."""
+
+    def keyed(records):
+        return sorted({channel_key(u): (channel_key(u), n, u) for n, u, a in records if a}.values())
+
+    return diff_sorted(keyed(baseline), keyed(fresh))
+
+
+class IncrementalSync:
+    """Apply only the delta between the last snapshot and a fresh source list.
+
+    The newest snapshot of ``name`` is what the target account was left
+    with by the previous transfer. Channels added since then are
+    subscribed; with ``mirror_removals`` channels dropped from the source
+    are unsubscribed. The resulting state is saved as a new snapshot,
+    unless a channel failed or was never reached: then the next run
+    retries the same delta.
+    """
+
+    def __init__(self, store, name, subscriber_factory=None):
+        self.store = store
+        self.name = name
+        self.subscriber_factory = subscriber_factory or _default_subscriber
+
+    def plan(self, fresh, against=None):
+        against = self.store.latest(self.name) if against is None else against
+        fresh_sorted = sorted(
+            {channel_key(u): (channel_key(u), n, u) for n, u, active in fresh if active}.values()
+        )
+        additions, removals = diff_sorted(self.store.iter_version(self.name, against), fresh_sorted)
+        return against, additions, removals
+
+    def run(self, fresh, mirror_removals=False, against=None):
+        baseline_version, additions, removals = self.plan(fresh, against)
+        print(f"Baseline snapshot: {baseline_version or 'none'}")
+        print(f"{len(additions)} channels to add, {len(removals)} removed from the source")
+        report = {"baseline": baseline_version, "added": [], "removed": [], "failed": []}
+
+        state = {
+            key: (n, u) for key, n, u in self.store.iter_version(self.name, baseline_version)
+        }
+        if additions:
+            subscriber = self.subscriber_factory()
+            subscriber.subscribe_to_channels([(n, u, True) for n, u in additions])
+            self._apply(additions, subscriber.results, state, report, "added")
+        if removals and mirror_removals:
+            subscriber = self.subscriber_factory()
+            subscriber.unsubscribe_from_channels([(n, u, True) for n, u in removals])
+            self._apply(removals, subscriber.results, state, report, "removed")
+
+        if report["failed"]:
+            # Left unsaved, so the next run retries the whole delta
+            print(f"{len(report['failed'])} channels failed, snapshot not saved")
+            report["snapshot"] = baseline_version
+        elif additions or (removals and mirror_removals) or baseline_version is None:
+            report["snapshot"] = self.store.save(
+                self.name, ((n, u, True) for n, u in state.values())
+            )
+        else:
+            report["snapshot"] = baseline_version
+        report["pending_removals"] = [] if mirror_removals else [u for _, u in removals]
+        return report
+
+    @staticmethod
+    def _apply(delta, results, state, report, field):
+        """Fold results into ``state``; delta channels without one failed."""
+        seen = set()
+        for result in results:
+            key = channel_key(result["url"])
+            seen.add(key)
+            if result["status"] in ("subscribed", "already_subscribed"):
+                state[key] = (result["name"], result["url"])
+                report[field].append(result["url"])
+            elif result["status"] in ("unsubscribed", "not_subscribed"):
+                state.pop(key, None)
+                report[field].append(result["url"])
+            else:
+                report["failed"].append(result)
+        for name, url in delta:
+            if channel_key(url) not in seen:
+                # The run stopped before this channel, e.g. at a failed login
+                report["failed"].append({"name": name, "url": url, "status": "not_processed"})
+
+
+def _default_subscriber():
+    from channel_subscriber import ChannelSubscriber
+
+    return ChannelSubscriber(interactive=False)
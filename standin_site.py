@@ -0,0 +1,274 @@
+"""Local stand-in for the parts of YouTube the transfer tools touch.
+
+Serves a logged-in home page, the /feed/channels page and one page per
+channel with a working subscribe button (unsubscribing goes through a
+confirmation dialog, optionally behind the newer notification menu),
+with optional injected latency and failures.
+Point the tools at it with YTT_BASE_URL, e.g.:
+
+    python standin_site.py --port 8000 --channels 500 --latency 0.3
+    YTT_BASE_URL=http://127.0.0.1:8000 python main.py subscribe -i list.jsonl
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+import argparse
+import json
+import random
+import threading
+import time
+
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>YouTube</title></head><body>
+<ytd-masthead><button id="avatar-btn">Account</button></ytd-masthead>
+</body></html>
+"""
+
+CHANNEL_PAGE = """<!DOCTYPE html>
+<html><head><title>{handle} - YouTube</title></head><body>
+<ytd-masthead><button id="avatar-btn">Account</button></ytd-masthead>
+<h1>{handle}</h1>
+<yt-subscribe-button-view-model>
+<button class="yt-spec-button-shape-next {style}" aria-label="{label}">
+<div class="yt-spec-button-shape-next__button-text-content">{text}</div>
+</button>
+</yt-subscribe-button-view-model>
+<script>
+(function () {{
+  var handle = {handle_json};
+  var button = document.querySelector("yt-subscribe-button-view-model button");
+  var text = button.querySelector("div");
+  var labels = {labels_json};
+  function send(action, subscribed) {{
+    fetch("/youtubei/v1/subscription/" + action, {{
+      method: "POST",
+      headers: {{"Content-Type": "application/json"}},
+      body: JSON.stringify({{channelIds: [handle]}})
+    }}).then(function (response) {{
+      if (!response.ok) return;
+      text.textContent = subscribed ? labels[1] : labels[0];
+      button.classList.toggle("yt-spec-button-shape-next--tonal", subscribed);
+      button.classList.toggle("yt-spec-button-shape-next--filled", !subscribed);
+      button.setAttribute("aria-label", (subscribed ? "Unsubscribe from " : "Subscribe to ") + handle);
+    }});
+  }}
+  function confirmDialog() {{
+    var dialog = document.createElement("yt-confirm-dialog-renderer");
+    dialog.innerHTML = '<p>Unsubscribe from ' + handle + '?</p>' +
+      '<div id="cancel-button"><button>Cancel</button></div>' +
+      '<div id="confirm-button"><button>Unsubscribe</button></div>';
+    document.body.appendChild(dialog);
+    dialog.querySelector("#cancel-button button").addEventListener("click", function () {{
+      dialog.remove();
+    }});
+    dialog.querySelector("#confirm-button button").addEventListener("click", function () {{
+      dialog.remove();
+      send("unsubscribe", false);
+    }});
+  }}
+  function notificationMenu() {{
+    var menu = document.createElement("tp-yt-iron-dropdown");
+    menu.innerHTML = ["All", "Personalised", "None", "Unsubscribe"].map(function (item) {{
+      return '<yt-list-item-view-model><span>' + item + '</span></yt-list-item-view-model>';
+    }}).join("");
+    document.body.appendChild(menu);
+    menu.lastChild.addEventListener("click", function () {{
+      menu.remove();
+      setTimeout(confirmDialog, {popup_delay_ms});
+    }});
+  }}
+  button.addEventListener("click", function () {{
+    if (!button.classList.contains("yt-spec-button-shape-next--tonal")) {{
+      send("subscribe", true);
+      return;
+    }}
+    // Unsubscribing asks for confirmation first, like YouTube does; newer
+    // layouts open the notification menu before the dialog
+    setTimeout({menu_json} ? notificationMenu : confirmDialog, {popup_delay_ms});
+  }});
+}})();
+</script>
+</body></html>
+"""
+
+
+# Button captions per interface language, as YouTube capitalises them
+STANDIN_TEXTS = {
+    "en": ("Subscribe", "Subscribed"),
+    "de": ("Abonnieren", "Abonniert"),
+    "fr": ("S’abonner", "Abonné"),
+    "ja": ("チャンネル登録", "登録済み"),
+}
+
+
+class StandInState:
+    """Channels, the account's subscriptions and the fault model."""
+
+    def __init__(
+        self,
+        channel_count=100,
+        subscribed=0,
+        latency=0.0,
+        jitter=0.0,
+        missing_rate=0.0,
+        seed=0,
+        language="en",
+        unsubscribe_menu=False,
+        popup_delay=0.0,
+    ):
+        self.handles = [f"standin{i:05d}" for i in range(channel_count)]
+        self.subscriptions = set(self.handles[:subscribed])
+        self.latency = latency
+        self.jitter = jitter
+        self.missing_rate = missing_rate
+        self.language = language
+        # Layout of the unsubscribe flow and how long its popups take to render
+        self.unsubscribe_menu = unsubscribe_menu
+        self.popup_delay = popup_delay
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            self.requests += 1
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0
+            missing = self.random.random() < self.missing_rate
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+        return missing
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path in ("", "/index.html"):
+            self._send(200, HOME_PAGE)
+        elif path == "/feed/channels":
+            self._send(200, self.channels_page())
+        elif path.startswith("/@"):
+            handle = path[2:].split("/", 1)[0]
+            if handle not in self.state.handles:
+                self._send(404, "<html><body>This channel does not exist.</body></html>")
+                return
+            if self.state.delay():
+                self._send(200, "<html><body><h1>Something went wrong</h1></body></html>")
+                return
+            self._send(200, self.channel_page(handle))
+        else:
+            self._send(404, "<html><body>Not found</body></html>")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, '{"error": "invalid json"}', "application/json")
+            return
+        handles = [h for h in payload.get("channelIds", []) if h in self.state.handles]
+        if self.path.startswith("/youtubei/v1/subscription/subscribe") and handles:
+            with self.state.lock:
+                self.state.subscriptions.update(handles)
+        elif self.path.startswith("/youtubei/v1/subscription/unsubscribe") and handles:
+            with self.state.lock:
+                self.state.subscriptions.difference_update(handles)
+        else:
+            self._send(404, '{"error": "unknown channel"}', "application/json")
+            return
+        self._send(200, json.dumps({"channelIds": handles}), "application/json")
+
+    def channels_page(self):
+        with self.state.lock:
+            handles = sorted(self.state.subscriptions)
+        renderers = "\n".join(
+            f'<ytd-channel-renderer><a class="channel-link" href="/@{escape(h)}">{escape(h)}</a>'
+            "</ytd-channel-renderer>"
+            for h in handles
+        )
+        return f"<html><body><ytd-masthead></ytd-masthead>\n{renderers}\n</body></html>"
+
+    def channel_page(self, handle):
+        with self.state.lock:
+            subscribed = handle in self.state.subscriptions
+        subscribe_text, subscribed_text = STANDIN_TEXTS.get(self.state.language, STANDIN_TEXTS["en"])
+        return CHANNEL_PAGE.format(
+            handle=escape(handle),
+            handle_json=json.dumps(handle),
+            labels_json=json.dumps([subscribe_text, subscribed_text]),
+            style="yt-spec-button-shape-next--tonal" if subscribed else "yt-spec-button-shape-next--filled",
+            text=subscribed_text if subscribed else subscribe_text,
+            label=f"Unsubscribe from {handle}" if subscribed else f"Subscribe to {handle}",
+            menu_json=json.dumps(self.state.unsubscribe_menu),
+            popup_delay_ms=int(self.state.popup_delay * 1000),
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(state, port=0, addr="127.0.0.1"):
+    """Start the stand-in site on a background thread and return the server."""
+    handler = type("BoundStandInHandler", (StandInHandler,), {"state": state})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.base_url = f"http://{addr}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def channel_records(state, base_url):
+    """Return ``(name, url, active)`` records for every stand-in channel."""
+    return [(h, f"{base_url}/@{h}", True) for h in state.handles]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for YouTube.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--channels", type=int, default=100, help="Number of channels")
+    parser.add_argument("--subscribed", type=int, default=0, help="Channels already subscribed")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every channel page")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per channel page")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="Share of pages without a button")
+    parser.add_argument("--language", choices=sorted(STANDIN_TEXTS), default="en", help="Button language")
+    parser.add_argument(
+        "--unsubscribe-menu", action="store_true", help="Unsubscribe through the notification menu"
+    )
+    parser.add_argument("--popup-delay", type=float, default=0.0, help="Seconds before menus and dialogs render")
+    parser.add_argument("--write-list", help="Also write the channel list to this file")
+    args = parser.parse_args()
+
+    state = StandInState(
+        args.channels,
+        args.subscribed,
+        args.latency,
+        args.jitter,
+        args.missing_rate,
+        language=args.language,
+        unsubscribe_menu=args.unsubscribe_menu,
+        popup_delay=args.popup_delay,
+    )
+    server = start_server(state, args.port)
+    if args.write_list:
+        from channel_io import write_channels
+
+        write_channels(channel_records(state, server.base_url), args.write_list)
+    print(f"Stand-in site running on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import threading
+
+
+SUBSCRIPTION_ENDPOINTS = (
+    "/youtubei/v1/subscription/subscribe",
+    "/youtubei/v1/subscription/unsubscribe",
+)
+
+
+class Expectation:
+    """The outcome of the next subscription request one tab sends."""
+
+    def __init__(self, target_id):
+        self.target_id = target_id
+        self.request_id = None
+        self.url = None
+        self.status = None
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self, timeout):
+        """Block until the request completes; returns ``(ok, detail)``."""
+        if not self.done.wait(timeout):
+            if self.request_id is None:
+                return False, "no subscription request was sent"
+            return False, "no response in time"
+        if self.error:
+            return False, self.error
+        if self.status is None:
+            # Finished without a responseReceived event, e.g. served from a worker
+            return False, "no response status"
+        if not 200 <= self.status < 300:
+            return False, f"HTTP {self.status}"
+        return True, f"HTTP {self.status}"
+
+
+class SubscriptionWatcher:
+    """Confirm subscribe and unsubscribe clicks from the network.
+
+    Listens to the DevTools Network events of every tab it is enabled on.
+    A caller registers an Expectation for a tab right before clicking;
+    the first subscription request that tab sends afterwards is bound to
+    it and resolved by its response status or loading failure. Works from
+    any thread: the events arrive on the DevTools event loop and callers
+    wait on a threading.Event.
+    """
+
+    def __init__(self):
+        self.expectations = {}
+        self.sessions = {}
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    async def enable(self, connection, session_id, target_id):
+        with self._lock:
+            self.sessions[session_id] = target_id
+        if connection not in self._connections:
+            self._connections.add(connection)
+            connection.on("Network.requestWillBeSent", self._request_sent)
+            connection.on("Network.responseReceived", self._response_received)
+            connection.on("Network.loadingFinished", self._loading_finished)
+            connection.on("Network.loadingFailed", self._loading_failed)
+        await connection.send("Network.enable", {}, session_id)
+
+    def expect(self, target_id):
+        expectation = Expectation(target_id)
+        with self._lock:
+            self.expectations[target_id] = expectation
+        return expectation
+
+    async def _request_sent(self, params, session_id):
+        url = params["request"]["url"]
+        if params["request"]["method"] != "POST" or not any(e in url for e in SUBSCRIPTION_ENDPOINTS):
+            return
+        with self._lock:
+            target_id = self.sessions.get(session_id)
+            expectation = self.expectations.pop(target_id, None)
+            if expectation:
+                expectation.request_id = params["requestId"]
+                expectation.url = url
+                self.requests[(session_id, params["requestId"])] = expectation
+
+    async def _response_received(self, params, session_id):
+        with self._lock:
+            expectation = self.requests.get((session_id, params["requestId"]))
+        if expectation:
+            expectation.status = params["response"]["status"]
+
+    async def _loading_finished(self, params, session_id):
+        with self._lock:
+            expectation = self.requests.pop((session_id, params["requestId"]), None)
+        if expectation:
+            expectation.done.set()
+
+    async def _loading_failed(self, params, session_id):
+        with self._lock:
+            expectation = self.requests.pop((session_id, params["requestId"]), None)
+        if expectation:
+            expectation.error = params.get("errorText") or "request failed"
+            expectation.done.set()
@@ -0,0 +1,48 @@
+"""Runs the dry-run simulator through the real CDP scheduler.
+
+The simulator replaces CDPChannelSubscriber's browser, tabs and timeout
+store with stand-ins, so changes to the calls the scheduler makes on
+them have to be mirrored there; these runs catch it when they aren't.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from channel_store import ChannelList  # noqa: E402
+from simulator import LatencyModel, SimulatedSubscriber, simulate  # noqa: E402
+
+
+def channel_list(count):
+    return ChannelList.from_records(
+        (f"channel{i}", f"https://www.youtube.com/@channel{i}", True) for i in range(count)
+    )
+
+
+class SimulatorTest(unittest.TestCase):
+    def test_every_channel_gets_a_result(self):
+        # Failures make the button wait run out, which is recorded as timed out
+        model = LatencyModel(failure_rate=0.3)
+        subscriber = SimulatedSubscriber(model, seed=1, latency_file=None, concurrency=3, delay=0.5)
+        total, unchanged, changed = subscriber.subscribe_to_channels(channel_list(40))
+        statuses = [r["status"] for r in subscriber.results]
+        self.assertEqual(len(statuses), 40)
+        self.assertIn("button_not_found", statuses)
+        self.assertEqual(changed, statuses.count("subscribed"))
+        self.assertGreater(subscriber.elapsed, 0)
+
+    def test_more_tabs_finish_sooner(self):
+        channels = channel_list(30)
+        model = LatencyModel(failure_rate=0.0, contention=0.0)
+        one = simulate(channels, model, concurrency=1, runs=2, latency_file=None)
+        four = simulate(channels, model, concurrency=4, runs=2, latency_file=None)
+        self.assertEqual(one["expected_failures"], 0)
+        self.assertLess(four["wall_seconds"], one["wall_seconds"])
+
+
+if __name__ == "__main__":
+    unittest.main()
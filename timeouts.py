@@ -0,0 +1,171 @@
+import contextlib
+import json
+import math
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves are then only serialized between threads
+    fcntl = None
+
+
+DEFAULT_LATENCY_FILE = os.path.expanduser("~/.youtubetransfer/latency.json")
+DEFAULT_SITE = "https://www.youtube.com"
+
+# Fixed timeouts used until enough latencies have been seen
+DEFAULT_TIMEOUTS = {
+    "login": 30,
+    "page_load": 60,
+    "button_wait": 10,
+    "channels_page": 20,
+}
+# Learned timeouts never go below or above these
+MIN_TIMEOUTS = {"login": 10, "page_load": 5, "button_wait": 3, "channels_page": 5}
+MAX_TIMEOUTS = {"login": 120, "page_load": 120, "button_wait": 30, "channels_page": 60}
+
+_SAVE_LOCK = threading.Lock()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class TimeoutCalibration:
+    """Timeouts derived from the latencies of earlier runs.
+
+    The most recent ``max_samples`` waits of every step are kept in a
+    small JSON file, separately for every site (base URL), so runs
+    against a local stand-in don't train the timeouts used on YouTube.
+    Once a step has ``min_samples`` latencies, its timeout is their
+    ``pct`` percentile times ``margin``, clamped to MIN_TIMEOUTS and
+    MAX_TIMEOUTS.
+
+    A wait that runs out is stored as its limit negated. It is counted
+    but kept out of the percentile, so a few dead channels don't push
+    the timeout up run after run. Only when more than ``grow_share`` of
+    the recent waits ran out does the timeout grow past the longest of
+    those limits. With ``path=None`` nothing is loaded or saved and the
+    defaults are used.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_LATENCY_FILE,
+        pct=99,
+        margin=1.5,
+        min_samples=20,
+        max_samples=500,
+        grow_share=0.1,
+        site=None,
+    ):
+        self.path = path
+        self.pct = pct
+        self.margin = margin
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.grow_share = grow_share
+        self.site = site or os.environ.get("YTT_BASE_URL", DEFAULT_SITE)
+        self.samples = self._read().get(self.site, {}) if path else {}
+        self.new_samples = {}
+
+    def _read(self):
+        """Return ``{site: {step: [seconds, ...]}}`` from the file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        sites = {
+            site: {step: list(values) for step, values in steps.items()}
+            for site, steps in data.get("sites", {}).items()
+        }
+        if "samples" in data:
+            # Files from before sites were kept apart only held YouTube's
+            sites.setdefault(DEFAULT_SITE, {step: list(v) for step, v in data["samples"].items()})
+        return sites
+
+    def record(self, step, seconds, timed_out=False):
+        """Add one observed latency, or the limit of a wait that ran out."""
+        seconds = -round(seconds, 3) if timed_out else round(seconds, 3)
+        self.samples.setdefault(step, []).append(seconds)
+        del self.samples[step][: -self.max_samples]
+        self.new_samples.setdefault(step, []).append(seconds)
+
+    def latencies(self, step):
+        """The recorded latencies of ``step``, without the waits that ran out."""
+        return [v for v in self.samples.get(step, []) if v >= 0]
+
+    def timed_out(self, step):
+        return [-v for v in self.samples.get(step, []) if v < 0]
+
+    def timeout(self, step):
+        latencies = self.latencies(step)
+        if not self.path or len(latencies) < self.min_samples:
+            return DEFAULT_TIMEOUTS[step]
+        learned = percentile(latencies, self.pct) * self.margin
+        timed_out = self.timed_out(step)
+        if len(timed_out) > self.grow_share * len(self.samples[step]):
+            # Too many waits run out for them all to be dead channels
+            learned = max(learned, max(timed_out) * self.margin)
+        return round(min(max(learned, MIN_TIMEOUTS[step]), MAX_TIMEOUTS[step]), 1)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Serialize saves with other processes, e.g. fan-out targets and shards."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self):
+        """Merge this run's latencies into the file.
+
+        Re-reads the file under a lock first, so concurrent sessions and
+        processes don't drop each other's samples (on Windows only
+        threads of one process are serialized).
+        """
+        if not self.path or not self.new_samples:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with _SAVE_LOCK, self._file_lock():
+            sites = self._read()
+            merged = sites.setdefault(self.site, {})
+            for step, values in self.new_samples.items():
+                merged.setdefault(step, []).extend(values)
+                del merged[step][: -self.max_samples]
+            # Per process: parallel runs (fan-out, shards) save at the same time
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sites": sites}, f)
+            os.replace(tmp_path, self.path)
+        self.samples = merged
+        self.new_samples = {}
+
+    def describe(self):
+        """Return one row per step with its history and current timeout.
+
+        ``high`` is the ``pct`` percentile the timeout is derived from.
+        """
+        rows = []
+        for step in DEFAULT_TIMEOUTS:
+            samples = self.latencies(step)
+            rows.append({
+                "step": step,
+                "samples": len(samples),
+                "timed_out": len(self.timed_out(step)),
+                "p50": percentile(samples, 50) if samples else None,
+                "high": percentile(samples, self.pct) if samples else None,
+                "timeout": self.timeout(step),
+                "default": DEFAULT_TIMEOUTS[step],
+            })
+        return rows
@@ -0,0 +1,260 @@
+import json
+import os
+import signal
+import sqlite3
+import threading
+import time
+
+from journal import DONE_STATUSES, RunJournal
+
+
+DEFAULT_DB = os.path.expanduser("~/.youtubetransfer/queue.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+CANCELLING = "cancelling"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    source_format TEXT,
+    profile TEXT,
+    delay REAL,
+    action TEXT NOT NULL DEFAULT 'subscribe',
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+class JobQueue:
+    """SQLite-backed backlog of transfer jobs.
+
+    A job is a source channel list, a target Chrome profile and an action
+    (subscribe or unsubscribe). Jobs move queued -> running -> done/failed,
+    or to cancelled; a running job that is cancelled passes through
+    cancelling until its worker stops.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.journal_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), "journals")
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "action" not in columns:
+                # Queues created before unsubscribe jobs existed
+                conn.execute("ALTER TABLE jobs ADD COLUMN action TEXT NOT NULL DEFAULT 'subscribe'")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def submit(self, source, profile=None, delay=None, source_format=None, action="subscribe"):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (source, source_format, profile, delay, action, state, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(source), source_format, profile, delay, action, QUEUED, time.time()),
+            )
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, states=None):
+        query = "SELECT * FROM jobs"
+        params = ()
+        if states:
+            query += f" WHERE state IN ({','.join('?' * len(states))})"
+            params = tuple(states)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY id", params)]
+
+    def cancel(self, job_id):
+        """Cancel a job; returns its new state, or None if it can't be cancelled."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["state"] not in (QUEUED, RUNNING):
+                conn.execute("ROLLBACK")
+                return None
+            state = CANCELLED if row["state"] == QUEUED else CANCELLING
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished = ? WHERE id = ?",
+                (state, time.time() if state == CANCELLED else None, job_id),
+            )
+            conn.execute("COMMIT")
+            return state
+
+    def claim(self):
+        """Atomically move the oldest queued job to running and return it."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def finish(self, job_id, state, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished = ?, result = ?, error = ? WHERE id = ?",
+                (state, time.time(), json.dumps(result) if result else None, error, job_id),
+            )
+
+    def requeue(self, job_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ? WHERE id = ? AND state = ?", (QUEUED, job_id, RUNNING)
+            )
+
+    def recover(self):
+        """Requeue jobs left running by a crashed or killed daemon."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            requeued = conn.execute(
+                "UPDATE jobs SET state = ? WHERE state = ?", (QUEUED, RUNNING)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished = ? WHERE state = ?",
+                (CANCELLED, time.time(), CANCELLING),
+            )
+            conn.execute("COMMIT")
+        return requeued
+
+    def journal_for(self, job_id):
+        return RunJournal(os.path.join(self.journal_dir, f"job-{job_id}.jsonl"))
+
+
+class TransferDaemon:
+    """Bounded worker pool that executes jobs from a JobQueue.
+
+    Each job's per-channel outcomes go to its own journal, so a job
+    requeued after a restart resumes where it stopped.
+    """
+
+    def __init__(self, queue, workers=1, poll_interval=2.0, subscriber_factory=None):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.subscriber_factory = subscriber_factory or _default_subscriber
+        self.stop_event = threading.Event()
+        self.active = {}
+        self._lock = threading.Lock()
+
+    def load_channels(self, job):
+        from channel_io import read_channels, read_channels_page
+
+        if job["source_format"] == "html" or job["source"].endswith(".html"):
+            return read_channels_page(job["source"])
+        return read_channels(job["source"], job["source_format"])
+
+    def run_job(self, job):
+        journal = self.queue.journal_for(job["id"])
+        journal.record("job_started", job=job["id"], attempt=job["attempts"])
+        subscriber = self.subscriber_factory(job, journal)
+        with self._lock:
+            self.active[job["id"]] = subscriber
+        try:
+            channels = self.load_channels(job)
+            subscriber.process_channels(channels, job["action"])
+        except Exception as e:
+            journal.record("job_failed", job=job["id"], error=str(e))
+            self.queue.finish(job["id"], FAILED, error=str(e))
+            return
+        finally:
+            with self._lock:
+                self.active.pop(job["id"], None)
+
+        outcomes = {}
+        for entry in journal.channel_results().values():
+            outcomes[entry["status"]] = outcomes.get(entry["status"], 0) + 1
+        result = {"outcomes": outcomes, "active_channels": channels.active_count}
+        if subscriber.cancel_event.is_set():
+            if self.queue.get(job["id"])["state"] != CANCELLING:
+                # Stopped by a daemon shutdown, not by the user
+                journal.record("job_interrupted", job=job["id"])
+                self.queue.requeue(job["id"])
+                return
+            state = CANCELLED
+        elif sum(outcomes.get(s, 0) for s in DONE_STATUSES) < channels.active_count:
+            state = FAILED
+        else:
+            state = DONE
+        journal.record("job_finished", job=job["id"], state=state)
+        self.queue.finish(job["id"], state, result=result)
+
+    def worker(self):
+        while not self.stop_event.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self.stop_event.wait(self.poll_interval)
+                continue
+            print(f"Starting job {job['id']}: {job['source']}")
+            self.run_job(job)
+            print(f"Finished job {job['id']}: {self.queue.get(job['id'])['state']}")
+
+    def watch_cancellations(self):
+        # Workers only see the database between jobs, so cancel running
+        # subscribers from here; they stop before their next channel.
+        while not self.stop_event.wait(self.poll_interval):
+            cancelling = {job["id"] for job in self.queue.list([CANCELLING])}
+            with self._lock:
+                for job_id, subscriber in self.active.items():
+                    if job_id in cancelling:
+                        subscriber.cancel_event.set()
+
+    def stop(self, *_):
+        print("Stopping after the current channels...")
+        self.stop_event.set()
+        with self._lock:
+            for subscriber in self.active.values():
+                subscriber.cancel_event.set()
+
+    def serve(self, install_signal_handlers=True):
+        requeued = self.queue.recover()
+        if requeued:
+            print(f"Requeued {requeued} interrupted jobs")
+        if install_signal_handlers:
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        threads.append(threading.Thread(target=self.watch_cancellations, daemon=True))
+        for thread in threads:
+            thread.start()
+        print(f"Transfer daemon running with {self.workers} workers on {self.queue.db_path}")
+        while any(t.is_alive() for t in threads[:-1]):
+            for thread in threads[:-1]:
+                thread.join(timeout=0.5)
+        self.stop_event.set()
+
+
+def _default_subscriber(job, journal):
+    from channel_subscriber import ChannelSubscriber
+
+    return ChannelSubscriber(
+        interactive=False, profile_dir=job["profile"], delay=job["delay"], journal=journal
+    )
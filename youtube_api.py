@@ -0,0 +1,452 @@
+"""Transfer backend that uses the YouTube Data API instead of a browser.
+
+Listing reads ``subscriptions.list`` 50 entries per page; subscribing is
+one ``subscriptions.insert`` per channel, issued from a small thread pool
+over pooled keep-alive connections. Every call is booked against the
+project's daily quota in an on-disk ledger first, so a run stops cleanly
+before the API starts refusing it and the rest can be resumed (with
+``--journal``) after the quota resets at midnight Pacific time.
+
+ApiChannelExtractor and ApiChannelSubscriber keep the interfaces of
+ChannelExtractor and ChannelSubscriber. ``mock_youtube_api.py`` serves a
+local imitation of the endpoints for tests and benchmarks.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+from zoneinfo import ZoneInfo
+import contextlib
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: the ledger is then only locked between threads
+    fcntl = None
+
+from channel_extractor import ChannelExtractor
+from channel_store import ChannelList, channel_key
+from channel_subscriber import ChannelSubscriber
+from journal import DONE_STATUSES
+from profiling import PROFILER
+
+
+API_URL = os.environ.get("YTT_API_URL", "https://www.googleapis.com/youtube/v3")
+DEFAULT_LEDGER = os.path.expanduser("~/.youtubetransfer/quota.json")
+DAILY_QUOTA = 10000
+# Units charged per call, from the Data API quota table
+COSTS = {"list": 1, "insert": 50, "delete": 50}
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class ApiError(Exception):
+    def __init__(self, status, reason, message):
+        super().__init__(f"{status} {reason}: {message}")
+        self.status = status
+        self.reason = reason
+
+
+class QuotaExhausted(Exception):
+    """The ledger has no room left for a call today."""
+
+
+class Credentials:
+    """An OAuth access token, refreshed when a refresh token is available.
+
+    The token file is either just the access token or the JSON written by
+    Google's OAuth tools (``access_token`` plus optionally
+    ``refresh_token``, ``client_id``, ``client_secret`` and ``token_uri``).
+    """
+
+    def __init__(self, access_token, refresh=None, path=None):
+        self.access_token = access_token
+        self.refresh_info = refresh
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read().strip()
+        if not text.startswith("{"):
+            return cls(text, path=path)
+        data = json.loads(text)
+        token = data.get("access_token") or data.get("token")
+        refresh = data if data.get("refresh_token") else None
+        return cls(token, refresh, path)
+
+    @classmethod
+    def from_env(cls):
+        token = os.environ.get("YTT_API_TOKEN")
+        return cls(token) if token else None
+
+    def refresh(self, used_token):
+        """Fetch a new access token; returns False if that isn't possible."""
+        if not self.refresh_info:
+            return False
+        with self._lock:
+            if self.access_token != used_token:
+                # Another thread already refreshed it
+                return True
+            body = urlencode({
+                "grant_type": "refresh_token",
+                "refresh_token": self.refresh_info["refresh_token"],
+                "client_id": self.refresh_info["client_id"],
+                "client_secret": self.refresh_info["client_secret"],
+            }).encode()
+            token_uri = self.refresh_info.get("token_uri", "https://oauth2.googleapis.com/token")
+            with urllib.request.urlopen(token_uri, data=body, timeout=30) as response:
+                self.access_token = json.load(response)["access_token"]
+            if self.path:
+                self.refresh_info["access_token"] = self.access_token
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.refresh_info, f)
+                os.replace(tmp_path, self.path)
+            return True
+
+
+class QuotaLedger:
+    """Units spent per project and Pacific-time day, kept in a JSON file."""
+
+    def __init__(self, path=DEFAULT_LEDGER, project="default", daily_limit=DAILY_QUOTA):
+        self.path = path
+        self.project = project
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def today():
+        return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Serialize updates with other processes sharing the ledger, e.g. shards."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, data):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def used(self, day=None):
+        with self._lock:
+            return self._read().get(self.project, {}).get(day or self.today(), 0)
+
+    def remaining(self):
+        return max(self.daily_limit - self.used(), 0)
+
+    def reserve(self, units):
+        """Book ``units`` for today or raise QuotaExhausted."""
+        with self._lock, self._file_lock():
+            data = self._read()
+            days = data.setdefault(self.project, {})
+            today = self.today()
+            if days.get(today, 0) + units > self.daily_limit:
+                raise QuotaExhausted(
+                    f"{days.get(today, 0)} of {self.daily_limit} units used on {today}"
+                )
+            days[today] = days.get(today, 0) + units
+            # Only the last week is worth keeping
+            for day in sorted(days)[:-7]:
+                del days[day]
+            self._write(data)
+
+
+class ConnectionPool:
+    """Reusable keep-alive HTTP(S) connections to one host."""
+
+    def __init__(self, base_url, size=8, timeout=30):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.size = size
+        self.created = 0
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        self.created += 1
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request and return ``(status, parsed JSON body)``."""
+        data = json.dumps(body).encode() if body is not None else None
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in (1, 2):
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                connection.request(method, self.prefix + path, data, headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                # The server may have dropped an idle connection; retry on a new one
+                if attempt == 2:
+                    raise
+                continue
+            if response.will_close or self._idle.qsize() >= self.size:
+                connection.close()
+            else:
+                self._idle.put(connection)
+            return response.status, json.loads(payload) if payload else {}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class YouTubeApi:
+    """The few Data API calls a transfer needs, with quota booking and retries."""
+
+    def __init__(
+        self, credentials, base_url=API_URL, ledger=None, pool_size=8, max_rate=5.0, retries=4
+    ):
+        self.credentials = credentials
+        self.pool = ConnectionPool(base_url, pool_size)
+        self.ledger = ledger
+        self.min_interval = 1.0 / max_rate if max_rate else 0
+        self.retries = retries
+        self.handles = {}
+        self._rate_lock = threading.Lock()
+        self._next_call = 0.0
+
+    def _pace(self):
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def call(self, method, path, params, cost, body=None):
+        if self.ledger:
+            self.ledger.reserve(COSTS[cost])
+        path = f"{path}?{urlencode(params)}"
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            self._pace()
+            token = self.credentials.access_token
+            status, payload = self.pool.request(
+                method, path, body, {"Authorization": f"Bearer {token}"}
+            )
+            if status < 300:
+                return payload
+            error = payload.get("error", {})
+            reason = (error.get("errors") or [{}])[0].get("reason", "")
+            if status == 401 and attempt == 0 and self.credentials.refresh(token):
+                continue
+            transient = status in (429, 500, 502, 503, 504) or reason in (
+                "rateLimitExceeded",
+                "userRateLimitExceeded",
+            )
+            if transient and attempt < self.retries:
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if reason in ("quotaExceeded", "dailyLimitExceeded"):
+                raise QuotaExhausted(error.get("message", reason))
+            raise ApiError(status, reason, error.get("message", ""))
+
+    def list_subscriptions(self):
+        """Yield ``(title, channel_id, subscription_id)`` for the whole account."""
+        params = {"part": "snippet", "mine": "true", "maxResults": 50}
+        while True:
+            page = self.call("GET", "/subscriptions", params, "list")
+            for item in page.get("items", []):
+                snippet = item["snippet"]
+                yield snippet["title"], snippet["resourceId"]["channelId"], item["id"]
+            if not page.get("nextPageToken"):
+                return
+            params["pageToken"] = page["nextPageToken"]
+
+    def channel_id(self, url):
+        """Return the UC... ID for a channel URL, resolving @handles (cached)."""
+        key = channel_key(url)
+        if key.startswith("UC"):
+            return key
+        if key not in self.handles:
+            page = self.call(
+                "GET", "/channels", {"part": "id", "forHandle": key}, "list"
+            )
+            items = page.get("items", [])
+            self.handles[key] = items[0]["id"] if items else None
+        return self.handles[key]
+
+    def insert_subscription(self, channel_id):
+        body = {"snippet": {"resourceId": {"kind": "youtube#channel", "channelId": channel_id}}}
+        return self.call("POST", "/subscriptions", {"part": "snippet"}, "insert", body)
+
+    def delete_subscription(self, subscription_id):
+        return self.call("DELETE", "/subscriptions", {"id": subscription_id}, "delete")
+
+    def close(self):
+        self.pool.close()
+
+
+def channel_url(channel_id):
+    return f"https://www.youtube.com/channel/{channel_id}"
+
+
+class ApiChannelExtractor(ChannelExtractor):
+    """ChannelExtractor that pages through subscriptions.list."""
+
+    def __init__(self, api, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.api = api
+
+    def get_channel_list(self):
+        with PROFILER.phase("extract"):
+            return self._list_channels()
+
+    def _list_channels(self):
+        channels = ChannelList()
+        try:
+            for title, channel_id, _ in self.api.list_subscriptions():
+                channels.append(title, channel_url(channel_id), True)
+        except (ApiError, QuotaExhausted) as e:
+            print(f"Error listing subscriptions: {str(e)}")
+            return None
+        print(f"Listed {len(channels)} subscriptions")
+        self.metrics.extracted.inc(len(channels))
+        self.metrics.flush()
+        return channels
+
+
+class ApiChannelSubscriber(ChannelSubscriber):
+    """ChannelSubscriber that inserts or deletes subscriptions through the API.
+
+    ``concurrency`` calls run at once; the client's rate limit and the
+    quota ledger pace them.
+    """
+
+    def __init__(self, api, *args, concurrency=4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.api = api
+        self.concurrency = max(1, concurrency)
+        self.quota_exhausted = False
+
+    def _record(self, name, url, status):
+        self.results.append({"name": name, "url": url, "status": status})
+        if self.journal:
+            self.journal.record("channel", name=name, url=url, status=status)
+
+    def _process_one(self, name, url, action, subscription_ids):
+        if self.quota_exhausted or self.cancel_event.is_set():
+            return None
+        self.metrics.in_flight.inc()
+        try:
+            channel_id = self.api.channel_id(url)
+            if not channel_id:
+                print(f"Channel not found: {name}")
+                status = "failed"
+            elif action == "subscribe" and channel_id in subscription_ids:
+                print(f"Already subscribed to {name}")
+                status = "already_subscribed"
+            elif action == "subscribe":
+                try:
+                    self.api.insert_subscription(channel_id)
+                    print(f"Subscribed successfully to {name}")
+                    status = "subscribed"
+                except ApiError as e:
+                    if e.reason != "subscriptionDuplicate":
+                        raise
+                    print(f"Already subscribed to {name}")
+                    status = "already_subscribed"
+            elif channel_id not in subscription_ids:
+                print(f"Not subscribed to {name}")
+                status = "not_subscribed"
+            else:
+                self.api.delete_subscription(subscription_ids[channel_id])
+                print(f"Unsubscribed successfully from {name}")
+                status = "unsubscribed"
+        except QuotaExhausted as e:
+            if not self.quota_exhausted:
+                print(f"API quota exhausted, stopping: {str(e)}")
+            self.quota_exhausted = True
+            return None
+        except (ApiError, OSError, http.client.HTTPException) as e:
+            print(f"Failed to process {name}: {str(e)}")
+            status = "failed"
+        finally:
+            self.metrics.in_flight.dec()
+
+        counter = {
+            "subscribed": self.metrics.subscribed,
+            "already_subscribed": self.metrics.already_subscribed,
+            "unsubscribed": self.metrics.unsubscribed,
+            "not_subscribed": self.metrics.not_subscribed,
+        }.get(status, self.metrics.failed)
+        counter.inc()
+        self._record(name, url, status)
+        self.metrics.flush()
+        return status
+
+    def process_channels(self, channels, action="subscribe"):
+        with PROFILER.phase(action):
+            return self._process_channels(channels, action)
+
+    def _process_channels(self, channels, action):
+        active_channels = self.pending_channels(channels)
+        total_active = len(active_channels)
+        self.announce_start(action, total_active)
+        self.results = []
+
+        # One unit per 50 subscriptions, against 50 units per duplicate insert
+        try:
+            subscription_ids = {c: s for _, c, s in self.api.list_subscriptions()}
+        except (ApiError, QuotaExhausted) as e:
+            print(f"Error listing subscriptions: {str(e)}")
+            return 0, 0, 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            statuses = list(pool.map(
+                lambda channel: self._process_one(channel[0], channel[1], action, subscription_ids),
+                active_channels,
+            ))
+        if self.api.ledger:
+            ledger = self.api.ledger
+            print(f"Quota used today: {ledger.used()} of {ledger.daily_limit} units")
+
+        # Failed channels count as processed, as in the browser engines; None
+        # marks channels skipped after the quota ran out or a cancel
+        processed = [s for s in statuses if s is not None]
+        unchanged = sum(1 for s in processed if s in ("already_subscribed", "not_subscribed"))
+        changed = sum(1 for s in processed if s in DONE_STATUSES) - unchanged
+        return len(processed), unchanged, changed
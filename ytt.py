@@ -7,6 +7,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 import os
+import sys
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import (
@@ -14,6 +15,11 @@ from selenium.common.exceptions import (
     NoSuchElementException,
 )  # Add this import
 
+from button_state import NOT_SUBSCRIBED, SUBSCRIBED, classify_button
+from channel_store import ChannelList
+from selection_ui import SelectionUI
+from profiling import PROFILER, configure_from_argv
+
 
 # Configuration
 BUTTON_WAIT_TIME = 10  # Seconds to wait for button to appear
@@ -86,12 +92,14 @@ def subscribe(driver, channel_name):
 
         print(f"Detected Text '{button_text}'")
 
-        if button_text == "subscribe":
+        # Localized captions are recognised, so the interface language doesn't matter
+        state = classify_button({"text": button_text})
+        if state == NOT_SUBSCRIBED:
             print(f"Subscribing to {channel_name}")
             driver.execute_script("arguments[0].click();", subscribe_button)
             print(f"Subscribed successfully to {channel_name}")
             return 1
-        elif button_text == "subscribed":
+        elif state == SUBSCRIBED:
             print(f"Already subscribed to {channel_name}")
             return 0
         else:
@@ -150,7 +158,7 @@ def get_secure_driver():
         "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
     )
 
-    return driver
+    return PROFILER.instrument_driver(driver)
 
 
 def ensure_english_language(driver):
@@ -209,7 +217,7 @@ def subscribe_to_channels(channels):
     Subscribe to a list of YouTube channels.
 
     Args:
-    channels (list): List of tuples containing (channel_name, channel_url, active_status)
+    channels (ChannelList): Channels to process; only active ones are subscribed
 
     Returns:
     tuple: (total_processed, already_subscribed, new_subscriptions)
@@ -221,28 +229,34 @@ def subscribe_to_channels(channels):
         driver.quit()
         return 0, 0, 0
 
-    ensure_english_language(driver)
-
     total_processed = 0
     already_subscribed = 0
     new_subscriptions = 0
-    active_channels = [channel for channel in channels if channel[2]]
+    channels = ChannelList.from_records(channels)
+    active_channels = list(channels.active())
     total_active = len(active_channels)
-
-    for i, (name, url, _) in enumerate(active_channels, 1):
-        print("\n" + "-" * 58)
-        print(f"Checking {name} ({i}/{total_active}, {i/total_active*100:.1f}% done)")
-        driver.get(url)
-
-        if wait_for_button(driver):
-            result = subscribe(driver, name)
-            if result == 1:
-                new_subscriptions += 1
-            elif result == 0:
-                already_subscribed += 1
-            total_processed += 1
-        else:
-            print(f"Subscribe button not found for {name}")
+    language_switched = False
+
+    for i, (name, url) in enumerate(active_channels, 1):
+        with PROFILER.channel(i):
+            print("\n" + "-" * 58)
+            print(f"Checking {name} ({i}/{total_active}, {i/total_active*100:.1f}% done)")
+            driver.get(url)
+
+            if wait_for_button(driver):
+                result = subscribe(driver, name)
+                if result == -1 and not language_switched:
+                    # Unrecognised caption: fall back to English once and retry
+                    language_switched = True
+                    if ensure_english_language(driver) and wait_for_button(driver):
+                        result = subscribe(driver, name)
+                if result == 1:
+                    new_subscriptions += 1
+                elif result == 0:
+                    already_subscribed += 1
+                total_processed += 1
+            else:
+                print(f"Subscribe button not found for {name}")
 
         time.sleep(DELAY_BETWEEN_CHANNELS)
 
@@ -258,7 +272,7 @@ def extract_channels(file_path):
     file_path (str): Path to the saved HTML file
 
     Returns:
-    list: List of tuples containing (channel_name, channel_url, active_status)
+    ChannelList: Extracted channels, all marked active
     """
     with open(file_path, "r", encoding="utf-8") as file:
         content = file.read()
@@ -266,7 +280,7 @@ def extract_channels(file_path):
     soup = BeautifulSoup(content, "html.parser")
     channel_renderers = soup.find_all("ytd-channel-renderer")
 
-    channels = []
+    channels = ChannelList()
     for renderer in channel_renderers:
         link = renderer.find("a", class_="channel-link")
         if link:
@@ -274,61 +288,11 @@ def extract_channels(file_path):
             channel_name = channel_url.split("@")[-1]
             if channel_url.startswith("/"):
                 channel_url = "https://www.youtube.com" + channel_url
-            channels.append((channel_name, channel_url, True))
+            channels.append(channel_name, channel_url, True)
 
     return channels
 
 
-def display_channels(channels):
-    """
-    Display the list of channels in a formatted manner.
-
-    Args:
-    channels (list): List of tuples containing (channel_name, channel_url, active_status)
-    """
-    max_name_length = max(len(channel[0]) for channel in channels)
-    max_index_length = len(str(len(channels)))
-
-    for i, (name, url, active) in enumerate(channels, 1):
-        status = "Y" if active else "N"
-        padded_index = str(i).rjust(max_index_length)
-        padded_name = name.ljust(max_name_length)
-        print(f"{padded_index}. [{status}] {padded_name} {url}")
-
-
-def toggle_channel(channels, index):
-    """
-    Toggle the active status of a channel.
-
-    Args:
-    channels (list): List of tuples containing (channel_name, channel_url, active_status)
-    index (int): Index of the channel to toggle
-    """
-    if 1 <= index <= len(channels):
-        name, url, active = channels[index - 1]
-        channels[index - 1] = (name, url, not active)
-        print("-" * 58)
-        print(f"Toggled channel: {name}")
-        print("-" * 58)
-    else:
-        print("Invalid index")
-
-
-def toggle_all_channels(channels, state):
-    """
-    Toggle the active status of all channels.
-
-    Args:
-    channels (list): List of tuples containing (channel_name, channel_url, active_status)
-    state (bool): New active status for all channels
-    """
-    for i in range(len(channels)):
-        channels[i] = (channels[i][0], channels[i][1], state)
-    print("-" * 58)
-    print(f"{'Activated' if state else 'Deactivated'} all channels")
-    print("-" * 58)
-
-
 def wait_for_login(driver):
     """
     Wait for the user to log in to YouTube by checking for either:
@@ -459,74 +423,54 @@ def main():
         channels = None
 
     if choice == "N":
-        try:
-            driver = get_secure_driver()  # Use secure driver here
+        with PROFILER.phase("extract"):
+            try:
+                driver = get_secure_driver()  # Use secure driver here
 
-            # Go to YouTube and wait for login
-            driver.get("https://www.youtube.com")
-            if not wait_for_login(driver):
-                driver.quit()
-                return
+                # Go to YouTube and wait for login
+                driver.get("https://www.youtube.com")
+                if not wait_for_login(driver):
+                    driver.quit()
+                    return
 
-            # Navigate to channels page
-            print("\nNavigating to channels page...")
-            driver.get("https://www.youtube.com/feed/channels")
-
-            # Wait for the page to load and save it
-            if wait_for_channels_page(driver):
-                file_path = save_channels_page(driver)
-                if file_path and os.path.exists(file_path):
-                    print("Successfully saved channels page. Processing channels...")
-                    channels = extract_channels(file_path)
-                    print("\nFirst phase complete. Closing browser...")
-                    driver.quit()  # Explicitly close the first session
+                # Navigate to channels page
+                print("\nNavigating to channels page...")
+                driver.get("https://www.youtube.com/feed/channels")
+
+                # Wait for the page to load and save it
+                if wait_for_channels_page(driver):
+                    file_path = save_channels_page(driver)
+                    if file_path and os.path.exists(file_path):
+                        print("Successfully saved channels page. Processing channels...")
+                        channels = extract_channels(file_path)
+                        print("\nFirst phase complete. Closing browser...")
+                        driver.quit()  # Explicitly close the first session
+                    else:
+                        print("Failed to save channels page.")
+                        driver.quit()
+                        return
                 else:
-                    print("Failed to save channels page.")
+                    print("Failed to load channels page.")
                     driver.quit()
                     return
-            else:
-                print("Failed to load channels page.")
-                driver.quit()
-                return
 
-        except Exception as e:
-            print(f"\nError: {str(e)}")
-            print("\nTroubleshooting steps:")
-            print("1. Ensure Google Chrome is installed")
-            print("2. Ensure ChromeDriver is installed and matches your Chrome version")
-            if "driver" in locals():
-                driver.quit()
-            return
+            except Exception as e:
+                print(f"\nError: {str(e)}")
+                print("\nTroubleshooting steps:")
+                print("1. Ensure Google Chrome is installed")
+                print("2. Ensure ChromeDriver is installed and matches your Chrome version")
+                if "driver" in locals():
+                    driver.quit()
+                return
 
     if channels:
         print("\nStarting subscription phase...")
         # Menu loop
-        while True:
-            display_channels(channels)
-            print("-" * 58)
-            print("\nOptions:")
-            print("A) Toggle all to Activate")
-            print("D) Toggle all to Deactivate")
-            print("Enter an index to toggle a specific channel")
-            print("C) Continue")
-
-            choice = input("\nEnter your choice: ").strip().upper()
-
-            if choice == "A":
-                toggle_all_channels(channels, True)
-            elif choice == "D":
-                toggle_all_channels(channels, False)
-            elif choice == "C":
-                break
-            else:
-                try:
-                    index = int(choice)
-                    toggle_channel(channels, index)
-                except ValueError:
-                    print("Invalid input. Please try again.")
+        SelectionUI(channels).run()
 
         # After breaking from the menu loop, proceed with subscriptions
-        total, already, new = subscribe_to_channels(channels)
+        with PROFILER.phase("subscribe"):
+            total, already, new = subscribe_to_channels(channels)
         print(f"\nSubscription Summary:")
         print(f"Total channels processed: {total}")
         print(f"Already subscribed: {already}")
@@ -534,4 +478,5 @@ def main():
 
 
 if __name__ == "__main__":
+    configure_from_argv(sys.argv[1:])
     main()